@@ -42,9 +42,36 @@ def create_app(config_name=None):
     app.register_blueprint(main_bp)
     app.register_blueprint(auth_bp)
     
+    # Compressão (gzip/brotli) das respostas JSON grandes
+    from app.respostas import comprimir_resposta
+    app.after_request(comprimir_resposta)
+    
+    # Backends dos caches (memória, SQLite ou Redis, conforme CACHE_BACKEND)
+    _configurar_caches(app)
+    
     # Cria tabelas no primeiro uso
     with app.app_context():
         db.create_all()
     
     return app
 
+def _configurar_caches(app):
+    """Troca o backend dos caches da aplicação conforme a configuração."""
+    from app.cache_backends import criar_backend
+    from app.calculations import cache_resultados
+    from app.models import _focus_cache
+    
+    _focus_cache.usar(criar_backend(
+        app.config, 'focus',
+        ttl=app.config['FOCUS_CACHE_TTL'],
+        max_itens=16,
+        instance_path=app.instance_path
+    ))
+    cache_resultados.usar(criar_backend(
+        app.config, 'simulacao',
+        ttl=app.config['SIMULACAO_CACHE_TTL'],
+        max_itens=app.config['SIMULACAO_CACHE_ITENS'],
+        max_bytes=app.config['SIMULACAO_CACHE_MB'] * 1024 * 1024,
+        instance_path=app.instance_path
+    ))
+
@@ -0,0 +1,500 @@
+"""
+Backtest dos produtos do simulador com as taxas realizadas
+
+Em vez de uma taxa anual constante, cada produto é capitalizado mês a mês
+com o CDI, a Selic, o IPCA e a TR observados (histórico local do SGS, ver
+app.sgs_historico), com a regra da poupança, a tabela de IR e a custódia do
+Tesouro vigentes em cada época.
+
+O motor trabalha com somas acumuladas: para cada produto calcula uma vez o
+log do fator acumulado desde o início do histórico e, a partir dele, o valor
+de qualquer janela (mês de início, prazo) sai em O(1), inclusive a soma dos
+aportes mensais. Muitas janelas (ex.: todos os meses de início em 20 anos)
+são avaliadas juntas como arrays.
+"""
+import math
+from dataclasses import dataclass, field
+
+import numpy as np
+
+from app.cache import LRUCache, chave_conteudo
+from app.calculations import INVESTIMENTOS_ISENTOS, INVESTIMENTOS_TESOURO, _formatar_evolucao, _produtos_padrao, amostrar_meses
+from app.sgs_historico import PASTA_PADRAO, carregar_serie, versao_series
+
+SERIES_BACKTEST = ('cdi', 'selic', 'selic_meta', 'ipca', 'tr')
+
+# Tabela regressiva (Lei 11.033/2004) para resgates a partir de 2005; antes,
+# alíquota única de 20%. Faixas em meses de aplicação (180/360/720 dias,
+# como no simulador).
+INICIO_IR_REGRESSIVO = np.datetime64('2005-01', 'M')
+IR_ALIQUOTA_ANTERIOR = 0.20
+IR_FAIXAS_MESES = ((6, 0.225), (12, 0.20), (24, 0.175), (math.inf, 0.15))
+
+# Taxa de custódia da B3 no Tesouro Direto (% a.a.) a partir de cada mês
+CUSTODIA_TESOURO_HISTORICA = (
+    ('2000-01', 0.30),
+    ('2020-01', 0.25),
+    ('2023-01', 0.20)
+)
+
+# Regra nova da poupança (Lei 12.703/2012): com a meta Selic em até 8,5% a.a.,
+# rende 70% da meta mais TR; acima disso (e antes de maio/2012), 0,5% a.m. mais TR
+INICIO_POUPANCA_NOVA = np.datetime64('2012-05', 'M')
+POUPANCA_LIMITE_SELIC = 8.5
+
+NOME_CORRECAO_IPCA = 'Correção pelo IPCA'
+
+
+def _mes(datas):
+    return np.asarray(datas).astype('datetime64[M]')
+
+
+def _no_inicio_do_mes(serie, meses):
+    """Valor da primeira observação de cada mês (NaN se o mês não tem observação)."""
+    datas = serie['data']
+    posicao = np.searchsorted(datas, meses.astype('datetime64[D]'), side='left')
+    existe = posicao < len(datas)
+    posicao = np.minimum(posicao, len(datas) - 1)
+    existe &= _mes(datas[posicao]) == meses
+    return np.where(existe, serie['valor'][posicao], np.nan)
+
+
+@dataclass
+class HistoricoMensal:
+    """
+    Séries realizadas em uma grade mensal comum. As taxas diárias (% a.d.)
+    são compostas em fatores mensais; `faltantes` acumula os meses sem
+    observação de alguma série, para recusar janelas que passem por eles.
+    """
+    meses: np.ndarray
+    log_selic: np.ndarray
+    log_ipca: np.ndarray
+    log_poupanca: np.ndarray
+    selic_meta: np.ndarray
+    log_custodia: np.ndarray
+    faltantes: np.ndarray
+    _cdi_indice: np.ndarray = field(repr=False)
+    _cdi_diario: np.ndarray = field(repr=False)
+    _log_cdi: dict = field(default_factory=dict, repr=False)
+
+    def log_cdi(self, percentual):
+        """Log do fator mensal de uma aplicação a `percentual`% do CDI, dia a dia."""
+        chave = float(percentual)
+        if chave not in self._log_cdi:
+            self._log_cdi[chave] = np.bincount(
+                self._cdi_indice,
+                weights=np.log1p(self._cdi_diario * chave / 100),
+                minlength=len(self.meses)
+            )
+        return self._log_cdi[chave]
+
+    def indice(self, mes):
+        """Posição de um mês (AAAA-MM ou datetime64) na grade."""
+        return (_mes(mes) - self.meses[0]).astype(int)
+
+    def periodo(self):
+        return str(self.meses[0]), str(self.meses[-1])
+
+
+def _log_mensal_diario(serie, meses):
+    """Índice do mês e taxa diária (decimal) das observações dentro da grade."""
+    indice = (_mes(serie['data']) - meses[0]).astype(int)
+    dentro = (indice >= 0) & (indice < len(meses))
+    return indice[dentro], serie['valor'][dentro] / 100
+
+
+def montar_historico(pasta=PASTA_PADRAO):
+    """
+    Monta o HistoricoMensal a partir das séries gravadas. O mês da última
+    observação diária é descartado, pois pode estar incompleto.
+    """
+    series = {nome: carregar_serie(nome, pasta) for nome in SERIES_BACKTEST}
+    vazias = [nome for nome, serie in series.items() if not len(serie)]
+    if vazias:
+        raise ValueError(
+            f'Histórico do SGS sem as séries {", ".join(vazias)}: rode python -m app.sgs_historico atualizar'
+        )
+
+    inicio = max(_mes(serie['data'][0]) for serie in series.values())
+    fim = min(
+        _mes(series['cdi']['data'][-1]) - 1,
+        _mes(series['selic']['data'][-1]) - 1,
+        _mes(series['ipca']['data'][-1]),
+        _mes(series['selic_meta']['data'][-1]),
+        _mes(series['tr']['data'][-1])
+    )
+    if fim < inicio:
+        raise ValueError('Histórico do SGS sem meses em comum entre as séries')
+    meses = np.arange(inicio, fim + 1)
+
+    cdi_indice, cdi_diario = _log_mensal_diario(series['cdi'], meses)
+    selic_indice, selic_diaria = _log_mensal_diario(series['selic'], meses)
+    log_selic = np.bincount(selic_indice, weights=np.log1p(selic_diaria), minlength=len(meses))
+
+    ipca = _no_inicio_do_mes(series['ipca'], meses)
+    selic_meta = _no_inicio_do_mes(series['selic_meta'], meses)
+    tr = _no_inicio_do_mes(series['tr'], meses)
+
+    regra_nova = (meses >= INICIO_POUPANCA_NOVA) & (selic_meta <= POUPANCA_LIMITE_SELIC)
+    poupanca = np.where(regra_nova, (1 + 0.7 * selic_meta / 100) ** (1/12) - 1, 0.005) + tr / 100
+
+    vigencias = np.array([_mes(inicio_vigencia) for inicio_vigencia, _ in CUSTODIA_TESOURO_HISTORICA])
+    taxas = np.array([taxa for _, taxa in CUSTODIA_TESOURO_HISTORICA])
+    custodia = taxas[np.maximum(np.searchsorted(vigencias, meses, side='right') - 1, 0)] / 100
+
+    falta = (
+        (np.bincount(cdi_indice, minlength=len(meses)) == 0)
+        | (np.bincount(selic_indice, minlength=len(meses)) == 0)
+        | np.isnan(ipca) | np.isnan(selic_meta) | np.isnan(tr)
+    )
+
+    return HistoricoMensal(
+        meses=meses,
+        log_selic=log_selic,
+        log_ipca=np.log1p(np.nan_to_num(ipca) / 100),
+        log_poupanca=np.log1p(np.nan_to_num(poupanca)),
+        selic_meta=selic_meta,
+        log_custodia=np.log1p(-custodia / 12),
+        faltantes=np.concatenate([[0], np.cumsum(falta)]),
+        _cdi_indice=cdi_indice,
+        _cdi_diario=cdi_diario
+    )
+
+
+_historicos = LRUCache(max_itens=4)
+
+
+def obter_historico(pasta=PASTA_PADRAO):
+    """HistoricoMensal em memória; remontado quando algum arquivo das séries muda."""
+    return _historicos.get_or_set(
+        chave_conteudo(str(pasta), versao_series(SERIES_BACKTEST, pasta)),
+        lambda: montar_historico(pasta)
+    )
+
+
+def _faixas_ir(meses, fim):
+    """
+    Alíquota de cada faixa de prazo dos aportes, pela data do resgate.
+    Retorna [(a, b, aliquota)]: aportes dos meses a..b (1 = fim do primeiro mês)
+    ficam na faixa; antes de 2005 todos pagam a alíquota única.
+    """
+    regressivo = fim >= INICIO_IR_REGRESSIVO
+    faixas = []
+    anterior = -1
+    for limite, aliquota in IR_FAIXAS_MESES:
+        # Aporte do mês j fica aplicado por (meses - j) meses
+        a = np.ones_like(meses) if math.isinf(limite) else np.maximum(1, meses - int(limite))
+        b = np.minimum(meses, meses - anterior - 1)
+        faixas.append((a, b, np.where(regressivo, aliquota, IR_ALIQUOTA_ANTERIOR)))
+        anterior = limite
+    return faixas
+
+
+def _aliquota_prazo(meses, fim):
+    limites = np.array([limite for limite, _ in IR_FAIXAS_MESES[:-1]])
+    aliquotas = np.array([aliquota for _, aliquota in IR_FAIXAS_MESES])
+    regressiva = aliquotas[np.searchsorted(limites, meses, side='left')]
+    return np.where(fim >= INICIO_IR_REGRESSIVO, regressiva, IR_ALIQUOTA_ANTERIOR)
+
+
+def _crescimento(log_fator, inicio, meses, faixas):
+    """
+    Fator do aporte inicial de cada janela e, por faixa (a, b), a soma dos
+    fatores dos aportes feitos no fim dos meses a..b, até o fim da janela.
+    """
+    acumulado = np.concatenate([[0.0], np.cumsum(log_fator)])
+    inversos = np.concatenate([[0.0], np.cumsum(np.exp(-acumulado))])
+    fim = inicio + meses
+
+    fator_inicial = np.exp(acumulado[fim] - acumulado[inicio])
+    somas = []
+    for a, b, _ in faixas:
+        de, ate = inicio + a, inicio + b
+        soma = inversos[np.maximum(ate, de - 1) + 1] - inversos[de]
+        somas.append(np.where(b >= a, soma * np.exp(acumulado[fim]), 0.0))
+    return fator_inicial, somas
+
+
+def _crescimento_por_taxa(log_fator, taxa_log, inicio, meses, faixas):
+    """
+    Como _crescimento, somando a cada janela uma taxa mensal própria (log),
+    ex.: a taxa contratada do prefixado. Janelas com a mesma taxa são
+    calculadas juntas.
+    """
+    if taxa_log is None:
+        return _crescimento(log_fator, inicio, meses, faixas)
+
+    fator_inicial = np.empty(len(inicio))
+    somas = [np.empty(len(inicio)) for _ in faixas]
+    valores, grupo = np.unique(taxa_log, return_inverse=True)
+    for posicao, valor in enumerate(valores):
+        selecao = grupo == posicao
+        parcial, parciais = _crescimento(
+            log_fator + valor,
+            inicio[selecao],
+            meses[selecao],
+            [(a[selecao], b[selecao], aliquota) for a, b, aliquota in faixas]
+        )
+        fator_inicial[selecao] = parcial
+        for soma, valores_faixa in zip(somas, parciais):
+            soma[selecao] = valores_faixa
+    return fator_inicial, somas
+
+
+def _definicoes(historico, parametros, inicio):
+    """
+    Log do fator mensal de cada produto do simulador padrão, em três versões:
+    bruto, após a taxa de administração (base do IR) e após a custódia.
+    """
+    definicoes = []
+    for produto in _produtos_padrao(parametros):
+        tipo = produto['investimento_type']
+        taxa_log = None
+        if tipo in ('lci', 'cdb', 'fundo_di'):
+            bruto = historico.log_cdi(produto['rentabilidade_value'])
+        elif tipo == 'tesouro_selic':
+            bruto = historico.log_selic
+        elif tipo == 'tesouro_prefixado':
+            # Sem taxa informada, usa a meta Selic do mês da compra
+            nominal = parametros.get('tesouro_prefixado_nominal')
+            anual = historico.selic_meta[inicio] if nominal is None else np.full(len(inicio), float(nominal))
+            bruto = np.zeros(len(historico.meses))
+            taxa_log = np.log1p(anual / 100) / 12
+        elif tipo == 'tesouro_ipca':
+            bruto = historico.log_ipca + np.log1p(produto['rentabilidade_value'] / 100) / 12
+        elif tipo == 'poupanca':
+            bruto = historico.log_poupanca
+        else:
+            raise ValueError(f'Produto sem regra de backtest: {tipo}')
+
+        cota = bruto + np.log1p(-produto.get('taxa_custos_extra', 0.0)) / 12
+        final = cota + historico.log_custodia if tipo in INVESTIMENTOS_TESOURO else cota
+        definicoes.append({
+            'nome': produto['nome'],
+            'tipo': tipo,
+            'bruto': bruto,
+            'cota': cota,
+            'final': final,
+            'taxa_log': taxa_log,
+            'tributavel': tipo not in INVESTIMENTOS_ISENTOS and produto.get('incluir_ir', True)
+        })
+
+    definicoes.append({
+        'nome': NOME_CORRECAO_IPCA,
+        'tipo': 'correcao_ipca',
+        'bruto': historico.log_ipca,
+        'cota': historico.log_ipca,
+        'final': historico.log_ipca,
+        'taxa_log': None,
+        'tributavel': False
+    })
+    return definicoes
+
+
+def validar_janelas(historico, inicio, meses):
+    """Lança ValueError se alguma janela sai do histórico ou passa por mês sem dados."""
+    inicio, meses = np.atleast_1d(inicio), np.atleast_1d(meses)
+    fim = inicio + meses
+    if np.any(meses < 1):
+        raise ValueError('Prazo deve ser maior que zero')
+    if np.any(inicio < 0) or np.any(fim > len(historico.meses)):
+        primeiro, ultimo = historico.periodo()
+        raise ValueError(f'Janela fora do histórico disponível ({primeiro} a {ultimo})')
+    if np.any(historico.faltantes[fim] - historico.faltantes[inicio] > 0):
+        raise ValueError('Janela passa por meses sem dados no histórico do SGS')
+
+
+def executar_backtest(inicios, meses, valor_inicial, aportes_mensais=0.0, parametros=None, incluir_ir=True, historico=None):
+    """
+    Avalia os produtos do simulador padrão em várias janelas históricas.
+
+    Args:
+        inicios: meses de início (AAAA-MM ou datetime64[M]); o valor inicial
+            é aplicado no começo do mês.
+        meses (int ou array): prazo de cada janela; os aportes mensais entram
+            no fim de cada mês, como no simulador.
+        parametros (dict): percentuais do CDI, taxa de administração do fundo,
+            tesouro_ipca_mais e, opcionalmente, tesouro_prefixado_nominal (% a.a.).
+        historico (HistoricoMensal): padrão: obter_historico().
+
+    Returns:
+        dict: produtos (e seus tipos), inicio e fim (AAAA-MM) e arrays (janelas × produtos)
+        de valor_bruto, custos, valor_ir, valor_liquido, valor_real etc.
+    """
+    historico = historico or obter_historico()
+    parametros = parametros or {}
+    inicio = np.atleast_1d(historico.indice(inicios))
+    meses = np.broadcast_to(np.asarray(meses, dtype=int), inicio.shape).copy()
+    validar_janelas(historico, inicio, meses)
+
+    fim = inicio + meses
+    mes_resgate = historico.meses[fim - 1]
+    aportes = max(float(aportes_mensais), 0.0)
+    valor_inicial = float(valor_inicial)
+    faixas = _faixas_ir(meses, mes_resgate)
+    aliquota_inicial = _aliquota_prazo(meses, mes_resgate)
+    total_investido = valor_inicial + aportes * meses
+
+    deflator, _ = _crescimento(historico.log_ipca, inicio, meses, [])
+
+    campos = {campo: [] for campo in ('valor_bruto', 'custos', 'valor_ir', 'valor_liquido')}
+    definicoes = _definicoes(historico, parametros, inicio)
+    for definicao in definicoes:
+        valores = {}
+        for versao in ('bruto', 'cota', 'final'):
+            fator_inicial, somas = _crescimento_por_taxa(definicao[versao], definicao['taxa_log'], inicio, meses, faixas)
+            valores[versao] = (fator_inicial, somas)
+
+        def montante(versao):
+            fator_inicial, somas = valores[versao]
+            return valor_inicial * fator_inicial + aportes * sum(somas)
+
+        # IR por faixa de prazo: cada aporte paga a alíquota do seu tempo aplicado
+        valor_ir = np.zeros(len(inicio))
+        if incluir_ir and definicao['tributavel']:
+            fator_inicial, somas = valores['cota']
+            valor_ir += aliquota_inicial * np.maximum(valor_inicial * (fator_inicial - 1), 0.0)
+            for (a, b, aliquota), soma in zip(faixas, somas):
+                quantidade = np.maximum(b - a + 1, 0)
+                valor_ir += aliquota * np.maximum(aportes * (soma - quantidade), 0.0)
+
+        valor_bruto = montante('bruto')
+        valor_final = montante('final')
+        campos['valor_bruto'].append(valor_bruto)
+        campos['custos'].append(valor_bruto - valor_final)
+        campos['valor_ir'].append(valor_ir)
+        campos['valor_liquido'].append(valor_final - valor_ir)
+
+    resultado = {campo: np.column_stack(valores) for campo, valores in campos.items()}
+    valor_liquido = resultado['valor_liquido']
+    correcao_ipca = np.arange(len(definicoes)) == len(definicoes) - 1
+
+    ganho_liquido = valor_liquido - total_investido[:, None]
+    valor_real = np.where(correcao_ipca, valor_liquido, valor_liquido / deflator[:, None])
+    ganho_real = np.where(correcao_ipca, ganho_liquido, valor_real - (total_investido / deflator)[:, None])
+
+    return {
+        'produtos': [definicao['nome'] for definicao in definicoes],
+        'tipos': [definicao['tipo'] for definicao in definicoes],
+        'inicio': historico.meses[inicio].astype(str).tolist(),
+        'fim': mes_resgate.astype(str).tolist(),
+        'meses': meses,
+        'total_investido': total_investido,
+        **resultado,
+        'ganho_liquido': ganho_liquido,
+        'rentabilidade_liquida': np.divide(
+            ganho_liquido, total_investido[:, None],
+            out=np.zeros_like(ganho_liquido), where=total_investido[:, None] > 0
+        ) * 100,
+        'inflacao_acumulada': (deflator - 1) * 100,
+        'valor_real': valor_real,
+        'ganho_real': ganho_real
+    }
+
+
+def backtest(inicio, meses, valor_inicial, aportes_mensais=0.0, parametros=None, incluir_ir=True, pontos=None, historico=None):
+    """
+    Backtest de uma janela, no formato do simulador padrão: um item por
+    produto com os valores finais e a evolução mensal do valor líquido
+    (todos os meses ou `pontos` meses amostrados).
+    """
+    historico = historico or obter_historico()
+    grade = amostrar_meses(int(meses), pontos)
+
+    # A evolução são janelas com o mesmo início e prazos 1..meses; a última é o resultado
+    resultado = executar_backtest(
+        np.repeat(_mes(inicio), len(grade)), grade, valor_inicial, aportes_mensais,
+        parametros, incluir_ir, historico
+    )
+    campos = (
+        'valor_bruto', 'custos', 'valor_ir', 'valor_liquido', 'rentabilidade_liquida',
+        'ganho_liquido', 'valor_real', 'ganho_real'
+    )
+    return {
+        'inicio': resultado['inicio'][-1],
+        'fim': resultado['fim'][-1],
+        'meses': int(meses),
+        'inflacao_acumulada': round(float(resultado['inflacao_acumulada'][-1]), 2),
+        'resultados': [
+            {
+                'nome': nome,
+                'total_investido': round(float(resultado['total_investido'][-1]), 2),
+                **{campo: round(float(resultado[campo][-1, indice]), 2) for campo in campos},
+                'evolucao_mensal': _formatar_evolucao(grade.tolist(), resultado['valor_liquido'][:, indice].tolist())
+            }
+            for indice, nome in enumerate(resultado['produtos'])
+        ]
+    }
+
+
+PERCENTIS_PADRAO = (5, 25, 50, 75, 95)
+
+
+def inicios_disponiveis(historico, meses):
+    """Meses de início cujas janelas de `meses` meses cabem no histórico sem lacunas."""
+    inicio = np.arange(len(historico.meses) - int(meses) + 1)
+    inicio = inicio[historico.faltantes[inicio + int(meses)] - historico.faltantes[inicio] == 0]
+    return historico.meses[inicio]
+
+
+def distribuicao_janelas(meses, valor_inicial, aportes_mensais=0.0, parametros=None, incluir_ir=True,
+                         percentis=PERCENTIS_PADRAO, historico=None):
+    """
+    Distribuição do resultado de cada produto em todas as janelas históricas
+    de `meses` meses (uma por mês de início).
+
+    Returns:
+        dict: período coberto, quantidade de janelas e, por produto, percentis
+        do valor líquido e da rentabilidade líquida, probabilidade de superar
+        a poupança e a inflação e a pior janela.
+    """
+    historico = historico or obter_historico()
+    if int(meses) < 1:
+        raise ValueError('Prazo deve ser maior que zero')
+    inicios = inicios_disponiveis(historico, meses)
+    if not len(inicios):
+        primeiro, ultimo = historico.periodo()
+        raise ValueError(f'Nenhuma janela de {int(meses)} meses no histórico disponível ({primeiro} a {ultimo})')
+
+    resultado = executar_backtest(inicios, meses, valor_inicial, aportes_mensais, parametros, incluir_ir, historico)
+    valor_liquido = resultado['valor_liquido']
+    rentabilidade = resultado['rentabilidade_liquida']
+    poupanca = valor_liquido[:, resultado['tipos'].index('poupanca')]
+    inflacao = valor_liquido[:, resultado['tipos'].index('correcao_ipca')]
+    percentis = [float(p) for p in percentis]
+
+    def _percentis(valores):
+        return dict(zip(
+            (f'p{p:g}' for p in percentis),
+            np.round(np.percentile(valores, percentis, axis=0), 2).tolist()
+        ))
+
+    por_valor = _percentis(valor_liquido)
+    por_rentabilidade = _percentis(rentabilidade)
+    acima_poupanca = (valor_liquido > poupanca[:, None]).mean(axis=0) * 100
+    acima_inflacao = (valor_liquido > inflacao[:, None]).mean(axis=0) * 100
+    pior = np.argmin(valor_liquido, axis=0)
+
+    return {
+        'meses': int(meses),
+        'janelas': len(inicios),
+        'primeiro_inicio': resultado['inicio'][0],
+        'ultimo_inicio': resultado['inicio'][-1],
+        'percentis': percentis,
+        'resultados': [
+            {
+                'nome': nome,
+                'valor_liquido': {chave: valores[indice] for chave, valores in por_valor.items()},
+                'rentabilidade_liquida': {chave: valores[indice] for chave, valores in por_rentabilidade.items()},
+                'prob_supera_poupanca': round(float(acima_poupanca[indice]), 2),
+                'prob_supera_inflacao': round(float(acima_inflacao[indice]), 2),
+                'pior_janela': {
+                    'inicio': resultado['inicio'][pior[indice]],
+                    'fim': resultado['fim'][pior[indice]],
+                    'valor_liquido': round(float(valor_liquido[pior[indice], indice]), 2),
+                    'rentabilidade_liquida': round(float(rentabilidade[pior[indice], indice]), 2)
+                }
+            }
+            for indice, nome in enumerate(resultado['produtos'])
+        ]
+    }
@@ -0,0 +1,272 @@
+"""
+Caches em memória do processo
+"""
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+_AUSENTE = object()
+
+
+def chave_conteudo(*partes):
+    """
+    Hash canônico (sha256, 32 hex) de valores serializáveis em JSON.
+    A ordem das chaves dos dicionários não altera o resultado.
+    """
+    conteudo = json.dumps(partes, sort_keys=True, default=str, separators=(',', ':'))
+    return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()[:32]
+
+
+def tamanho_aproximado(valor):
+    """Memória aproximada (bytes) de listas/dicionários/tuplas de valores simples."""
+    total = 0
+    pendentes = [valor]
+    while pendentes:
+        item = pendentes.pop()
+        total += sys.getsizeof(item)
+        if isinstance(item, dict):
+            pendentes.extend(item.keys())
+            pendentes.extend(item.values())
+        elif isinstance(item, (list, tuple)):
+            pendentes.extend(item)
+    return total
+
+
+class TTLCache:
+    """
+    Cache em memória com expiração por tempo (TTL), seguro para threads.
+    Mantém contadores de acertos (hits) e faltas (misses) para monitoramento.
+    """
+
+    def __init__(self, ttl=300, clock=time.monotonic):
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._dados = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Retorna o valor armazenado ou `default` se ausente/expirado."""
+        with self._lock:
+            item = self._dados.get(key)
+            if item is not None and item[1] > self._clock():
+                self.hits += 1
+                return item[0]
+            self._dados.pop(key, None)
+            self.misses += 1
+            return default
+
+    def set(self, key, value, ttl=None):
+        """Armazena o valor por `ttl` segundos (padrão: TTL do cache)."""
+        expira_em = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._dados[key] = (value, expira_em)
+
+    def get_or_set(self, key, factory, ttl=None):
+        """
+        Retorna o valor em cache ou calcula com `factory()` e armazena.
+        Valores None também são guardados (evita consultas repetidas sem dados).
+        """
+        valor = self.get(key, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = factory()
+            self.set(key, valor, ttl)
+        return valor
+
+    def invalidate(self, key=None):
+        """Remove uma chave (ou todas, se `key` for None)."""
+        with self._lock:
+            if key is None:
+                self._dados.clear()
+            else:
+                self._dados.pop(key, None)
+
+    def stats(self):
+        """Retorna contadores de uso do cache."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'size': len(self._dados),
+                'ttl': self.ttl
+            }
+
+
+class CacheArquivo:
+    """
+    Mantém em memória um valor derivado de um arquivo em disco.
+
+    A cada consulta só verifica mtime e tamanho do arquivo; `carregar(caminho)`
+    é chamado novamente apenas quando um deles muda. Versão e valor ficam em
+    uma única tupla trocada de uma vez, então threads concorrentes sempre veem
+    um par consistente. Se `carregar` falhar, o último valor válido é mantido.
+    """
+
+    def __init__(self, caminho, carregar, padrao=None):
+        self.caminho = caminho
+        self._carregar = carregar
+        self._padrao = padrao
+        self._lock = threading.Lock()
+        self._estado = (_AUSENTE, padrao)
+        self.recargas = 0
+
+    def _versao_arquivo(self):
+        try:
+            info = os.stat(self.caminho)
+        except OSError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def obter_com_versao(self):
+        """
+        Retorna (versao, valor), recarregando se o arquivo mudou.
+        A versão é (mtime_ns, tamanho) do arquivo lido, ou None se ausente.
+        """
+        versao = self._versao_arquivo()
+        estado = self._estado
+        if estado[0] == versao:
+            return estado
+
+        with self._lock:
+            if self._estado[0] == versao:
+                return self._estado
+
+            if versao is None:
+                valor = self._padrao
+            else:
+                try:
+                    valor = self._carregar(self.caminho)
+                except Exception:
+                    return self._estado
+
+            self._estado = (versao, valor)
+            self.recargas += 1
+            return self._estado
+
+    def obter(self):
+        """Retorna o valor atual, recarregando se o arquivo mudou."""
+        return self.obter_com_versao()[1]
+
+
+class LRUCache:
+    """
+    Cache em memória com descarte do item usado há mais tempo (LRU), limitado
+    por quantidade de itens e, opcionalmente, por memória aproximada e por
+    tempo de vida (TTL).
+
+    `garantir_versao(versao)` esvazia o cache quando a versão dos dados de
+    que os valores dependem muda (ex.: arquivo de taxas ou snapshot do Focus).
+    """
+
+    def __init__(self, max_itens=256, max_bytes=None, ttl=None, tamanho=tamanho_aproximado, clock=time.monotonic):
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._tamanho = tamanho
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._dados = OrderedDict()
+        self._bytes = 0
+        self.versao = None
+        self.hits = 0
+        self.misses = 0
+        self.descartes = 0
+
+    def get(self, key, default=None):
+        """Retorna o valor armazenado (marcando-o como usado) ou `default`."""
+        with self._lock:
+            item = self._dados.get(key)
+            if item is not None and item[2] is not None and item[2] <= self._clock():
+                self._bytes -= self._dados.pop(key)[1]
+                item = None
+            if item is None:
+                self.misses += 1
+                return default
+            self._dados.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def set(self, key, value, ttl=None):
+        """Armazena o valor e descarta os menos usados se passar dos limites."""
+        tamanho = self._tamanho(value)
+        ttl = self.ttl if ttl is None else ttl
+        expira_em = None if ttl is None else self._clock() + ttl
+        with self._lock:
+            anterior = self._dados.pop(key, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            if self.max_bytes is not None and tamanho > self.max_bytes:
+                return
+            self._dados[key] = (value, tamanho, expira_em)
+            self._bytes += tamanho
+            self._aplicar_limites()
+
+    def _aplicar_limites(self):
+        while self._dados and (
+            (self.max_itens is not None and len(self._dados) > self.max_itens)
+            or (self.max_bytes is not None and self._bytes > self.max_bytes)
+        ):
+            _, item = self._dados.popitem(last=False)
+            self._bytes -= item[1]
+            self.descartes += 1
+
+    def get_or_set(self, key, factory, ttl=None):
+        """Retorna o valor em cache ou calcula com `factory()` e armazena."""
+        valor = self.get(key, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = factory()
+            self.set(key, valor, ttl)
+        return valor
+
+    def redimensionar(self, max_itens=None, max_bytes=_AUSENTE):
+        """Altera os limites (descartando itens se necessário)."""
+        with self._lock:
+            if max_itens is not None:
+                self.max_itens = max_itens
+            if max_bytes is not _AUSENTE:
+                self.max_bytes = max_bytes
+            self._aplicar_limites()
+
+    def garantir_versao(self, versao):
+        """Esvazia o cache se `versao` for diferente da última informada."""
+        if versao == self.versao:
+            return
+        with self._lock:
+            if versao != self.versao:
+                self._dados.clear()
+                self._bytes = 0
+                self.versao = versao
+
+    def invalidate(self, key=None):
+        """Remove uma chave (ou todas, se `key` for None)."""
+        with self._lock:
+            if key is None:
+                self._dados.clear()
+                self._bytes = 0
+            else:
+                item = self._dados.pop(key, None)
+                if item is not None:
+                    self._bytes -= item[1]
+
+    def stats(self):
+        """Retorna contadores de uso e a memória aproximada ocupada."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else 0.0,
+                'size': len(self._dados),
+                'max_itens': self.max_itens,
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'descartes': self.descartes,
+                'ttl': self.ttl
+            }
@@ -0,0 +1,319 @@
+"""
+Backends de cache compartilháveis entre processos (workers do gunicorn)
+
+Todos seguem a mesma interface dos caches em memória de `app.cache`:
+get, set(ttl), get_or_set, invalidate, garantir_versao e stats. O código da
+aplicação usa um `CacheConfiguravel`, cujo backend é escolhido em create_app
+pela configuração CACHE_BACKEND:
+
+    memoria  LRUCache no próprio processo (padrão)
+    sqlite   arquivo SQLite local, lido por todos os workers da máquina
+    redis    servidor Redis (ou compatível); o cliente pode ser injetado
+
+Nos backends compartilhados os valores são serializados com pickle: use
+apenas arquivos/servidores controlados pela própria aplicação.
+"""
+import fnmatch
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from app.cache import LRUCache, chave_conteudo
+
+_AUSENTE = object()
+
+BACKENDS = ('memoria', 'sqlite', 'redis')
+
+
+class CacheConfiguravel:
+    """
+    Ponto de acesso estável a um cache cujo backend pode ser trocado.
+    Os módulos guardam uma instância no nível do módulo; create_app chama
+    `usar(backend)` de acordo com a configuração.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    def usar(self, backend):
+        self.backend = backend
+
+    def get(self, key, default=None):
+        return self.backend.get(key, default)
+
+    def set(self, key, value, ttl=None):
+        self.backend.set(key, value, ttl)
+
+    def get_or_set(self, key, factory, ttl=None):
+        return self.backend.get_or_set(key, factory, ttl)
+
+    def invalidate(self, key=None):
+        self.backend.invalidate(key)
+
+    def garantir_versao(self, versao):
+        self.backend.garantir_versao(versao)
+
+    def stats(self):
+        return {'backend': type(self.backend).__name__, **self.backend.stats()}
+
+
+class _CacheCompartilhado:
+    """
+    Base dos backends compartilhados. As chaves levam o namespace e a versão
+    dos dados (`garantir_versao`): quando a versão muda, todos os workers
+    passam a usar chaves novas e as antigas expiram ou são descartadas,
+    sem precisar coordenar uma limpeza entre processos.
+    """
+
+    def __init__(self, namespace, ttl=None):
+        self.namespace = namespace
+        self.ttl = ttl
+        self.versao = None
+        self._prefixo_versao = '-'
+        self.hits = 0
+        self.misses = 0
+
+    def _chave(self, key):
+        return f'{self.namespace}:{self._prefixo_versao}:{key}'
+
+    def garantir_versao(self, versao):
+        if versao != self.versao:
+            self.versao = versao
+            self._prefixo_versao = chave_conteudo(versao)[:12]
+
+    def get(self, key, default=None):
+        dados = self._ler(self._chave(key))
+        if dados is None:
+            self.misses += 1
+            return default
+        self.hits += 1
+        return pickle.loads(dados)
+
+    def set(self, key, value, ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        self._gravar(self._chave(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), ttl)
+
+    def get_or_set(self, key, factory, ttl=None):
+        valor = self.get(key, _AUSENTE)
+        if valor is _AUSENTE:
+            valor = factory()
+            self.set(key, valor, ttl)
+        return valor
+
+    def invalidate(self, key=None):
+        if key is None:
+            self._limpar(f'{self.namespace}:')
+        else:
+            self._remover(self._chave(key))
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 4) if total else 0.0,
+            'ttl': self.ttl,
+            **self._stats_backend()
+        }
+
+
+class CacheSQLite(_CacheCompartilhado):
+    """
+    Cache em um arquivo SQLite (modo WAL), compartilhado pelos processos da
+    máquina. Limitado por quantidade de itens e bytes: ao passar do limite,
+    os itens gravados há mais tempo são descartados.
+    """
+
+    def __init__(self, caminho, namespace, ttl=None, max_itens=None, max_bytes=None):
+        super().__init__(namespace, ttl)
+        self.caminho = caminho
+        self.max_itens = max_itens
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self._conexao()
+
+    def _conexao(self):
+        conexao = getattr(self._local, 'conexao', None)
+        if conexao is None:
+            conexao = sqlite3.connect(self.caminho, timeout=5, isolation_level=None)
+            conexao.execute('PRAGMA journal_mode=WAL')
+            conexao.execute('PRAGMA synchronous=NORMAL')
+            conexao.execute(
+                'CREATE TABLE IF NOT EXISTS cache ('
+                ' chave TEXT PRIMARY KEY,'
+                ' namespace TEXT NOT NULL,'
+                ' valor BLOB NOT NULL,'
+                ' tamanho INTEGER NOT NULL,'
+                ' gravado_em REAL NOT NULL,'
+                ' expira_em REAL)'
+            )
+            conexao.execute('CREATE INDEX IF NOT EXISTS ix_cache_namespace ON cache (namespace, gravado_em)')
+            self._local.conexao = conexao
+        return conexao
+
+    def _ler(self, chave):
+        linha = self._conexao().execute(
+            'SELECT valor, expira_em FROM cache WHERE chave = ?', (chave,)
+        ).fetchone()
+        if linha is None:
+            return None
+        if linha[1] is not None and linha[1] <= time.time():
+            self._remover(chave)
+            return None
+        return linha[0]
+
+    def _gravar(self, chave, dados, ttl):
+        agora = time.time()
+        conexao = self._conexao()
+        conexao.execute(
+            'INSERT OR REPLACE INTO cache (chave, namespace, valor, tamanho, gravado_em, expira_em)'
+            ' VALUES (?, ?, ?, ?, ?, ?)',
+            (chave, self.namespace, dados, len(dados), agora, None if ttl is None else agora + ttl)
+        )
+        self._aplicar_limites(conexao)
+
+    def _aplicar_limites(self, conexao):
+        if self.max_itens is not None:
+            conexao.execute(
+                'DELETE FROM cache WHERE chave IN ('
+                ' SELECT chave FROM cache WHERE namespace = ?'
+                ' ORDER BY gravado_em DESC LIMIT -1 OFFSET ?)',
+                (self.namespace, self.max_itens)
+            )
+        if self.max_bytes is not None:
+            total = conexao.execute(
+                'SELECT COALESCE(SUM(tamanho), 0) FROM cache WHERE namespace = ?', (self.namespace,)
+            ).fetchone()[0]
+            if total > self.max_bytes:
+                excesso = total - self.max_bytes
+                antigos = conexao.execute(
+                    'SELECT chave, tamanho FROM cache WHERE namespace = ? ORDER BY gravado_em',
+                    (self.namespace,)
+                )
+                remover = []
+                for chave, tamanho in antigos:
+                    if excesso <= 0:
+                        break
+                    remover.append((chave,))
+                    excesso -= tamanho
+                conexao.executemany('DELETE FROM cache WHERE chave = ?', remover)
+
+    def _remover(self, chave):
+        self._conexao().execute('DELETE FROM cache WHERE chave = ?', (chave,))
+
+    def _limpar(self, prefixo):
+        self._conexao().execute('DELETE FROM cache WHERE namespace = ?', (self.namespace,))
+
+    def _stats_backend(self):
+        itens, total = self._conexao().execute(
+            'SELECT COUNT(*), COALESCE(SUM(tamanho), 0) FROM cache WHERE namespace = ?',
+            (self.namespace,)
+        ).fetchone()
+        return {
+            'size': itens,
+            'bytes': total,
+            'max_itens': self.max_itens,
+            'max_bytes': self.max_bytes,
+            'caminho': str(self.caminho)
+        }
+
+
+class CacheRedis(_CacheCompartilhado):
+    """
+    Cache em um servidor Redis (ou compatível). `cliente` precisa oferecer
+    get, set(ex=...), delete e scan_iter(match=...), como redis.Redis ou
+    ClienteRedisMemoria. O limite de memória fica a cargo do servidor
+    (maxmemory / política de descarte).
+    """
+
+    def __init__(self, cliente, namespace, ttl=None, prefixo='renda_fixa:'):
+        super().__init__(namespace, ttl)
+        self.cliente = cliente
+        self.prefixo = prefixo
+
+    def _ler(self, chave):
+        return self.cliente.get(self.prefixo + chave)
+
+    def _gravar(self, chave, dados, ttl):
+        self.cliente.set(self.prefixo + chave, dados, ex=None if ttl is None else max(int(ttl), 1))
+
+    def _remover(self, chave):
+        self.cliente.delete(self.prefixo + chave)
+
+    def _limpar(self, prefixo):
+        chaves = list(self.cliente.scan_iter(match=f'{self.prefixo}{prefixo}*'))
+        if chaves:
+            self.cliente.delete(*chaves)
+
+    def _stats_backend(self):
+        return {'prefixo': f'{self.prefixo}{self.namespace}:'}
+
+
+class ClienteRedisMemoria:
+    """
+    Substituto em memória de um cliente Redis, com o subconjunto de comandos
+    usado por CacheRedis. Útil em testes e desenvolvimento sem servidor.
+    """
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._dados = {}
+        self._lock = threading.Lock()
+
+    def _vivo(self, chave):
+        item = self._dados.get(chave)
+        if item is not None and item[1] is not None and item[1] <= self._clock():
+            del self._dados[chave]
+            return None
+        return item
+
+    def get(self, chave):
+        with self._lock:
+            item = self._vivo(chave)
+            return None if item is None else item[0]
+
+    def set(self, chave, valor, ex=None):
+        with self._lock:
+            self._dados[chave] = (valor, None if ex is None else self._clock() + ex)
+        return True
+
+    def delete(self, *chaves):
+        with self._lock:
+            return sum(self._dados.pop(chave, None) is not None for chave in chaves)
+
+    def scan_iter(self, match='*'):
+        with self._lock:
+            chaves = [chave for chave in self._dados if self._vivo(chave) is not None]
+        return iter([chave for chave in chaves if fnmatch.fnmatchcase(chave, match)])
+
+
+def criar_backend(config, namespace, ttl=None, max_itens=None, max_bytes=None, instance_path=None, cliente_redis=None):
+    """
+    Cria o backend de cache indicado por config['CACHE_BACKEND'] para um
+    namespace (ex.: 'focus', 'simulacao').
+    """
+    backend = config.get('CACHE_BACKEND', 'memoria')
+
+    if backend == 'memoria':
+        return LRUCache(max_itens=max_itens, max_bytes=max_bytes, ttl=ttl)
+
+    if backend == 'sqlite':
+        caminho = config.get('CACHE_SQLITE_PATH')
+        if not caminho:
+            os.makedirs(instance_path, exist_ok=True)
+            caminho = os.path.join(instance_path, 'cache.sqlite3')
+        return CacheSQLite(caminho, namespace, ttl=ttl, max_itens=max_itens, max_bytes=max_bytes)
+
+    if backend == 'redis':
+        cliente_redis = cliente_redis or config.get('CACHE_REDIS_CLIENTE')
+        if cliente_redis is None:
+            try:
+                import redis
+            except ImportError:
+                raise RuntimeError('CACHE_BACKEND=redis requer o pacote redis (pip install redis)')
+            cliente_redis = redis.Redis.from_url(config['CACHE_REDIS_URL'])
+        return CacheRedis(cliente_redis, namespace, ttl=ttl, prefixo=config.get('CACHE_REDIS_PREFIXO', 'renda_fixa:'))
+
+    raise ValueError(f'CACHE_BACKEND inválido: {backend} (use {", ".join(BACKENDS)})')
@@ -2,7 +2,13 @@
 Módulo de cálculos financeiros para o comparador de renda fixa
 """
 import math
+from dataclasses import dataclass
 from datetime import datetime
+
+import numpy as np
+
+from app.cache import LRUCache, chave_conteudo
+from app.cache_backends import CacheConfiguravel
 from app.models import FocusData
 
 # Tabela regressiva de IR — regra vigente
@@ -17,6 +23,17 @@ IR_TABLES = {
 }
 
 INVESTIMENTOS_ISENTOS = {'lci', 'lca', 'debenture_incentivada'}
+INVESTIMENTOS_TESOURO = {'tesouro_selic', 'tesouro_ipca', 'tesouro_prefixado'}
+
+# Formatos da evolução mensal nas respostas do simulador:
+# 'objetos' -> [{'mes': m, 'valor_liquido': v}, ...]
+# 'colunar' -> [v1, v2, ...] (os meses vêm uma única vez, fora dos produtos)
+# 'delta'   -> [c1, c2 - c1, c3 - c2, ...] em centavos inteiros
+FORMATOS_EVOLUCAO = ('objetos', 'colunar', 'delta')
+
+# Tabela vigente em formato de arrays para consulta vetorizada (searchsorted)
+_IR_LIMITES_DIAS = np.array([limite for limite, _ in IR_TABLES['vigente'][:-1]], dtype=float)
+_IR_ALIQUOTAS = np.array([aliquota for _, aliquota in IR_TABLES['vigente']], dtype=float)
 
 
 def get_ir_rate(days, investimento_type=None, tax_regime=None):
@@ -31,6 +48,14 @@ def get_ir_rate(days, investimento_type=None, tax_regime=None):
     return table[-1][1]
 
 
+def get_ir_rates(days):
+    """
+    Versão vetorizada de get_ir_rate: recebe um array de prazos em dias
+    e devolve o array de alíquotas correspondentes.
+    """
+    return _IR_ALIQUOTAS[np.searchsorted(_IR_LIMITES_DIAS, days, side='left')]
+
+
 def get_focus_projection(year=None):
     """Retorna projeção do Focus para o ano especificado (ou ano atual)"""
     if year is None:
@@ -40,53 +65,51 @@ def get_focus_projection(year=None):
     if not focus:
         return None
     
-    projections = {}
-    if year == 2025:
-        projections = {
-            'ipca': focus.ipca_2025,
-            'selic': focus.selic_2025,
-            'pib': focus.pib_2025,
-            'cambio': focus.cambio_2025
-        }
-    elif year == 2026:
-        projections = {
-            'ipca': focus.ipca_2026,
-            'selic': focus.selic_2026,
-            'pib': focus.pib_2026,
-            'cambio': focus.cambio_2026
-        }
-    elif year == 2027:
-        projections = {
-            'ipca': focus.ipca_2027,
-            'selic': focus.selic_2027,
-            'pib': focus.pib_2027,
-            'cambio': focus.cambio_2027
-        }
-    elif year == 2028:
-        projections = {
-            'ipca': focus.ipca_2028,
-            'selic': focus.selic_2028,
-            'pib': focus.pib_2028,
-            'cambio': focus.cambio_2028
-        }
+    projections = {indicador: focus.projecao(indicador, year) for indicador in FocusData.INDICADORES}
     
     return projections if any(projections.values()) else None
 
-def calcular_cdi(selic=None):
-    """Calcula CDI aproximado (CDI ≈ Selic - 0,10%)"""
-    if selic is None:
-        # Tenta pegar do Focus
-        year = datetime.now().year
-        focus = get_focus_projection(year)
-        if focus and focus.get('selic'):
-            selic = focus['selic'] / 100
-        else:
-            # Valor padrão se não houver Focus
-            selic = 0.15  # 15% a.a.
-    else:
-        selic = selic / 100
-    
-    cdi = selic - 0.001  # Selic - 0,10%
+# Valores padrão quando não há projeção do Focus (% a.a.)
+SELIC_PADRAO = 15.0
+IPCA_PADRAO = 4.5
+
+# Convenção do CDI em todo o cálculo: o `cdi` informado pelo chamador ou, sem
+# ele, a Selic menos SPREAD_CDI (p.p.). Curvas e trajetórias de Selic usam a
+# mesma diferença (spread_cdi).
+SPREAD_CDI = 0.1
+
+
+@dataclass(frozen=True)
+class ContextoMercado:
+    """Taxas macro (% a.a.) resolvidas uma única vez e repassadas aos cálculos."""
+    selic: float = None
+    ipca: float = None
+
+
+def resolver_contexto_mercado(selic=None, ipca=None, precisa_selic=True, precisa_ipca=True):
+    """
+    Resolve Selic e IPCA para um cálculo: usa os valores informados e, se
+    algum necessário faltar, a projeção do Focus para o ano atual (uma única
+    consulta) ou os valores padrão. Taxas não necessárias podem ficar None.
+    """
+    if (precisa_selic and selic is None) or (precisa_ipca and ipca is None):
+        focus = get_focus_projection(datetime.now().year) or {}
+        if selic is None:
+            selic = focus.get('selic') or SELIC_PADRAO
+        if ipca is None:
+            ipca = focus.get('ipca') or IPCA_PADRAO
+    return ContextoMercado(selic=selic, ipca=ipca)
+
+
+def calcular_cdi(selic=None, contexto=None):
+    """Calcula CDI aproximado (CDI ≈ Selic - SPREAD_CDI)"""
+    if contexto is not None:
+        selic = contexto.selic
+    elif selic is None:
+        # Tenta pegar do Focus (ou usa o padrão)
+        selic = resolver_contexto_mercado(precisa_ipca=False).selic
+    
+    cdi = (selic - SPREAD_CDI) / 100  # Selic - 0,10%
     return max(cdi, 0) * 100  # Retorna em porcentagem
 
 def calcular_rentabilidade_bruta(
@@ -99,7 +122,9 @@ def calcular_rentabilidade_bruta(
     selic=None,
     ipca=None,
     taxa_custodia_tesouro=0.002,
-    taxa_custos_extra=0.0
+    taxa_custos_extra=0.0,
+    contexto=None,
+    curva=None
 ):
     """
     Calcula rentabilidade bruta do investimento
@@ -113,6 +138,9 @@ def calcular_rentabilidade_bruta(
         meses: prazo em meses
         selic: taxa Selic (opcional, tenta pegar do Focus)
         ipca: taxa IPCA (opcional, tenta pegar do Focus)
+        contexto: ContextoMercado já resolvido (dispensa consultar o Focus)
+        curva: CurvaTaxas (app.curva_taxas); se informada, CDI e IPCA+ seguem
+            as taxas de cada ano em vez da taxa única
     
     Returns:
         dict com valor_bruto, rentabilidade_efetiva, custos
@@ -121,26 +149,24 @@ def calcular_rentabilidade_bruta(
     anos = meses / 12
     meses_decimal = meses
     
+    if contexto is None:
+        contexto = resolver_contexto_mercado(
+            selic,
+            ipca,
+            precisa_selic=rentabilidade_type == 'cdi',
+            precisa_ipca=rentabilidade_type == 'ipca_mais'
+        )
+    
     # Determina taxa efetiva anual
     if rentabilidade_type == 'prefixado':
         taxa_anual = rentabilidade_value / 100
         
     elif rentabilidade_type == 'cdi':
-        cdi_anual = calcular_cdi(selic) / 100
+        cdi_anual = calcular_cdi(contexto=contexto) / 100
         taxa_anual = (cdi_anual * rentabilidade_value) / 100
         
     elif rentabilidade_type == 'ipca_mais':
-        # Tenta pegar IPCA do Focus
-        if ipca is None:
-            year = datetime.now().year
-            focus = get_focus_projection(year)
-            if focus and focus.get('ipca'):
-                ipca_anual = focus['ipca'] / 100
-            else:
-                ipca_anual = 0.045  # 4,5% padrão
-        else:
-            ipca_anual = ipca / 100
-        
+        ipca_anual = contexto.ipca / 100
         taxa_prefixada = rentabilidade_value / 100
         taxa_anual = (1 + ipca_anual) * (1 + taxa_prefixada) - 1
     else:
@@ -149,8 +175,12 @@ def calcular_rentabilidade_bruta(
     # Taxa mensal
     taxa_mensal = (1 + taxa_anual) ** (1/12) - 1
     
+    fatores = curva.fatores(rentabilidade_type, rentabilidade_value) if curva is not None else None
+    
     # Calcula valor bruto com juros compostos
-    if aportes_mensais > 0:
+    if fatores is not None:
+        valor_bruto = float(fatores.valor_futuro(valor_inicial, aportes_mensais, meses))
+    elif aportes_mensais > 0:
         # Fórmula de anuidade (valor futuro com aportes)
         valor_futuro_inicial = valor_inicial * (1 + taxa_mensal) ** meses
         valor_futuro_aportes = aportes_mensais * (((1 + taxa_mensal) ** meses - 1) / taxa_mensal)
@@ -194,7 +224,7 @@ def calcular_imposto_renda(valor_bruto, total_investido, meses, investimento_typ
 
     #return valor_ir
 
-def ajustar_inflacao(valor_nominal, meses, ipca=None):
+def ajustar_inflacao(valor_nominal, meses, ipca=None, contexto=None, curva=None):
     """
     Ajusta valor nominal pela inflação (IPCA)
     
@@ -202,20 +232,21 @@ def ajustar_inflacao(valor_nominal, meses, ipca=None):
         valor_nominal: valor em reais
         meses: prazo em meses
         ipca: taxa IPCA anual (opcional, tenta pegar do Focus)
+        contexto: ContextoMercado já resolvido (dispensa consultar o Focus)
+        curva: CurvaTaxas; se informada, desconta o IPCA de cada ano
     
     Returns:
         valor_real: valor ajustado pela inflação
     """
-    # Tenta pegar IPCA do Focus
-    if ipca is None:
-        year = datetime.now().year
-        focus = get_focus_projection(year)
-        if focus and focus.get('ipca'):
-            ipca_anual = focus['ipca'] / 100
-        else:
-            ipca_anual = 0.045  # 4,5% padrão
-    else:
-        ipca_anual = ipca / 100
+    if curva is not None:
+        return valor_nominal / float(curva.deflator(meses))
+    
+    if contexto is not None:
+        ipca = contexto.ipca
+    elif ipca is None:
+        # Tenta pegar IPCA do Focus (ou usa o padrão)
+        ipca = resolver_contexto_mercado(precisa_selic=False).ipca
+    ipca_anual = ipca / 100
     
     # Taxa mensal de inflação
     ipca_mensal = (1 + ipca_anual) ** (1/12) - 1
@@ -238,14 +269,30 @@ def calcular_investimento_completo(
     ipca=None,
     tax_regime='vigente',
     taxa_custodia_tesouro=0.002,
-    taxa_custos_extra=0.0
+    taxa_custos_extra=0.0,
+    contexto=None,
+    curva=None
 ):
     """
     Calcula investimento completo com todas as opções
     
+    Selic e IPCA são resolvidos uma única vez em um ContextoMercado (no máximo
+    uma consulta ao Focus) e repassados a todas as etapas do cálculo. Quem faz
+    vários cálculos na mesma requisição pode resolver e informar `contexto`.
+    Com `curva` (CurvaTaxas), CDI, IPCA+ e a correção pela inflação seguem a
+    curva por ano do Focus.
+    
     Returns:
         dict com todos os valores calculados
     """
+    if contexto is None:
+        contexto = resolver_contexto_mercado(
+            selic,
+            ipca,
+            precisa_selic=rentabilidade_type == 'cdi',
+            precisa_ipca=rentabilidade_type == 'ipca_mais' or ajustar_inflacao_flag
+        )
+    
     # Calcula rentabilidade bruta
     resultado = calcular_rentabilidade_bruta(
         investimento_type,
@@ -257,7 +304,9 @@ def calcular_investimento_completo(
         selic,
         ipca,
         taxa_custodia_tesouro=taxa_custodia_tesouro,
-        taxa_custos_extra=taxa_custos_extra
+        taxa_custos_extra=taxa_custos_extra,
+        contexto=contexto,
+        curva=curva
     )
     
     # Calcula IR
@@ -282,8 +331,8 @@ def calcular_investimento_completo(
     valor_real = valor_liquido
     ganho_real = ganho_liquido
     if ajustar_inflacao_flag:
-        valor_real = ajustar_inflacao(valor_liquido, meses, ipca)
-        ganho_real = valor_real - ajustar_inflacao(resultado['total_investido'], meses, ipca)
+        valor_real = ajustar_inflacao(valor_liquido, meses, contexto=contexto, curva=curva)
+        ganho_real = valor_real - ajustar_inflacao(resultado['total_investido'], meses, contexto=contexto, curva=curva)
     
     return {
         'valor_bruto': resultado['valor_bruto'],
@@ -313,6 +362,64 @@ def _calcular_valor_futuro(prefixada_mensal, valor_inicial, aportes_mensais, mes
     return valor_futuro_inicial + valor_futuro_aportes
 
 
+def _produtos_padrao(parametros):
+    """
+    Define os produtos comparados pelo simulador padrão a partir dos
+    parâmetros informados (taxas em % a.a. e percentuais do CDI).
+    """
+    selic = parametros.get('selic', 0.0)
+    poupanca_mensal = parametros.get('poupanca_mensal', 0.5) / 100
+    
+    return [
+        # LCI/LCA (isentos até 2025)
+        {
+            'nome': 'LCI e LCA',
+            'investimento_type': 'lci',
+            'rentabilidade_type': 'cdi',
+            'rentabilidade_value': parametros.get('rentabilidade_lci_lca', 90.0)
+        },
+        {
+            'nome': 'CDB',
+            'investimento_type': 'cdb',
+            'rentabilidade_type': 'cdi',
+            'rentabilidade_value': parametros.get('rentabilidade_cdb', 100.0)
+        },
+        {
+            'nome': 'Tesouro Selic',
+            'investimento_type': 'tesouro_selic',
+            'rentabilidade_type': 'prefixado',
+            'rentabilidade_value': selic
+        },
+        {
+            'nome': 'Fundo DI',
+            'investimento_type': 'fundo_di',
+            'rentabilidade_type': 'cdi',
+            'rentabilidade_value': parametros.get('rentabilidade_fundo_di', 95.0),
+            'taxa_custos_extra': parametros.get('taxa_admin_fundo_di', 0.0) / 100
+        },
+        {
+            'nome': 'Tesouro Prefixado',
+            'investimento_type': 'tesouro_prefixado',
+            'rentabilidade_type': 'prefixado',
+            'rentabilidade_value': parametros.get('tesouro_prefixado_nominal', selic)
+        },
+        {
+            'nome': 'Tesouro IPCA+',
+            'investimento_type': 'tesouro_ipca',
+            'rentabilidade_type': 'ipca_mais',
+            'rentabilidade_value': parametros.get('tesouro_ipca_mais', 5.0)
+        },
+        # Poupança (isenta de IR)
+        {
+            'nome': 'Poupança',
+            'investimento_type': 'poupanca',
+            'rentabilidade_type': 'prefixado',
+            'rentabilidade_value': ((1 + poupanca_mensal) ** 12 - 1) * 100,
+            'incluir_ir': False
+        }
+    ]
+
+
 def simular_investimentos_padrao(
     valor_inicial,
     aportes_mensais,
@@ -320,213 +427,293 @@ def simular_investimentos_padrao(
     parametros,
     incluir_ir=True,
     ajustar_inflacao_flag=True,
-    tax_regime='vigente'
+    tax_regime='vigente',
+    pontos=None,
+    formato_evolucao='objetos',
+    usar_cache=True
 ):
     """
     Realiza uma simulação padronizada com múltiplos investimentos de uma vez.
     
+    Entradas iguais produzem resultados iguais, então o resultado fica em um
+    cache LRU (`cache_resultados`) endereçado pelo hash canônico do cenário.
+    A lista devolvida pode ser compartilhada com outras chamadas: não altere.
+    
     Args:
         valor_inicial (float): aporte inicial.
         aportes_mensais (float): aportes mensais.
         meses (int): prazo da aplicação.
         parametros (dict): dicionário com taxas configuráveis.
+        pontos (int): se informado, a evolução traz só essa quantidade de meses amostrados.
+        formato_evolucao (str): 'objetos', 'colunar' ou 'delta' (ver FORMATOS_EVOLUCAO).
+        usar_cache (bool): consulta/alimenta o cache de resultados.
     
     Returns:
         list[dict]: lista com resultados formatados por investimento.
     """
-    selic = parametros.get('selic', 0.0)
-    cdi = parametros.get('cdi', selic)
-    ipca = parametros.get('ipca', 0.0)
-    taxa_custodia = parametros.get('taxa_custodia', 0.2) / 100
-    taxa_admin_fundo_di = parametros.get('taxa_admin_fundo_di', 0.0) / 100
-    
-    total_investido = valor_inicial + aportes_mensais * meses
-    
-    resultados = []
-    
-    def registrar(nome, resultado, investimento_type, rentabilidade_type, rentabilidade_value, taxa_custos_extra=0.0, extras=None):
-        extras = extras or {}
-        # Calcula evolução mensal
-        evolucao_mensal = calcular_evolucao_mensal(
-            investimento_type=investimento_type,
-            rentabilidade_type=rentabilidade_type,
-            rentabilidade_value=rentabilidade_value,
-            valor_inicial=valor_inicial,
-            aportes_mensais=aportes_mensais,
-            meses=meses,
-            parametros=parametros,
-            incluir_ir=incluir_ir,
-            ajustar_inflacao_flag=ajustar_inflacao_flag,
-            tax_regime=tax_regime,
-            taxa_custos_extra=taxa_custos_extra
-        )
-        
-        resultados.append({
-            'nome': nome,
-            'total_investido': round(resultado['total_investido'], 2),
-            'valor_bruto': round(resultado['valor_bruto'], 2),
-            'rentabilidade_bruta': round(resultado['rentabilidade_bruta'], 2),
-            'custos': round(resultado['custos'], 2),
-            'valor_ir': round(resultado['valor_ir'], 2),
-            'valor_liquido': round(resultado['valor_liquido'], 2),
-            'rentabilidade_liquida': round(resultado['rentabilidade_liquida'], 2),
-            'ganho_liquido': round(resultado['ganho_liquido'], 2),
-            'valor_real': round(resultado['valor_real'], 2),
-            'ganho_real': round(resultado['ganho_real'], 2),
-            'evolucao_mensal': evolucao_mensal,
-            **extras
-        })
-    
-    def executar(investimento_type, rentabilidade_type, rentabilidade_value, **kwargs):
-        argumentos = {
-            'investimento_type': investimento_type,
-            'rentabilidade_type': rentabilidade_type,
-            'rentabilidade_value': rentabilidade_value,
-            'valor_inicial': valor_inicial,
-            'aportes_mensais': aportes_mensais,
-            'meses': meses,
-            'incluir_ir': incluir_ir,
-            'ajustar_inflacao_flag': ajustar_inflacao_flag,
-            'selic': selic,
-            'ipca': ipca,
-            'tax_regime': tax_regime,
-            'taxa_custodia_tesouro': taxa_custodia
-        }
-        argumentos.update(kwargs)
-        return calcular_investimento_completo(**argumentos)
-    
-    # LCI/LCA (isentos até 2025)
-    rent_lci = parametros.get('rentabilidade_lci_lca', 90.0)
-    resultado_lci = executar(
-        investimento_type='lci',
-        rentabilidade_type='cdi',
-        rentabilidade_value=rent_lci,
-        taxa_custos_extra=0.0
-    )
-    registrar('LCI e LCA', resultado_lci, 'lci', 'cdi', rent_lci, 0.0)
-    
-    # CDB
-    rent_cdb = parametros.get('rentabilidade_cdb', 100.0)
-    resultado_cdb = executar(
-        investimento_type='cdb',
-        rentabilidade_type='cdi',
-        rentabilidade_value=rent_cdb,
-        taxa_custos_extra=0.0
-    )
-    registrar('CDB', resultado_cdb, 'cdb', 'cdi', rent_cdb, 0.0)
-    
-    # Tesouro Selic
-    selic_val = parametros.get('selic', selic)
-    resultado_selic = executar(
-        investimento_type='tesouro_selic',
-        rentabilidade_type='prefixado',
-        rentabilidade_value=selic_val,
-        taxa_custos_extra=0.0
-    )
-    registrar('Tesouro Selic', resultado_selic, 'tesouro_selic', 'prefixado', selic_val, 0.0)
-    
-    # Fundo DI
-    rent_fundo = parametros.get('rentabilidade_fundo_di', 95.0)
-    resultado_fundo_di = executar(
-        investimento_type='fundo_di',
-        rentabilidade_type='cdi',
-        rentabilidade_value=rent_fundo,
-        taxa_custos_extra=taxa_admin_fundo_di
+    cenario = {
+        'valor_inicial': valor_inicial,
+        'aportes_mensais': aportes_mensais,
+        'meses': meses,
+        'parametros': parametros,
+        'incluir_ir': incluir_ir,
+        'ajustar_inflacao': ajustar_inflacao_flag,
+        'pontos': pontos,
+        'formato_evolucao': formato_evolucao
+    }
+    if not usar_cache:
+        return next(simular_lote([cenario], tax_regime=tax_regime))
+    
+    return cache_resultados.get_or_set(
+        chave_simulacao(cenario, tax_regime),
+        lambda: next(simular_lote([cenario], tax_regime=tax_regime))
     )
-    registrar('Fundo DI', resultado_fundo_di, 'fundo_di', 'cdi', rent_fundo, taxa_admin_fundo_di)
-    
-    # Tesouro Prefixado
-    tesouro_pref = parametros.get('tesouro_prefixado_nominal', selic)
-    resultado_prefixado = executar(
-        investimento_type='tesouro_prefixado',
-        rentabilidade_type='prefixado',
-        rentabilidade_value=tesouro_pref,
-        taxa_custos_extra=0.0
+
+
+# Resultados de simular_investimentos_padrao; backend e limites definidos em
+# create_app. Invalidado quando muda a versão das taxas ou do Focus (garantir_versao)
+cache_resultados = CacheConfiguravel(LRUCache(max_itens=256, max_bytes=64 * 1024 * 1024))
+
+
+def _normalizar_parametro(valor):
+    try:
+        return float(valor)
+    except (TypeError, ValueError):
+        return valor
+
+
+def chave_simulacao(cenario, tax_regime='vigente'):
+    """
+    Chave canônica de um cenário do simulador padrão: tipos normalizados
+    (10000 e 10000.0 geram a mesma chave) e `pontos` sem efeito descartado.
+    """
+    meses = int(cenario['meses'])
+    pontos = cenario.get('pontos')
+    if not pontos or int(pontos) >= meses:
+        pontos = None
+    return chave_conteudo(
+        float(cenario['valor_inicial']),
+        float(cenario.get('aportes_mensais', 0.0)),
+        meses,
+        {chave: _normalizar_parametro(valor) for chave, valor in (cenario.get('parametros') or {}).items()},
+        bool(cenario.get('incluir_ir', True)),
+        bool(cenario.get('ajustar_inflacao', True)),
+        pontos and int(pontos),
+        cenario.get('formato_evolucao') or 'objetos',
+        tax_regime
     )
-    registrar('Tesouro Prefixado', resultado_prefixado, 'tesouro_prefixado', 'prefixado', tesouro_pref, 0.0)
-    
-    # Tesouro IPCA+
-    tesouro_ipca_val = parametros.get('tesouro_ipca_mais', 5.0)
-    resultado_ipca = executar(
-        investimento_type='tesouro_ipca',
-        rentabilidade_type='ipca_mais',
-        rentabilidade_value=tesouro_ipca_val,
-        taxa_custos_extra=0.0
+
+
+def simular_lote(cenarios, tamanho_bloco=100, tax_regime='vigente'):
+    """
+    Simula vários cenários do simulador padrão em uma única passada.
+    
+    Os cenários são processados em blocos: para cada produto, os valores
+    finais e a evolução mensal de todos os cenários do bloco são calculados
+    como arrays (cenários × meses), em vez de cenário a cenário.
+    
+    Args:
+        cenarios (list[dict]): cada item com valor_inicial, aportes_mensais,
+            meses, parametros e, opcionalmente, incluir_ir, ajustar_inflacao,
+            pontos (quantidade de meses amostrados na evolução) e
+            formato_evolucao (ver FORMATOS_EVOLUCAO).
+        tamanho_bloco (int): cenários calculados por bloco (limita a memória).
+    
+    Yields:
+        list[dict]: resultados de cada cenário, na ordem recebida.
+    """
+    for inicio in range(0, len(cenarios), tamanho_bloco):
+        yield from _simular_bloco(cenarios[inicio:inicio + tamanho_bloco], tax_regime)
+
+
+def _simular_bloco(cenarios, tax_regime='vigente'):
+    """
+    Calcula um bloco de cenários em uma única passada.
+    
+    Todos os produtos (incluindo a correção pelo IPCA) são avaliados juntos
+    como uma matriz (cenários × produtos × meses). Os valores finais de cada
+    produto são a última linha da sua própria trajetória.
+    """
+    valor_inicial = np.array([float(c['valor_inicial']) for c in cenarios])
+    aportes_mensais = np.array([float(c.get('aportes_mensais', 0.0)) for c in cenarios])
+    meses = np.array([int(c['meses']) for c in cenarios])
+    incluir_ir = np.array([bool(c.get('incluir_ir', True)) for c in cenarios])
+    ajustar = np.array([bool(c.get('ajustar_inflacao', True)) for c in cenarios])
+    parametros = [c.get('parametros') or {} for c in cenarios]
+    
+    cdi = np.array([cdi_parametros(p) for p in parametros], dtype=float)
+    ipca = np.array([p.get('ipca', 0.0) or 0.0 for p in parametros], dtype=float)
+    taxa_custodia = np.array([p.get('taxa_custodia', 0.2) for p in parametros], dtype=float) / 100
+    
+    # Matriz de parâmetros (cenários × produtos); a última coluna é a correção pelo IPCA
+    produtos = [_produtos_padrao(p) for p in parametros]
+    definicoes = produtos[0]
+    taxa_anual = np.column_stack([
+        _taxa_anual_lote(
+            definicao['rentabilidade_type'],
+            np.array([p[indice]['rentabilidade_value'] for p in produtos], dtype=float),
+            cdi,
+            ipca
+        )
+        for indice, definicao in enumerate(definicoes)
+    ] + [ipca / 100])
+    custos_extra = np.column_stack([
+        np.array([p[indice].get('taxa_custos_extra', 0.0) for p in produtos], dtype=float)
+        for indice in range(len(definicoes))
+    ] + [np.zeros(len(cenarios))])
+    tesouro = np.array([d['investimento_type'] in INVESTIMENTOS_TESOURO for d in definicoes] + [False])
+    tributavel = np.array([
+        d['investimento_type'] not in INVESTIMENTOS_ISENTOS and d.get('incluir_ir', True)
+        for d in definicoes
+    ] + [False])
+    
+    custodia = np.where(tesouro, taxa_custodia[:, None], 0.0)
+    tributado = incluir_ir[:, None] & tributavel
+    
+    # A taxa de administração (Fundo DI) é descontada da taxa anual da cota
+    taxa_mensal = (1 + taxa_anual - custos_extra) ** (1/12) - 1
+    
+    # Grade de meses de cada cenário (todos os meses ou `pontos` amostrados),
+    # completada com o último mês para formar uma matriz retangular
+    grades = [amostrar_meses(m, c.get('pontos')) for m, c in zip(meses.tolist(), cenarios)]
+    tamanhos = np.array([len(grade) for grade in grades])
+    mes = np.empty((len(cenarios), tamanhos.max()), dtype=int)
+    for posicao, grade in enumerate(grades):
+        mes[posicao, :len(grade)] = grade
+        mes[posicao, len(grade):] = grade[-1]
+    
+    serie = _serie_mensal_arrays(
+        taxa_mensal=taxa_mensal[:, :, None],
+        valor_inicial=valor_inicial[:, None, None],
+        aportes_mensais=aportes_mensais[:, None, None],
+        mes=mes[:, None, :],
+        taxa_custodia=custodia[:, :, None],
+        tributado=tributado[:, :, None]
     )
-    registrar('Tesouro IPCA+', resultado_ipca, 'tesouro_ipca', 'ipca_mais', tesouro_ipca_val, 0.0)
     
-    # Poupança
-    poupanca_mensal = parametros.get('poupanca_mensal', 0.5) / 100
-    poupanca_anual = ((1 + poupanca_mensal) ** 12 - 1) * 100
-    resultado_poupanca = executar(
-        investimento_type='poupanca',
-        rentabilidade_type='prefixado',
-        rentabilidade_value=poupanca_anual,
-        incluir_ir=False,
-        taxa_custos_extra=0.0
+    # Último ponto da trajetória de cada cenário (cenários × produtos)
+    linhas = np.arange(len(cenarios))
+    final = {campo: serie[campo][linhas, :, tamanhos - 1] for campo in ('valor_bruto', 'custos', 'valor_ir', 'valor_liquido')}
+    
+    # Bruto sem a taxa de administração: a diferença entra em "custos"
+    valor_bruto = np.where(
+        custos_extra > 0,
+        _valor_futuro_arrays((1 + taxa_anual) ** (1/12) - 1, valor_inicial[:, None], aportes_mensais[:, None], meses[:, None]),
+        final['valor_bruto']
     )
-    registrar('Poupança', resultado_poupanca, 'poupanca', 'prefixado', poupanca_anual, 0.0)
-    
-    # Correção pelo IPCA (apenas atualização pela inflação)
-    ipca_anual = ipca / 100 if ipca else 0.0
-    ipca_mensal = (1 + ipca_anual) ** (1/12) - 1 if ipca_anual else 0.0
-    valor_corrigido = _calcular_valor_futuro(ipca_mensal, valor_inicial, aportes_mensais, meses)
-    ganho_corrigido = valor_corrigido - total_investido
-    
-    # Calcula evolução mensal para IPCA
-    evolucao_ipca = []
-    valor_atual_ipca = valor_inicial
-    for mes in range(1, meses + 1):
-        if aportes_mensais > 0:
-            valor_atual_ipca = valor_atual_ipca * (1 + ipca_mensal) + aportes_mensais
-        else:
-            valor_atual_ipca = valor_atual_ipca * (1 + ipca_mensal)
-        evolucao_ipca.append({
-            'mes': mes,
-            'valor_liquido': round(valor_atual_ipca, 2)
-        })
-    
-    resultados.append({
-        'nome': 'Correção pelo IPCA',
-        'total_investido': round(total_investido, 2),
-        'valor_bruto': round(valor_corrigido, 2),
-        'rentabilidade_bruta': round((ganho_corrigido / total_investido) * 100 if total_investido else 0, 2),
-        'custos': 0.0,
-        'valor_ir': 0.0,
-        'valor_liquido': round(valor_corrigido, 2),
-        'rentabilidade_liquida': round((ganho_corrigido / total_investido) * 100 if total_investido else 0, 2),
-        'ganho_liquido': round(ganho_corrigido, 2),
-        'valor_real': round(valor_corrigido, 2),
-        'ganho_real': round(ganho_corrigido, 2),
-        'evolucao_mensal': evolucao_ipca
-    })
-    
-    return resultados
+    custos = final['custos'] + (valor_bruto - final['valor_bruto'])
+    valor_liquido = final['valor_liquido']
+    
+    total_investido = (valor_inicial + aportes_mensais * meses)[:, None]
+    ganho_bruto = valor_bruto - total_investido
+    ganho_liquido = valor_liquido - total_investido
+    
+    # Ajuste pela inflação (a correção pelo IPCA já é o próprio valor real)
+    desconto_inflacao = ((1 + ipca / 100) ** (1/12)) ** meses
+    correcao_ipca = np.arange(len(definicoes) + 1) == len(definicoes)
+    deflacionar = ajustar[:, None] & ~correcao_ipca
+    valor_real = np.where(deflacionar, valor_liquido / desconto_inflacao[:, None], valor_liquido)
+    ganho_real = np.where(deflacionar, valor_real - total_investido / desconto_inflacao[:, None], ganho_liquido)
+    
+    def percentual(ganho):
+        return np.divide(ganho, total_investido, out=np.zeros_like(ganho), where=total_investido > 0) * 100
+    
+    campos = {
+        'total_investido': np.broadcast_to(total_investido, valor_liquido.shape),
+        'valor_bruto': valor_bruto,
+        'rentabilidade_bruta': percentual(ganho_bruto),
+        'custos': custos,
+        'valor_ir': final['valor_ir'],
+        'valor_liquido': valor_liquido,
+        'rentabilidade_liquida': percentual(ganho_liquido),
+        'ganho_liquido': ganho_liquido,
+        'valor_real': valor_real,
+        'ganho_real': ganho_real
+    }
+    campos = {campo: valores.tolist() for campo, valores in campos.items()}
+    nomes = [d['nome'] for d in definicoes] + ['Correção pelo IPCA']
+    formatos = [c.get('formato_evolucao') or 'objetos' for c in cenarios]
+    
+    return [
+        [
+            {
+                'nome': nome,
+                **{campo: round(valores[posicao][indice], 2) for campo, valores in campos.items()},
+                'evolucao_mensal': _codificar_evolucao(
+                    grades[posicao],
+                    serie['valor_liquido'][posicao, indice, :tamanhos[posicao]],
+                    formatos[posicao]
+                )
+            }
+            for indice, nome in enumerate(nomes)
+        ]
+        for posicao in range(len(cenarios))
+    ]
 
 
-def calcular_evolucao_mensal(
-    investimento_type,
-    rentabilidade_type,
-    rentabilidade_value,
-    valor_inicial,
-    aportes_mensais,
-    meses,
-    parametros,
-    incluir_ir=True,
-    ajustar_inflacao_flag=True,
-    tax_regime='vigente',
-    taxa_custos_extra=0.0
-):
+def _formatar_evolucao(meses, valores):
+    """Converte meses e valores da série em [{'mes': m, 'valor_liquido': v}, ...]."""
+    return [
+        {'mes': mes, 'valor_liquido': round(valor, 2)}
+        for mes, valor in zip(meses, valores)
+    ]
+
+
+def _codificar_evolucao(meses, valores, formato='objetos'):
     """
-    Calcula a evolução mensal do valor líquido de um investimento.
-    
-    Returns:
-        list[dict]: lista com {'mes': int, 'valor_liquido': float} para cada mês
+    Codifica a série de valores líquidos (array) no formato pedido.
+    Nos formatos 'colunar' e 'delta' só os valores são devolvidos; a grade de
+    meses é enviada uma vez na resposta. O 'delta' usa centavos inteiros, então
+    a soma acumulada no cliente reconstrói os valores sem erro de arredondamento.
+    """
+    if formato == 'colunar':
+        return [round(valor, 2) for valor in valores.tolist()]
+    if formato == 'delta':
+        centavos = np.rint(valores * 100).astype(np.int64)
+        return np.diff(centavos, prepend=0).tolist()
+    return _formatar_evolucao(meses.tolist(), valores.tolist())
+
+
+def cdi_parametros(parametros):
     """
+    CDI (% a.a.) dos parâmetros do simulador: o `cdi` informado ou, sem ele,
+    a Selic menos SPREAD_CDI (como em calcular_cdi). Aceita arrays de Selic.
+    """
+    cdi = parametros.get('cdi')
+    if cdi is not None:
+        return cdi
     selic = parametros.get('selic', 0.0)
-    cdi = parametros.get('cdi', selic)
+    if isinstance(selic, np.ndarray):
+        return np.maximum(selic - SPREAD_CDI, 0.0)
+    return max(selic - SPREAD_CDI, 0.0)
+
+
+def spread_cdi(parametros):
+    """
+    Diferença Selic - CDI (p.p.) dos parâmetros, para deslocar uma curva ou
+    trajetória de Selic; SPREAD_CDI se `cdi` ou `selic` não foi informado.
+    """
+    cdi, selic = parametros.get('cdi'), parametros.get('selic')
+    if cdi is None or selic is None:
+        return SPREAD_CDI
+    return selic - cdi
+
+
+def _taxa_anual_lote(rentabilidade_type, rentabilidade_value, cdi, ipca):
+    """Taxa efetiva anual (decimal) para arrays de rentabilidade, CDI e IPCA (em %)."""
+    if rentabilidade_type == 'prefixado':
+        return rentabilidade_value / 100
+    if rentabilidade_type == 'cdi':
+        return (cdi / 100 * rentabilidade_value) / 100
+    if rentabilidade_type == 'ipca_mais':
+        return (1 + ipca / 100) * (1 + rentabilidade_value / 100) - 1
+    return np.zeros_like(rentabilidade_value)
+
+
+def _taxa_mensal_parametros(rentabilidade_type, rentabilidade_value, parametros, taxa_custos_extra=0.0):
+    """Taxa mensal efetiva de um produto com as taxas de `parametros` (em %)."""
+    cdi = cdi_parametros(parametros)
     ipca = parametros.get('ipca', 0.0)
-    taxa_custodia = parametros.get('taxa_custodia', 0.2) / 100
     
     # Determina taxa efetiva anual
     if rentabilidade_type == 'prefixado':
@@ -545,47 +732,229 @@ def calcular_evolucao_mensal(
     if taxa_custos_extra > 0:
         taxa_anual = taxa_anual - taxa_custos_extra
     
-    # Taxa mensal
-    taxa_mensal = (1 + taxa_anual) ** (1/12) - 1
+    return (1 + taxa_anual) ** (1/12) - 1
+
+
+def calcular_evolucao_mensal(
+    investimento_type,
+    rentabilidade_type,
+    rentabilidade_value,
+    valor_inicial,
+    aportes_mensais,
+    meses,
+    parametros,
+    incluir_ir=True,
+    ajustar_inflacao_flag=True,
+    tax_regime='vigente',
+    taxa_custos_extra=0.0,
+    curva=None
+):
+    """
+    Calcula a evolução mensal do valor líquido de um investimento
+    (com `curva`, pelas taxas de cada ano; ver calcular_pontos_mensais).
     
-    evolucao = []
-    valor_atual = valor_inicial
+    Returns:
+        list[dict]: lista com {'mes': int, 'valor_liquido': float} para cada mês
+    """
+    serie = calcular_pontos_mensais(
+        investimento_type=investimento_type,
+        rentabilidade_type=rentabilidade_type,
+        rentabilidade_value=rentabilidade_value,
+        valor_inicial=valor_inicial,
+        aportes_mensais=aportes_mensais,
+        meses=np.arange(1, meses + 1),
+        parametros=parametros,
+        incluir_ir=incluir_ir,
+        taxa_custos_extra=taxa_custos_extra,
+        curva=curva
+    )
     
-    for mes in range(1, meses + 1):
-        # Calcula valor bruto no mês
-        if aportes_mensais > 0:
-            valor_atual = valor_atual * (1 + taxa_mensal) + aportes_mensais
-        else:
-            valor_atual = valor_atual * (1 + taxa_mensal)
-        
-        # Calcula custos acumulados até o mês
-        custos = 0
-        if investimento_type in ['tesouro_selic', 'tesouro_ipca', 'tesouro_prefixado']:
-            anos_decorridos = mes / 12
-            custos = valor_atual * taxa_custodia * anos_decorridos
-        
-        # Calcula IR acumulado até o mês
-        total_investido_mes = valor_inicial + (aportes_mensais * mes)
-        ganho_bruto = valor_atual - total_investido_mes
-        
-        valor_ir = 0
-        if incluir_ir and ganho_bruto > 0:
-            dias = mes * 30
-            aliquota = get_ir_rate(dias, investimento_type=investimento_type, tax_regime=tax_regime)
-            
-            # Verifica isenção
-            # ✅ CORRIGIDO:
-            if investimento_type not in INVESTIMENTOS_ISENTOS:
-                valor_ir = ganho_bruto * aliquota
-
-        # Valor líquido
-        valor_liquido = valor_atual - valor_ir - custos
-        
-        evolucao.append({
-            'mes': mes,
-            'valor_liquido': round(valor_liquido, 2)
-        })
+    return _formatar_evolucao(serie['mes'].tolist(), serie['valor_liquido'].tolist())
+
+
+def calcular_evolucoes_mensais(produtos, valor_inicial, aportes_mensais, meses, parametros, incluir_ir=True):
+    """
+    Evolução mensal de vários produtos (no formato de _produtos_padrao) com os
+    mesmos valores e prazo, como numa requisição do simulador: as taxas
+    mensais, a custódia e o IR de todos são montados uma vez e avaliados
+    juntos como uma matriz (produtos × meses).
     
-    return evolucao
+    Returns:
+        list[list[dict]]: a evolução de cada produto, na ordem recebida.
+    """
+    taxa_custodia = parametros.get('taxa_custodia', 0.2) / 100
+    taxa_mensal = np.array([
+        _taxa_mensal_parametros(
+            produto['rentabilidade_type'],
+            produto['rentabilidade_value'],
+            parametros,
+            produto.get('taxa_custos_extra', 0.0)
+        )
+        for produto in produtos
+    ])
+    custodia = np.array([
+        taxa_custodia if produto['investimento_type'] in INVESTIMENTOS_TESOURO else 0.0
+        for produto in produtos
+    ])
+    tributado = np.array([
+        incluir_ir and produto['investimento_type'] not in INVESTIMENTOS_ISENTOS and produto.get('incluir_ir', True)
+        for produto in produtos
+    ], dtype=bool)
+    
+    mes = np.arange(1, int(meses) + 1)
+    serie = _serie_mensal_arrays(
+        taxa_mensal=taxa_mensal[:, None],
+        valor_inicial=valor_inicial,
+        aportes_mensais=aportes_mensais,
+        mes=mes,
+        taxa_custodia=custodia[:, None],
+        tributado=tributado[:, None]
+    )
+    
+    meses_lista = mes.tolist()
+    return [_formatar_evolucao(meses_lista, valores) for valores in serie['valor_liquido'].tolist()]
 
 
+def calcular_pontos_mensais(
+    investimento_type,
+    rentabilidade_type,
+    rentabilidade_value,
+    valor_inicial,
+    aportes_mensais,
+    meses,
+    parametros,
+    incluir_ir=True,
+    taxa_custos_extra=0.0,
+    curva=None
+):
+    """
+    Avalia um investimento diretamente nos meses pedidos.
+    
+    Usa a fórmula fechada do valor futuro com anuidade (a mesma de
+    _calcular_valor_futuro), então o custo é O(1) por mês consultado, sem
+    calcular os meses intermediários.
+    
+    Args:
+        meses: sequência de meses a avaliar (ex.: amostrar_meses(480, 60)).
+        parametros (dict): selic, cdi, ipca e taxa_custodia (em %).
+        curva: CurvaTaxas; se informada, CDI e IPCA+ usam os fatores
+            acumulados da curva (também O(1) por mês) no lugar de cdi/ipca.
+            O CDI da curva mantém a diferença Selic - CDI dos parâmetros.
+    
+    Returns:
+        dict de arrays NumPy: mes, valor_bruto, custos, valor_ir, valor_liquido
+    """
+    taxa_mensal = _taxa_mensal_parametros(rentabilidade_type, rentabilidade_value, parametros, taxa_custos_extra)
+    taxa_custodia = parametros.get('taxa_custodia', 0.2) / 100
+    
+    return calcular_serie_mensal(
+        investimento_type=investimento_type,
+        taxa_mensal=taxa_mensal,
+        valor_inicial=valor_inicial,
+        aportes_mensais=aportes_mensais,
+        meses=meses,
+        taxa_custodia=taxa_custodia,
+        incluir_ir=incluir_ir,
+        fatores=curva.fatores(
+            rentabilidade_type, rentabilidade_value, taxa_custos_extra, spread_cdi(parametros)
+        ) if curva is not None else None
+    )
+
+
+def amostrar_meses(meses, pontos=None):
+    """
+    Grade de meses para avaliar a evolução: todos os meses 1..meses ou, se
+    `pontos` for informado, até `pontos` meses espaçados uniformemente
+    (sempre incluindo o primeiro e o último).
+    """
+    if not pontos or pontos >= meses:
+        return np.arange(1, meses + 1)
+    return np.unique(np.linspace(1, meses, max(int(pontos), 2)).round().astype(int))
+
+
+def calcular_serie_mensal(
+    investimento_type,
+    taxa_mensal,
+    valor_inicial,
+    aportes_mensais,
+    meses,
+    taxa_custodia=0.0,
+    incluir_ir=True,
+    fatores=None
+):
+    """
+    Núcleo vetorizado da evolução mensal.
+    
+    Calcula saldo bruto, custódia, IR e valor líquido de todos os meses de uma
+    vez, a partir do fator de crescimento acumulado (1 + taxa)^mes, sem laço
+    em Python. As alíquotas de IR vêm da tabela regressiva via searchsorted.
+    
+    Args:
+        meses: prazo total (avalia os meses 1..meses) ou sequência de meses.
+        fatores: FatoresAcumulados de uma curva de taxas; substitui `taxa_mensal`.
+    
+    Returns:
+        dict de arrays NumPy: mes, valor_bruto, custos, valor_ir, valor_liquido
+    """
+    if np.ndim(meses) == 0:
+        mes = np.arange(1, int(meses) + 1)
+    else:
+        mes = np.asarray(meses, dtype=int)
+    
+    tributado = incluir_ir and investimento_type not in INVESTIMENTOS_ISENTOS
+    if investimento_type not in INVESTIMENTOS_TESOURO:
+        taxa_custodia = 0.0
+    
+    return _serie_mensal_arrays(
+        taxa_mensal=taxa_mensal,
+        valor_inicial=valor_inicial,
+        aportes_mensais=aportes_mensais,
+        mes=mes,
+        taxa_custodia=taxa_custodia,
+        tributado=tributado,
+        valor_bruto=fatores.valor_futuro(valor_inicial, aportes_mensais, mes) if fatores is not None else None
+    )
+
+
+def _valor_futuro_arrays(taxa_mensal, valor_inicial, aportes_mensais, mes):
+    """
+    Versão vetorizada de _calcular_valor_futuro: valor futuro do aporte
+    inicial mais a anuidade dos aportes mensais, com broadcasting entre
+    taxas, valores e meses.
+    """
+    fator = np.power(1 + taxa_mensal, mes)
+    if np.ndim(taxa_mensal) == 0:
+        # Taxa única: dispensa o errstate e o where, que pesam em séries curtas
+        anuidade = mes if taxa_mensal == 0 else (fator - 1) / taxa_mensal
+    else:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            anuidade = np.where(taxa_mensal == 0, mes, (fator - 1) / taxa_mensal)
+    return valor_inicial * fator + np.maximum(aportes_mensais, 0.0) * anuidade
+
+
+def _serie_mensal_arrays(taxa_mensal, valor_inicial, aportes_mensais, mes, taxa_custodia, tributado, valor_bruto=None):
+    """
+    Calcula bruto, custódia, IR e líquido com broadcasting entre os argumentos,
+    permitindo avaliar matrizes (cenários × produtos × meses) de uma vez.
+    `taxa_custodia` já deve ser zero para produtos sem custódia e `tributado`
+    indica onde o IR se aplica. `valor_bruto`, se informado, dispensa a
+    fórmula da taxa constante (curva de taxas).
+    """
+    if valor_bruto is None:
+        valor_bruto = _valor_futuro_arrays(taxa_mensal, valor_inicial, aportes_mensais, mes)
+    
+    # Custódia acumulada (Tesouro Direto)
+    custos = valor_bruto * taxa_custodia * (mes / 12)
+    
+    # IR sobre o ganho acumulado até cada mês
+    total_investido = valor_inicial + aportes_mensais * mes
+    ganho_bruto = valor_bruto - total_investido
+    valor_ir = np.where(tributado & (ganho_bruto > 0), ganho_bruto * get_ir_rates(mes * 30), 0.0)
+    
+    return {
+        'mes': mes,
+        'valor_bruto': valor_bruto,
+        'custos': custos,
+        'valor_ir': valor_ir,
+        'valor_liquido': valor_bruto - valor_ir - custos
+    }
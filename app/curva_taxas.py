@@ -0,0 +1,167 @@
+"""
+Curva de taxas por ano a partir das projeções do Focus
+
+O cálculo padrão aplica uma taxa anual única em todo o prazo. No modo curva,
+cada mês usa a Selic (e o CDI) e o IPCA projetados pelo Focus para o ano
+civil em que cai; depois do último ano projetado a taxa fica constante. O CDI
+segue a convenção de app.calculations: a Selic do ano menos a diferença
+Selic - CDI dos parâmetros (SPREAD_CDI, se não informada).
+
+Para cada produto (tipo e valor da rentabilidade) a curva guarda o log do
+fator acumulado mês a mês e a soma acumulada dos inversos, então o valor
+futuro do aporte inicial e dos aportes mensais em qualquer mês sai em O(1),
+como na fórmula fechada do modo de taxa única. Os meses após a curva usam a
+progressão geométrica da taxa final. Curvas e fatores ficam em cache por
+snapshot do Focus, compartilhados entre produtos e requisições.
+"""
+from datetime import date
+
+import numpy as np
+
+from app.cache import LRUCache
+from app.calculations import SPREAD_CDI
+
+
+class FatoresAcumulados:
+    """
+    Fatores de crescimento de uma taxa que varia mês a mês e fica constante
+    após o último mês da curva.
+    """
+
+    def __init__(self, log_mensal):
+        log_mensal = np.asarray(log_mensal, dtype=float)
+        self.meses_curva = len(log_mensal)
+        self.log_final = float(log_mensal[-1])
+        # acumulado[m] = log do fator dos meses 1..m; inversos[m] = soma de exp(-acumulado[1..m])
+        self.acumulado = np.concatenate([[0.0], np.cumsum(log_mensal)])
+        self.inversos = np.concatenate([[0.0], np.cumsum(np.exp(-self.acumulado[1:]))])
+
+    def _log_fator(self, mes):
+        excedente = np.maximum(mes - self.meses_curva, 0)
+        return self.acumulado[np.minimum(mes, self.meses_curva)] + excedente * self.log_final
+
+    def fator(self, mes):
+        """Fator acumulado do mês 0 até `mes` (inteiro ou array)."""
+        return np.exp(self._log_fator(np.asarray(mes, dtype=int)))
+
+    def valor_futuro(self, valor_inicial, aportes_mensais, mes):
+        """
+        Valor bruto no fim de `mes` do aporte inicial mais os aportes feitos
+        no fim de cada mês (equivalente a _valor_futuro_arrays com a curva).
+        """
+        mes = np.asarray(mes, dtype=int)
+        ultimo = self.meses_curva
+        excedente = np.maximum(mes - ultimo, 0)
+        inversos = self.inversos[np.minimum(mes, ultimo)]
+
+        # Meses após a curva: progressão geométrica de razão q = exp(-taxa final)
+        q = np.exp(-self.log_final)
+        if q == 1.0:
+            cauda = excedente.astype(float)
+        else:
+            cauda = q * (1 - q ** excedente) / (1 - q)
+        inversos = inversos + np.exp(-self.acumulado[ultimo]) * cauda
+
+        return np.exp(self._log_fator(mes)) * (valor_inicial + np.maximum(aportes_mensais, 0.0) * inversos)
+
+
+class CurvaTaxas:
+    """
+    Selic e IPCA (% a.a.) de cada mês a partir do mês inicial, pelo ano civil.
+
+    Args:
+        selic, ipca (dict): {ano: taxa}; anos ausentes repetem o anterior.
+        ano_inicial, mes_inicial: mês em que a aplicação começa (mês 1).
+    """
+
+    def __init__(self, selic, ipca, ano_inicial, mes_inicial=1):
+        self.ano_inicial = int(ano_inicial)
+        self.mes_inicial = int(mes_inicial)
+        ultimo_ano = max([self.ano_inicial, *selic, *ipca])
+        self.anos = list(range(self.ano_inicial, ultimo_ano + 1))
+        self.selic = self._por_ano(selic)
+        self.ipca = self._por_ano(ipca)
+        # Meses até o fim do último ano projetado; depois dele vale a taxa final
+        meses = (ultimo_ano - self.ano_inicial) * 12 + 13 - self.mes_inicial
+        self._ano_do_mes = (self.mes_inicial - 1 + np.arange(meses)) // 12
+        self._fatores = LRUCache(max_itens=64)
+
+    def _por_ano(self, taxas):
+        projetadas = [(ano, taxa) for ano, taxa in sorted(taxas.items()) if taxa is not None]
+        # Antes do primeiro ano da curva vale a última projeção até ele (ou a primeira)
+        anteriores = [taxa for ano, taxa in projetadas if ano <= self.ano_inicial]
+        anterior = anteriores[-1] if anteriores else (projetadas[0][1] if projetadas else 0.0)
+        valores = []
+        for ano in self.anos:
+            if taxas.get(ano) is not None:
+                anterior = taxas[ano]
+            valores.append(float(anterior))
+        return np.array(valores)
+
+    def taxas_anuais(self, rentabilidade_type, rentabilidade_value=0.0, taxa_custos_extra=0.0, spread_cdi=SPREAD_CDI):
+        """
+        Taxa anual (decimal) de cada mês da curva para o tipo de rentabilidade.
+        O CDI é a Selic de cada ano menos `spread_cdi` (p.p.).
+        """
+        selic = self.selic[self._ano_do_mes]
+        ipca = self.ipca[self._ano_do_mes]
+        if rentabilidade_type == 'cdi':
+            taxa = np.maximum(selic - spread_cdi, 0.0) / 100 * rentabilidade_value / 100
+        elif rentabilidade_type == 'ipca_mais':
+            taxa = (1 + ipca / 100) * (1 + rentabilidade_value / 100) - 1
+        elif rentabilidade_type == 'selic':
+            taxa = selic / 100
+        elif rentabilidade_type == 'ipca':
+            taxa = ipca / 100
+        else:
+            raise ValueError(f'Rentabilidade sem curva: {rentabilidade_type}')
+        return taxa - taxa_custos_extra
+
+    def fatores(self, rentabilidade_type, rentabilidade_value=0.0, taxa_custos_extra=0.0, spread_cdi=SPREAD_CDI):
+        """
+        FatoresAcumulados do produto, ou None para rentabilidades que não
+        dependem da curva (prefixado).
+        """
+        if rentabilidade_type not in ('cdi', 'ipca_mais', 'selic', 'ipca'):
+            return None
+        if rentabilidade_type != 'cdi':
+            spread_cdi = SPREAD_CDI
+        chave = (rentabilidade_type, float(rentabilidade_value), float(taxa_custos_extra), float(spread_cdi))
+        return self._fatores.get_or_set(chave, lambda: FatoresAcumulados(
+            np.log1p(self.taxas_anuais(*chave)) / 12
+        ))
+
+    def deflator(self, mes):
+        """Inflação acumulada (fator) até `mes` pela curva do IPCA."""
+        return self.fatores('ipca').fator(mes)
+
+    def como_dict(self):
+        return {
+            'inicio': f'{self.ano_inicial}-{self.mes_inicial:02d}',
+            'anos': self.anos,
+            'selic': self.selic.tolist(),
+            'ipca': self.ipca.tolist()
+        }
+
+
+_curvas = LRUCache(max_itens=8)
+
+
+def curva_focus(focus, hoje=None):
+    """
+    CurvaTaxas das medianas do snapshot do Focus, começando no mês atual;
+    None sem snapshot ou sem projeções de Selic e IPCA. A curva é montada uma
+    vez por snapshot e mês.
+    """
+    if not focus:
+        return None
+    hoje = hoje or date.today()
+
+    def montar():
+        selic = {int(ano): valor for ano, valor in focus.medianas('selic').items()}
+        ipca = {int(ano): valor for ano, valor in focus.medianas('ipca').items()}
+        if not any(valor is not None for valor in selic.values()) or not any(valor is not None for valor in ipca.values()):
+            return None
+        return CurvaTaxas(selic, ipca, hoje.year, hoje.month)
+
+    return _curvas.get_or_set((focus.date, focus.updated_at, hoje.year, hoje.month), montar)
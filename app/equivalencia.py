@@ -0,0 +1,225 @@
+"""
+Equivalência entre produtos: taxa equivalente, prazo e inflação de equilíbrio
+
+Responde perguntas como "quanto do CDI um CDB precisa pagar para empatar com
+esta LCI em 18 meses, depois do IR?" sem tentativa e erro. O valor líquido
+segue as regras de calcular_investimento_completo (taxa anual única, custódia
+e custos extras proporcionais ao prazo, IR pela tabela regressiva sobre o
+ganho), em versão vetorizada sobre vários prazos de uma vez.
+
+Todas as inversões passam pela taxa anual efetiva que um produto precisa
+render para chegar a um valor líquido:
+- sem aportes mensais, ela sai em forma fechada (o líquido é linear no fator
+  (1 + taxa)^meses);
+- com aportes, por bissecção vetorizada (o líquido cresce com a taxa).
+Dessa taxa saem o percentual do CDI, a taxa prefixada, o IPCA+ ou a
+inflação de equilíbrio.
+"""
+import numpy as np
+
+from app.calculations import INVESTIMENTOS_ISENTOS, INVESTIMENTOS_TESOURO, calcular_cdi, get_ir_rates
+
+TIPOS_RENTABILIDADE = ('prefixado', 'cdi', 'ipca_mais')
+
+TAXA_CUSTODIA_TESOURO = 0.002
+
+# Intervalo de busca da taxa anual efetiva na bissecção (decimal)
+TAXA_ANUAL_MINIMA = -0.9
+TAXA_ANUAL_MAXIMA = 10.0
+ITERACOES_BISSECCAO = 100
+
+
+def validar_produto(produto):
+    """Normaliza a definição de um produto (tipo de investimento e rentabilidade)."""
+    if not isinstance(produto, dict):
+        raise ValueError('Produto deve ser um objeto com investimento_type e rentabilidade_type')
+    for campo in ('investimento_type', 'rentabilidade_type'):
+        if not produto.get(campo):
+            raise ValueError(f'Campo obrigatório faltando no produto: {campo}')
+    if produto['rentabilidade_type'] not in TIPOS_RENTABILIDADE:
+        raise ValueError(f'Tipo de rentabilidade inválido: {produto["rentabilidade_type"]}')
+    return {
+        'investimento_type': produto['investimento_type'],
+        'rentabilidade_type': produto['rentabilidade_type'],
+        'rentabilidade_value': float(produto.get('rentabilidade_value') or 0.0),
+        'taxa_custos_extra': float(produto.get('taxa_custos_extra') or 0.0)
+    }
+
+
+def taxa_anual(produto, contexto, rentabilidade_value=None, ipca=None):
+    """Taxa anual efetiva (decimal), como em calcular_rentabilidade_bruta."""
+    valor = produto['rentabilidade_value'] if rentabilidade_value is None else rentabilidade_value
+    tipo = produto['rentabilidade_type']
+    if tipo == 'prefixado':
+        return np.asarray(valor, dtype=float) / 100
+    if tipo == 'cdi':
+        return calcular_cdi(contexto=contexto) / 100 * np.asarray(valor, dtype=float) / 100
+    ipca = contexto.ipca if ipca is None else ipca
+    return (1 + np.asarray(ipca, dtype=float) / 100) * (1 + np.asarray(valor, dtype=float) / 100) - 1
+
+
+def _encargos(produto, meses, incluir_ir, taxa_custodia):
+    """Custos proporcionais ao bruto (custódia + extras, por ano) e alíquota de IR por prazo."""
+    anos = meses / 12
+    custos = produto['taxa_custos_extra'] * anos
+    if produto['investimento_type'] in INVESTIMENTOS_TESOURO:
+        custos = custos + taxa_custodia * anos
+    aliquota = get_ir_rates(meses * 30)
+    if not incluir_ir or produto['investimento_type'] in INVESTIMENTOS_ISENTOS:
+        aliquota = np.zeros_like(aliquota)
+    return np.broadcast_to(custos, np.shape(meses)), aliquota
+
+
+def _bruto(anual, meses, valor_inicial, aportes_mensais):
+    mensal = (1 + anual) ** (1/12) - 1
+    fator = (1 + mensal) ** meses
+    with np.errstate(divide='ignore', invalid='ignore'):
+        anuidade = np.where(mensal == 0, meses, (fator - 1) / mensal)
+    return valor_inicial * fator + aportes_mensais * anuidade
+
+
+def valor_liquido_por_taxa(produto, anual, meses, valor_inicial, aportes_mensais=0.0,
+                           incluir_ir=True, taxa_custodia=TAXA_CUSTODIA_TESOURO):
+    """Valor líquido com a taxa anual efetiva `anual` (broadcast com `meses`)."""
+    meses = np.asarray(meses)
+    aportes_mensais = max(float(aportes_mensais), 0.0)
+    custos, aliquota = _encargos(produto, meses, incluir_ir, taxa_custodia)
+    bruto = _bruto(np.asarray(anual, dtype=float), meses, valor_inicial, aportes_mensais)
+    ganho = bruto - (valor_inicial + aportes_mensais * meses)
+    return bruto * (1 - custos) - np.where(ganho > 0, ganho * aliquota, 0.0)
+
+
+def valor_liquido(produto, meses, valor_inicial, aportes_mensais=0.0, contexto=None,
+                  incluir_ir=True, taxa_custodia=TAXA_CUSTODIA_TESOURO):
+    """Valor líquido do produto em cada prazo (igual a calcular_investimento_completo)."""
+    return valor_liquido_por_taxa(
+        produto, taxa_anual(produto, contexto), meses, valor_inicial, aportes_mensais, incluir_ir, taxa_custodia
+    )
+
+
+def taxa_anual_necessaria(produto, alvo, meses, valor_inicial, aportes_mensais=0.0,
+                          incluir_ir=True, taxa_custodia=TAXA_CUSTODIA_TESOURO):
+    """
+    Taxa anual efetiva (decimal) com que o produto chega ao valor líquido
+    `alvo` em cada prazo; NaN quando nenhuma taxa do intervalo de busca chega
+    ou quando nada é investido (o líquido é zero com qualquer taxa).
+    """
+    meses = np.asarray(meses, dtype=float)
+    alvo = np.broadcast_to(np.asarray(alvo, dtype=float), meses.shape)
+    aportes_mensais = max(float(aportes_mensais), 0.0)
+
+    if aportes_mensais == 0 and valor_inicial <= 0:
+        return np.full(meses.shape, np.nan)
+
+    if aportes_mensais == 0 and valor_inicial > 0:
+        # Líquido = V0 * (F * (1 - custos - ir) + ir) com ganho; V0 * F * (1 - custos) sem ganho
+        custos, aliquota = _encargos(produto, meses, incluir_ir, taxa_custodia)
+        relacao = alvo / valor_inicial
+        with np.errstate(divide='ignore', invalid='ignore'):
+            # O líquido cresce com F e vale V0 * (1 - custos) em F = 1
+            fator = np.where(
+                relacao > 1 - custos,
+                (relacao - aliquota) / (1 - custos - aliquota),
+                relacao / (1 - custos)
+            )
+            anual = np.where(fator > 0, fator ** (12 / meses) - 1, np.nan)
+        return np.where((anual >= TAXA_ANUAL_MINIMA) & (anual <= TAXA_ANUAL_MAXIMA), anual, np.nan)
+
+    def diferenca(anual):
+        return valor_liquido_por_taxa(
+            produto, anual, meses, valor_inicial, aportes_mensais, incluir_ir, taxa_custodia
+        ) - alvo
+
+    baixo = np.full(meses.shape, TAXA_ANUAL_MINIMA)
+    alto = np.full(meses.shape, TAXA_ANUAL_MAXIMA)
+    alcancavel = (diferenca(baixo) <= 0) & (diferenca(alto) >= 0)
+    for _ in range(ITERACOES_BISSECCAO):
+        meio = (baixo + alto) / 2
+        acima = diferenca(meio) >= 0
+        alto = np.where(acima, meio, alto)
+        baixo = np.where(acima, baixo, meio)
+    return np.where(alcancavel, (baixo + alto) / 2, np.nan)
+
+
+def rentabilidade_por_taxa(produto, anual, contexto, ipca=None):
+    """Inverte taxa_anual: valor da rentabilidade (%, %CDI ou IPCA+%) que rende `anual`."""
+    tipo = produto['rentabilidade_type']
+    if tipo == 'prefixado':
+        return anual * 100
+    if tipo == 'cdi':
+        cdi = calcular_cdi(contexto=contexto) / 100
+        if cdi <= 0:
+            raise ValueError('CDI zero: não há percentual do CDI equivalente')
+        return anual / cdi * 100
+    ipca = contexto.ipca if ipca is None else ipca
+    return ((1 + anual) / (1 + ipca / 100) - 1) * 100
+
+
+def _lista(valores):
+    return [None if np.isnan(valor) else round(float(valor), 4) for valor in np.asarray(valores, dtype=float)]
+
+
+def taxa_equivalente(produto, referencia, meses, valor_inicial, aportes_mensais=0.0, contexto=None,
+                     incluir_ir=True, taxa_custodia=TAXA_CUSTODIA_TESOURO):
+    """
+    Rentabilidade que `produto` precisa ter, em cada prazo, para empatar em
+    valor líquido com `referencia` (ex.: % do CDI de um CDB equivalente a uma LCI).
+    """
+    meses = np.atleast_1d(np.asarray(meses, dtype=int))
+    alvo = valor_liquido(referencia, meses, valor_inicial, aportes_mensais, contexto, incluir_ir, taxa_custodia)
+    anual = taxa_anual_necessaria(produto, alvo, meses, valor_inicial, aportes_mensais, incluir_ir, taxa_custodia)
+    return {
+        'meses': meses.tolist(),
+        'valor_liquido': np.round(alvo, 2).tolist(),
+        'taxa_anual_equivalente': _lista(anual * 100),
+        'rentabilidade_value': _lista(rentabilidade_por_taxa(produto, anual, contexto))
+    }
+
+
+def inflacao_equilibrio(produto, referencia, meses, valor_inicial, aportes_mensais=0.0, contexto=None,
+                        incluir_ir=True, taxa_custodia=TAXA_CUSTODIA_TESOURO):
+    """
+    IPCA (% a.a.) com que um produto IPCA+ empata com outro que não depende
+    da inflação (ex.: Tesouro Prefixado × Tesouro IPCA+), em cada prazo.
+    Acima dessa inflação o IPCA+ rende mais.
+    """
+    atrelados = [p['rentabilidade_type'] == 'ipca_mais' for p in (produto, referencia)]
+    if sum(atrelados) != 1:
+        raise ValueError('A inflação de equilíbrio exige exatamente um produto IPCA+')
+    if atrelados[1]:
+        produto, referencia = referencia, produto
+
+    meses = np.atleast_1d(np.asarray(meses, dtype=int))
+    alvo = valor_liquido(referencia, meses, valor_inicial, aportes_mensais, contexto, incluir_ir, taxa_custodia)
+    anual = taxa_anual_necessaria(produto, alvo, meses, valor_inicial, aportes_mensais, incluir_ir, taxa_custodia)
+    inflacao = ((1 + anual) / (1 + produto['rentabilidade_value'] / 100) - 1) * 100
+    return {
+        'meses': meses.tolist(),
+        'valor_liquido': np.round(alvo, 2).tolist(),
+        'inflacao_equilibrio': _lista(inflacao)
+    }
+
+
+def prazos_equilibrio(produto, referencia, meses_max, valor_inicial, aportes_mensais=0.0, contexto=None,
+                      incluir_ir=True, taxa_custodia=TAXA_CUSTODIA_TESOURO):
+    """
+    Compara os dois produtos em todos os prazos 1..meses_max e devolve os
+    meses em que o melhor deles muda (ex.: quando a faixa do IR cai).
+    """
+    meses = np.arange(1, int(meses_max) + 1)
+    diferenca = (
+        valor_liquido(produto, meses, valor_inicial, aportes_mensais, contexto, incluir_ir, taxa_custodia)
+        - valor_liquido(referencia, meses, valor_inicial, aportes_mensais, contexto, incluir_ir, taxa_custodia)
+    )
+    sinal = np.sign(np.round(diferenca, 2))
+    # Empates (diferença abaixo de um centavo) herdam o lado anterior
+    sinal = sinal[np.maximum.accumulate(np.where(sinal != 0, np.arange(len(sinal)), 0))]
+    mudancas = np.flatnonzero(sinal[1:] * sinal[:-1] < 0) + 1
+    melhor = np.where(sinal >= 0, 'produto', 'referencia')
+    return {
+        'meses': meses.tolist(),
+        'diferenca': np.round(diferenca, 2).tolist(),
+        'prazos_equilibrio': meses[mudancas].tolist(),
+        'melhor_inicial': str(melhor[0]),
+        'melhor_final': str(melhor[-1])
+    }
@@ -0,0 +1,150 @@
+"""
+Índice dos PDFs do Boletim Focus armazenados em static/focus
+
+O manifesto `static/focus/manifest.json` lista os boletins (data, arquivo,
+tamanho) do mais recente para o mais antigo. Ele é atualizado quando um
+boletim é registrado, então a aplicação não precisa listar a pasta nem
+consultar a data de cada arquivo a cada acesso ao dashboard.
+
+Uso:
+    python -m app.focus_boletins registrar static/focus/R20251114.pdf
+    python -m app.focus_boletins reconstruir
+"""
+import argparse
+import json
+import os
+import re
+import tempfile
+import threading
+from datetime import date, datetime
+from pathlib import Path
+
+from app.cache import CacheArquivo
+
+MANIFESTO = 'manifest.json'
+
+# Nome publicado pelo BCB: R + AAAAMMDD (ex.: R20251107.pdf)
+_PADRAO_NOME = re.compile(r'^R(\d{4})(\d{2})(\d{2})', re.IGNORECASE)
+
+PASTA_PADRAO = Path(__file__).resolve().parents[1] / 'static' / 'focus'
+
+
+def data_do_boletim(caminho):
+    """Data do boletim pelo nome do arquivo (ou, se fora do padrão, pela modificação)."""
+    caminho = Path(caminho)
+    encontrado = _PADRAO_NOME.match(caminho.name)
+    if encontrado:
+        try:
+            return date(*map(int, encontrado.groups()))
+        except ValueError:
+            pass
+    return datetime.fromtimestamp(caminho.stat().st_mtime).date()
+
+
+def _entrada(caminho):
+    caminho = Path(caminho)
+    return {
+        'data': data_do_boletim(caminho).isoformat(),
+        'arquivo': caminho.name,
+        'tamanho': caminho.stat().st_size
+    }
+
+
+def _ordenar(boletins):
+    return sorted(boletins, key=lambda b: (b['data'], b['arquivo']), reverse=True)
+
+
+def ler_manifesto(pasta=PASTA_PADRAO):
+    """Lê o manifesto; devolve a lista de boletins (vazia se não existir)."""
+    try:
+        with open(Path(pasta) / MANIFESTO, 'r', encoding='utf-8') as fp:
+            return json.load(fp).get('boletins', [])
+    except FileNotFoundError:
+        return []
+
+
+def gravar_manifesto(boletins, pasta=PASTA_PADRAO):
+    """Grava o manifesto de forma atômica (arquivo temporário + os.replace)."""
+    pasta = Path(pasta)
+    fd, tmp_path = tempfile.mkstemp(dir=pasta, prefix='.manifest-', suffix='.json.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as fp:
+            json.dump({'boletins': _ordenar(boletins)}, fp, ensure_ascii=False, indent=2)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, pasta / MANIFESTO)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+def registrar_boletim(caminho_pdf, pasta=PASTA_PADRAO):
+    """
+    Registra (ou atualiza) um PDF no manifesto. O arquivo deve estar na pasta
+    do Focus. Retorna a entrada gravada.
+    """
+    caminho_pdf = Path(caminho_pdf)
+    if caminho_pdf.resolve().parent != Path(pasta).resolve():
+        raise ValueError(f'O boletim deve estar em {pasta}')
+
+    entrada = _entrada(caminho_pdf)
+    boletins = [b for b in ler_manifesto(pasta) if b['arquivo'] != entrada['arquivo']]
+    gravar_manifesto(boletins + [entrada], pasta)
+    return entrada
+
+
+def reconstruir_manifesto(pasta=PASTA_PADRAO):
+    """Recria o manifesto a partir dos PDFs existentes na pasta."""
+    pasta = Path(pasta)
+    boletins = [
+        _entrada(caminho) for caminho in pasta.iterdir()
+        if caminho.is_file() and caminho.suffix.lower() == '.pdf'
+    ]
+    gravar_manifesto(boletins, pasta)
+    return _ordenar(boletins)
+
+
+def _carregar_indice(caminho_manifesto):
+    with open(caminho_manifesto, 'r', encoding='utf-8') as fp:
+        return tuple(_ordenar(json.load(fp).get('boletins', [])))
+
+
+_indices = {}
+_indices_lock = threading.Lock()
+
+
+def listar_boletins(pasta=PASTA_PADRAO):
+    """
+    Boletins registrados, do mais recente para o mais antigo.
+    O manifesto fica em memória e só é relido quando o arquivo muda.
+    """
+    caminho = Path(pasta) / MANIFESTO
+    indice = _indices.get(caminho)
+    if indice is None:
+        with _indices_lock:
+            indice = _indices.setdefault(caminho, CacheArquivo(caminho, _carregar_indice, padrao=()))
+    return indice.obter()
+
+
+def boletim_mais_recente(pasta=PASTA_PADRAO):
+    """Entrada do boletim mais recente (ou None)."""
+    boletins = listar_boletins(pasta)
+    return boletins[0] if boletins else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mantém o manifesto dos PDFs do Boletim Focus.')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    registrar = subparsers.add_parser('registrar', help='Registra um PDF já copiado para static/focus.')
+    registrar.add_argument('pdf')
+    subparsers.add_parser('reconstruir', help='Recria o manifesto a partir da pasta.')
+    args = parser.parse_args()
+
+    if args.comando == 'registrar':
+        print(registrar_boletim(args.pdf))
+    else:
+        for boletim in reconstruir_manifesto():
+            print(boletim)
+
+
+if __name__ == '__main__':
+    main()
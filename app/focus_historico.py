@@ -0,0 +1,190 @@
+"""
+Histórico das projeções do Boletim Focus
+
+O scraper baixa a série completa de medianas de cada indicador e ano de
+referência; aqui ela é gravada em focus_projections (um snapshot por data de
+pesquisa) e resumida em focus_aggregates por semana e por mês. O endpoint
+/api/focus/history lê apenas os agregados, paginados.
+
+Uso (recalcula todos os agregados a partir das projeções gravadas):
+    python -m app.focus_historico recalcular
+"""
+import argparse
+import os
+
+import pandas as pd
+
+from app import db
+from app.models import FocusAggregate, FocusData, FocusProjection
+
+# Granularidade -> frequência do pandas (o período começa na segunda-feira / dia 1)
+GRANULARIDADES = {
+    'semana': 'W-SUN',
+    'mes': 'M'
+}
+
+_CAMPOS = ('median', 'mean', 'stdev', 'respondents')
+
+
+def registrar_historico(linhas):
+    """
+    Grava as projeções históricas que ainda não existem e recalcula os
+    agregados dos pares (indicador, ano) afetados. Não faz commit.
+
+    Args:
+        linhas (iterable[dict]): cada item com data, indicador, ano e median
+            (opcionalmente mean, stdev e respondents).
+
+    Returns:
+        int: quantidade de projeções novas.
+    """
+    unicas = {}
+    for linha in linhas:
+        if linha.get('median') is None:
+            continue
+        unicas[(linha['data'], linha['indicador'], int(linha['ano']))] = linha
+    if not unicas:
+        return 0
+
+    datas = {data for data, _, _ in unicas}
+    inicio, fim = min(datas), max(datas)
+
+    existentes = {focus.date: focus for focus in FocusData.query.filter(FocusData.date.between(inicio, fim))}
+    for data in sorted(datas):
+        focus = existentes.get(data)
+        if focus is None:
+            db.session.add(FocusData(date=data))
+        elif focus.is_collection:
+            # A pesquisa da mesma data substitui o snapshot gravado na coleta
+            FocusProjection.query.filter_by(snapshot_date=data).delete(synchronize_session=False)
+            db.session.expire(focus, ['projecoes_registradas'])
+            focus.is_collection = False
+    db.session.flush()
+
+    indicadores = {indicador for _, indicador, _ in unicas}
+    gravadas = set(
+        db.session.query(FocusProjection.snapshot_date, FocusProjection.indicator, FocusProjection.reference_year)
+        .filter(FocusProjection.snapshot_date.between(inicio, fim))
+        .filter(FocusProjection.indicator.in_(indicadores))
+    )
+
+    novas = [
+        FocusProjection(
+            snapshot_date=data,
+            indicator=indicador,
+            reference_year=ano,
+            **{campo: linha.get(campo) for campo in _CAMPOS}
+        )
+        for (data, indicador, ano), linha in sorted(unicas.items())
+        if (data, indicador, ano) not in gravadas
+    ]
+    db.session.bulk_save_objects(novas)
+
+    if novas:
+        recalcular_agregados({(projecao.indicator, projecao.reference_year) for projecao in novas})
+    return len(novas)
+
+
+def recalcular_agregados(pares=None):
+    """
+    Recalcula os agregados semanais e mensais dos pares (indicador, ano)
+    informados (ou de todos). Só entram as datas de pesquisa: os snapshots
+    gravados na data da coleta ficam de fora. Não faz commit.
+    """
+    if pares is None:
+        pares = set(db.session.query(FocusProjection.indicator, FocusProjection.reference_year).distinct())
+
+    for indicador, ano in sorted(pares):
+        registros = (
+            db.session.query(FocusProjection.snapshot_date, FocusProjection.median)
+            .join(FocusData, FocusData.date == FocusProjection.snapshot_date)
+            .filter(FocusProjection.indicator == indicador, FocusProjection.reference_year == ano)
+            .filter(FocusData.is_collection.is_(False))
+            .filter(FocusProjection.median.isnot(None))
+            .order_by(FocusProjection.snapshot_date)
+            .all()
+        )
+        FocusAggregate.query.filter_by(indicator=indicador, reference_year=ano).delete()
+        if not registros:
+            continue
+
+        serie = pd.Series(
+            [mediana for _, mediana in registros],
+            index=pd.to_datetime([data for data, _ in registros])
+        )
+        agregados = []
+        for granularidade, frequencia in GRANULARIDADES.items():
+            resumo = serie.groupby(serie.index.to_period(frequencia)).agg(['last', 'mean', 'min', 'max', 'count'])
+            agregados.extend(
+                FocusAggregate(
+                    indicator=indicador,
+                    reference_year=ano,
+                    granularity=granularidade,
+                    period_start=periodo.start_time.date(),
+                    median_last=float(linha['last']),
+                    median_mean=float(linha['mean']),
+                    median_min=float(linha['min']),
+                    median_max=float(linha['max']),
+                    samples=int(linha['count'])
+                )
+                for periodo, linha in resumo.iterrows()
+            )
+        db.session.bulk_save_objects(agregados)
+
+
+def consultar_historico(indicador, ano, granularidade='semana', inicio=None, fim=None, pagina=1, por_pagina=100):
+    """
+    Página da série agregada de um indicador/ano, em ordem cronológica.
+    Retorna os valores em colunas (um array por campo).
+    """
+    consulta = FocusAggregate.query.filter_by(
+        indicator=indicador,
+        reference_year=int(ano),
+        granularity=granularidade
+    )
+    if inicio is not None:
+        consulta = consulta.filter(FocusAggregate.period_start >= inicio)
+    if fim is not None:
+        consulta = consulta.filter(FocusAggregate.period_start <= fim)
+
+    total = consulta.count()
+    registros = (
+        consulta.order_by(FocusAggregate.period_start)
+        .offset((pagina - 1) * por_pagina)
+        .limit(por_pagina)
+        .all()
+    )
+    return {
+        'indicador': indicador,
+        'ano': int(ano),
+        'granularidade': granularidade,
+        'pagina': pagina,
+        'por_pagina': por_pagina,
+        'total': total,
+        'paginas': (total + por_pagina - 1) // por_pagina,
+        'periodos': [registro.period_start.isoformat() for registro in registros],
+        'mediana': [registro.median_last for registro in registros],
+        'media': [registro.median_mean for registro in registros],
+        'minimo': [registro.median_min for registro in registros],
+        'maximo': [registro.median_max for registro in registros],
+        'amostras': [registro.samples for registro in registros]
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mantém os agregados do histórico do Focus.')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    subparsers.add_parser('recalcular', help='Recalcula todos os agregados a partir de focus_projections.')
+    parser.parse_args()
+
+    from app import create_app
+
+    app = create_app(os.environ.get('FLASK_ENV') or 'default')
+    with app.app_context():
+        recalcular_agregados()
+        db.session.commit()
+        print(f'{FocusAggregate.query.count()} agregados gravados')
+
+
+if __name__ == '__main__':
+    main()
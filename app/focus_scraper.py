@@ -4,19 +4,82 @@ Biblioteca: python-bcb
 Documentação: https://wilsonfreitas.github.io/python-bcb/
 API: https://dadosabertos.bcb.gov.br/dataset/expectativas-mercado
 """
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
+from flask import current_app, has_app_context
+from sqlalchemy import func
 from app import db
-from app.models import FocusData
+from app.models import FocusData, FocusProjection
+from app.focus_historico import registrar_historico
+import numpy as np
 import pandas as pd
 
+# Nome do indicador na API -> chave usada no banco (comparação exata:
+# 'IPCA' não deve trazer também 'IPCA Administrados', 'IPCA Livres' etc.)
+INDICADORES_FOCUS = {
+    'IPCA': 'ipca',
+    'Selic': 'selic',
+    'PIB Total': 'pib',
+    'Câmbio': 'cambio'
+}
+
+# Colunas pedidas ao endpoint ExpectativasMercadoAnuais ($select)
+_COLUNAS_ANUAIS = (
+    'Indicador', 'Data', 'DataReferencia', 'Mediana', 'Media',
+    'DesvioPadrao', 'numeroRespondentes', 'baseCalculo'
+)
+
+def _config(nome, padrao=None):
+    return current_app.config.get(nome, padrao) if has_app_context() else padrao
+
+def criar_api_expectativas():
+    """
+    API de expectativas do BCB. Com BCB_EXPECTATIVAS_URL configurada, usa
+    outro serviço OData com o mesmo esquema (ex.: scripts/focus_fixture_server.py).
+    """
+    url = _config('BCB_EXPECTATIVAS_URL')
+    if url:
+        from bcb import ODataAPI
+        return ODataAPI(url)
+    
+    from bcb import Expectativas
+    return Expectativas()
+
+def data_inicial_consulta(hoje=None):
+    """
+    Primeira data de pesquisa a baixar: alguns dias antes do último snapshot
+    gravado (FOCUS_SOBREPOSICAO_DIAS) ou, com o banco vazio, o início da
+    janela FOCUS_JANELA_INICIAL_DIAS.
+    """
+    hoje = hoje or date.today()
+    ultima = db.session.query(func.max(FocusProjection.snapshot_date)).scalar()
+    if ultima is not None:
+        return min(ultima, hoje) - timedelta(days=_config('FOCUS_SOBREPOSICAO_DIAS', 7))
+    return hoje - timedelta(days=_config('FOCUS_JANELA_INICIAL_DIAS', 730))
+
+def _consultar(ep, filtros, colunas):
+    """
+    Executa a consulta OData com os filtros e só as colunas pedidas, em
+    ordem de data da pesquisa. A base de cálculo 0 (30 dias) é filtrada no
+    servidor quando o endpoint tem essa coluna.
+    """
+    if hasattr(ep, 'baseCalculo'):
+        filtros = list(filtros) + [ep.baseCalculo == 0]
+    
+    consulta = ep.query().filter(*filtros)
+    consulta.select(*[getattr(ep, coluna) for coluna in colunas if hasattr(ep, coluna)])
+    consulta.orderby(ep.Data.asc())
+    df = consulta.collect()
+    
+    if df is None:
+        return pd.DataFrame()
+    return df if isinstance(df, pd.DataFrame) else pd.DataFrame(df)
+
 def buscar_projecoes_focus():
     """
     Busca projeções do Boletim Focus usando a API oficial do BCB
     Retorna True se conseguiu atualizar, False caso contrário
     """
     try:
-        from bcb import Expectativas
-        
         # Verifica se já existe dados para hoje
         hoje = date.today()
         focus_existente = FocusData.query.filter_by(date=hoje).first()
@@ -27,35 +90,24 @@ def buscar_projecoes_focus():
             return True
         
         # Instancia a API de expectativas
-        em = Expectativas()
+        em = criar_api_expectativas()
         
         # Busca dados das medianas (expectativas de mercado)
-        # Usa ExpectativasMercadoAnuais que contém todos os indicadores
-        dados = buscar_dados_anuais(em)
+        # Usa ExpectativasMercadoAnuais que contém todos os indicadores,
+        # só a partir do último snapshot gravado
+        historico = []
+        dados = buscar_dados_anuais(em, historico=historico)
         
-        # Cria ou atualiza registro
-        novo_focus = FocusData(
-            date=hoje,
-            ipca_2025=dados.get('ipca', {}).get(2025),
-            ipca_2026=dados.get('ipca', {}).get(2026),
-            ipca_2027=dados.get('ipca', {}).get(2027),
-            ipca_2028=dados.get('ipca', {}).get(2028),
-            selic_2025=dados.get('selic', {}).get(2025),
-            selic_2026=dados.get('selic', {}).get(2026),
-            selic_2027=dados.get('selic', {}).get(2027),
-            selic_2028=dados.get('selic', {}).get(2028),
-            pib_2025=dados.get('pib', {}).get(2025),
-            pib_2026=dados.get('pib', {}).get(2026),
-            pib_2027=dados.get('pib', {}).get(2027),
-            pib_2028=dados.get('pib', {}).get(2028),
-            cambio_2025=dados.get('cambio', {}).get(2025),
-            cambio_2026=dados.get('cambio', {}).get(2026),
-            cambio_2027=dados.get('cambio', {}).get(2027),
-            cambio_2028=dados.get('cambio', {}).get(2028)
-        )
+        # Guarda a série das datas de pesquisa já baixada (e atualiza os agregados)
+        novas = registrar_historico(historico)
         
-        db.session.add(novo_focus)
+        # Snapshot da coleta, com a última projeção de cada indicador e ano; se
+        # hoje já é uma data de pesquisa, o snapshot veio com o histórico
+        if FocusData.query.filter_by(date=hoje).first() is None:
+            FocusData.registrar(hoje, dados, coleta=True)
         db.session.commit()
+        print(f"{novas} projeções históricas novas gravadas")
+        FocusData.invalidate_cache()
         
         print(f"Dados do Focus atualizados com sucesso para {hoje}")
         return True
@@ -69,115 +121,185 @@ def buscar_projecoes_focus():
         traceback.print_exc()
         return False
 
-def buscar_dados_anuais(expectativas_api):
+# Colunas opcionais das expectativas anuais -> campos de FocusProjection
+_COLUNAS_ESTATISTICAS = {
+    'mean': ('Media', 'media'),
+    'stdev': ('DesvioPadrao', 'desvioPadrao'),
+    'respondents': ('numeroRespondentes', 'NumeroRespondentes')
+}
+
+# Variações de nome já publicadas pela API -> mesma chave do banco
+_ALIASES_INDICADORES = {**INDICADORES_FOCUS, 'PIB': 'pib', 'Câmbio R$/US$': 'cambio'}
+
+_TIPO_INDICADOR = pd.CategoricalDtype(list(dict.fromkeys(INDICADORES_FOCUS.values())))
+
+def _por_categoria(serie, converter, ausente):
+    """
+    Converte uma coluna de poucos valores distintos (indicador, ano de
+    referência) aplicando `converter` só às categorias, não a cada linha.
+    """
+    fatorada = serie.astype('category')
+    convertidos = [converter(valor) for valor in fatorada.cat.categories] + [ausente]
+    # O código -1 (valor nulo) cai no último item, `ausente`
+    return np.asarray(convertidos)[fatorada.cat.codes.to_numpy()]
+
+def _codigo_indicador(nome):
+    chave = _ALIASES_INDICADORES.get(nome)
+    return _TIPO_INDICADOR.categories.get_loc(chave) if chave is not None else -1
+
+def preparar_projecoes(df):
+    """
+    Normaliza o DataFrame bruto de ExpectativasMercadoAnuais em uma tabela
+    enxuta: indicador (categórico, já pela chave do banco), ano de referência,
+    data da pesquisa e estatísticas, ordenada uma única vez pela data.
+    Linhas de outros indicadores ou de outra base de cálculo são descartadas.
+    """
+    codigos = _por_categoria(df['Indicador'], _codigo_indicador, -1).astype('int8')
+    anos = _por_categoria(
+        df['DataReferencia'], lambda valor: pd.to_numeric(valor, errors='coerce'), np.nan
+    ).astype(float)
+    
+    # Só as linhas usadas são copiadas para a tabela nova
+    mascara = (codigos >= 0) & ~np.isnan(anos)
+    if 'baseCalculo' in df.columns:
+        mascara &= df['baseCalculo'].to_numpy() == 0
+    linhas = np.flatnonzero(mascara)
+    
+    def _numerica(coluna):
+        return pd.to_numeric(df[coluna].iloc[linhas], errors='coerce').to_numpy(dtype=float)
+    
+    colunas = {
+        'indicador': pd.Categorical.from_codes(codigos[linhas], dtype=_TIPO_INDICADOR),
+        'ano': anos[linhas].astype('int16'),
+        'data': pd.to_datetime(df['Data'].iloc[linhas], errors='coerce').to_numpy(),
+        'median': _numerica('Mediana')
+    }
+    for campo, nomes in _COLUNAS_ESTATISTICAS.items():
+        coluna = next((nome for nome in nomes if nome in df.columns), None)
+        if coluna is not None:
+            colunas[campo] = _numerica(coluna)
+    
+    projecoes = pd.DataFrame(colunas)
+    projecoes = projecoes[projecoes['data'].notna()]
+    return projecoes.sort_values('data', kind='stable', ignore_index=True)
+
+def _registros(projecoes):
+    """Linhas de preparar_projecoes como dicts, com None no lugar de NaN"""
+    linhas = projecoes.astype(object).where(projecoes.notna(), None)
+    registros = linhas.to_dict('records')
+    for registro in registros:
+        registro['ano'] = int(registro['ano'])
+        if registro['median'] is not None:
+            registro['median'] = float(registro['median'])
+        for campo in ('mean', 'stdev'):
+            if registro.get(campo) is not None:
+                registro[campo] = float(registro[campo])
+        if registro.get('respondents') is not None:
+            registro['respondents'] = int(registro['respondents'])
+    return registros
+
+def ultimas_projecoes(projecoes, anos):
+    """
+    Última projeção (pela data da pesquisa) de cada indicador e ano de
+    referência pedido, com média, desvio padrão e respondentes.
+    
+    Returns:
+        dict: {'ipca': {2026: {'median': ..., 'mean': ...}, ...}, ...}
+    """
+    recorte = projecoes[projecoes['ano'].isin(anos)]
+    ultimas = recorte.groupby(['indicador', 'ano'], observed=True, sort=False).tail(1)
+    
+    dados = {indicador: {} for indicador in _TIPO_INDICADOR.categories}
+    for registro in _registros(ultimas.drop(columns='data')):
+        if registro['median'] is None:
+            continue
+        dados[registro['indicador']][registro['ano']] = {
+            campo: valor for campo, valor in registro.items()
+            if campo not in ('indicador', 'ano') and valor is not None
+        }
+    return dados
+
+def linhas_historico(projecoes):
+    """
+    Série completa: uma linha por indicador, data de pesquisa e ano de
+    referência, no formato de registrar_historico.
+    """
+    validas = projecoes[projecoes['median'].notna()]
+    registros = _registros(validas)
+    for registro in registros:
+        registro['indicador'] = str(registro['indicador'])
+        registro['data'] = registro['data'].date()
+    return registros
+
+def buscar_dados_anuais(expectativas_api, historico=None, inicio=None):
     """
     Busca dados anuais de todos os indicadores usando ExpectativasMercadoAnuais
     
+    Os filtros (indicador, anos de referência, janela de datas e base de
+    cálculo) e as colunas vão na própria consulta OData: só as pesquisas a
+    partir de `inicio` são baixadas, uma consulta por indicador.
+    
     Args:
         expectativas_api: Instância da API Expectativas
+        historico (list): se informada, recebe a série de medianas da janela
+            (todas as datas de pesquisa), no formato de registrar_historico
+        inicio (date): primeira data de pesquisa; padrão: data_inicial_consulta()
     
     Returns:
-        dict com dados por indicador e ano: {'ipca': {2025: valor, ...}, 'selic': {...}, ...}
+        dict com dados por indicador e ano: {'ipca': {2025: {'median': ..., 'mean': ...}, ...}, 'selic': {...}, ...}
     """
-    dados = {}
+    dados = {indicador_key: {} for indicador_key in INDICADORES_FOCUS.values()}
     
     try:
         # Obtém o endpoint de expectativas anuais
         ep = expectativas_api.get_endpoint('ExpectativasMercadoAnuais')
         
-        # Query para buscar dados
-        query = ep.query()
+        inicio = inicio or data_inicial_consulta()
         
-        # Coleta todos os dados
-        df = query.collect()
+        # Ano atual
+        ano_atual = datetime.now().year
+        anos = [ano_atual, ano_atual + 1, ano_atual + 2, ano_atual + 3]
         
-        if df is not None and not df.empty:
-            # Converte para DataFrame se necessário
-            if not isinstance(df, pd.DataFrame):
-                df = pd.DataFrame(df)
-            
-            print(f"Colunas disponíveis: {list(df.columns)}")
-            
-            # Processa dados por indicador
-            # Mapeia indicadores
-            indicadores = {
-                'IPCA': 'ipca',
-                'Selic': 'selic',
-                'PIB Total': 'pib',
-                'PIB': 'pib',
-                'Câmbio': 'cambio',
-                'Câmbio R$/US$': 'cambio'
-            }
-            
-            # Ano atual
-            ano_atual = datetime.now().year
-            anos = [ano_atual, ano_atual + 1, ano_atual + 2, ano_atual + 3]
-            
-            # Verifica colunas disponíveis
-            if 'Indicador' not in df.columns:
-                print("Coluna 'Indicador' não encontrada")
-                return dados
-            
-            # Coluna de data (pode ser DataReferencia, Data, ou outra)
-            coluna_data = None
-            for col in ['DataReferencia', 'Data', 'dataReferencia', 'data']:
-                if col in df.columns:
-                    coluna_data = col
-                    break
-            
-            if not coluna_data:
-                print("Coluna de data não encontrada")
-                return dados
-            
-            # Coluna de valor (pode ser Mediana, Media, ou outra)
-            coluna_valor = None
-            for col in ['Mediana', 'Media', 'mediana', 'media']:
-                if col in df.columns:
-                    coluna_valor = col
-                    break
-            
-            if not coluna_valor:
-                print("Coluna de valor não encontrada")
-                return dados
-            
-            # Converte data para datetime
-            df[coluna_data] = pd.to_datetime(df[coluna_data], errors='coerce')
-            
-            # Inicializa estrutura de dados
-            for indicador_nome, indicador_key in indicadores.items():
-                if indicador_key not in dados:
-                    dados[indicador_key] = {}
-            
-            # Processa cada indicador
-            for indicador_nome, indicador_key in indicadores.items():
-                # Filtra dados do indicador
-                df_ind = df[df['Indicador'].str.contains(indicador_nome, case=False, na=False)]
-                
-                if df_ind.empty:
-                    continue
-                
-                # Processa por ano
-                for ano in anos:
-                    # Filtra dados do ano
-                    df_ano = df_ind[df_ind[coluna_data].dt.year == ano]
-                    
-                    if not df_ano.empty:
-                        # Pega a última mediana disponível
-                        valor = df_ano[coluna_valor].iloc[-1]
-                        if pd.notna(valor):
-                            dados[indicador_key][ano] = float(valor)
+        # Anos de referência da janela: os do histórico e os do snapshot
+        primeiro_ano = min(inicio.year, ano_atual)
+        
+        consultas = [
+            _consultar(
+                ep,
+                [
+                    ep.Indicador == indicador_nome,
+                    ep.Data >= inicio,
+                    ep.DataReferencia >= str(primeiro_ano),
+                    ep.DataReferencia <= str(anos[-1])
+                ],
+                _COLUNAS_ANUAIS
+            )
+            for indicador_nome in INDICADORES_FOCUS
+        ]
+        consultas = [df for df in consultas if not df.empty]
+        
+        if consultas:
+            # Uma única tabela normalizada e ordenada para todos os indicadores
+            projecoes = preparar_projecoes(pd.concat(consultas, ignore_index=True))
             
-            # Se não encontrou dados, tenta buscar Selic separadamente
-            if not dados.get('selic'):
-                dados_selic = buscar_selic_separado(expectativas_api)
-                if dados_selic:
-                    dados['selic'] = dados_selic
+            if historico is not None:
+                historico.extend(linhas_historico(projecoes))
             
-            # Se não encontrou IPCA, tenta buscar separadamente
-            if not dados.get('ipca'):
-                dados_ipca = buscar_inflacao_separado(expectativas_api)
-                if dados_ipca:
-                    dados['ipca'] = dados_ipca
+            # Pega a última mediana de cada (indicador, ano), com média, desvio e respondentes
+            for indicador_key, por_ano in ultimas_projecoes(projecoes, anos).items():
+                dados[indicador_key].update(por_ano)
+        
+        # Se não encontrou dados, tenta buscar Selic separadamente
+        if not dados.get('selic'):
+            dados_selic = buscar_selic_separado(expectativas_api, inicio)
+            if dados_selic:
+                dados['selic'] = dados_selic
+        
+        # Se não encontrou IPCA, tenta buscar separadamente
+        if not dados.get('ipca'):
+            dados_ipca = buscar_inflacao_separado(expectativas_api, inicio)
+            if dados_ipca:
+                dados['ipca'] = dados_ipca
         
         return dados
     
@@ -187,99 +309,52 @@ def buscar_dados_anuais(expectativas_api):
         traceback.print_exc()
         return dados
 
-def buscar_selic_separado(expectativas_api):
+def _ultima_mediana_por_ano(df):
+    """Última mediana de cada ano (atual e três seguintes), pela data da pesquisa"""
+    dados = {}
+    ano_atual = datetime.now().year
+    for ano in [ano_atual, ano_atual + 1, ano_atual + 2, ano_atual + 3]:
+        df_ano = df[df['Data'].dt.year == ano]
+        if not df_ano.empty:
+            valor = df_ano['Mediana'].iloc[-1]
+            if pd.notna(valor):
+                dados[ano] = float(valor)
+    return dados
+
+def buscar_selic_separado(expectativas_api, inicio=None):
     """Busca dados de Selic usando endpoint específico"""
     try:
         ep = expectativas_api.get_endpoint('ExpectativasMercadoSelic')
-        query = ep.query()
-        df = query.collect()
         
-        if df is not None and not df.empty:
-            df = pd.DataFrame(df) if not isinstance(df, pd.DataFrame) else df
-            
-            # Verifica colunas
-            coluna_data = None
-            for col in ['DataReferencia', 'Data', 'dataReferencia', 'data']:
-                if col in df.columns:
-                    coluna_data = col
-                    break
-            
-            if not coluna_data:
-                return {}
-            
-            coluna_valor = None
-            for col in ['Mediana', 'Media', 'mediana', 'media']:
-                if col in df.columns:
-                    coluna_valor = col
-                    break
-            
-            if not coluna_valor:
-                return {}
-            
-            df[coluna_data] = pd.to_datetime(df[coluna_data], errors='coerce')
-            
-            dados = {}
-            ano_atual = datetime.now().year
-            anos = [ano_atual, ano_atual + 1, ano_atual + 2, ano_atual + 3]
-            
-            for ano in anos:
-                df_ano = df[df[coluna_data].dt.year == ano]
-                if not df_ano.empty:
-                    valor = df_ano[coluna_valor].iloc[-1]
-                    if pd.notna(valor):
-                        dados[ano] = float(valor)
-            
-            return dados
+        # Só pesquisas do ano atual entram no resultado
+        inicio = max(inicio or data_inicial_consulta(), date(datetime.now().year, 1, 1))
+        df = _consultar(ep, [ep.Data >= inicio], ('Data', 'Mediana', 'baseCalculo'))
+        
+        if df.empty:
+            return {}
+        return _ultima_mediana_por_ano(df)
     except Exception as e:
         print(f"Erro ao buscar Selic: {str(e)}")
         return {}
 
-def buscar_inflacao_separado(expectativas_api):
+def buscar_inflacao_separado(expectativas_api, inicio=None):
     """Busca dados de inflação (IPCA) usando endpoint específico"""
     try:
         # Tenta endpoint de inflação 12 meses
         ep = expectativas_api.get_endpoint('ExpectativasMercadoInflacao12Meses')
-        query = ep.query()
-        df = query.collect()
         
-        if df is not None and not df.empty:
-            df = pd.DataFrame(df) if not isinstance(df, pd.DataFrame) else df
-            
-            # Verifica colunas
-            coluna_data = None
-            for col in ['DataReferencia', 'Data', 'dataReferencia', 'data']:
-                if col in df.columns:
-                    coluna_data = col
-                    break
-            
-            if not coluna_data:
-                return {}
-            
-            coluna_valor = None
-            for col in ['Mediana', 'Media', 'mediana', 'media']:
-                if col in df.columns:
-                    coluna_valor = col
-                    break
-            
-            if not coluna_valor:
-                return {}
-            
-            df[coluna_data] = pd.to_datetime(df[coluna_data], errors='coerce')
-            
-            dados = {}
-            ano_atual = datetime.now().year
-            anos = [ano_atual, ano_atual + 1, ano_atual + 2, ano_atual + 3]
-            
-            # Para inflação, pode ser necessário processar por período
-            # Por enquanto, usa o último valor disponível para cada ano
-            for ano in anos:
-                df_ano = df[df[coluna_data].dt.year == ano]
-                if not df_ano.empty:
-                    valor = df_ano[coluna_valor].iloc[-1]
-                    if pd.notna(valor):
-                        dados[ano] = float(valor)
-            
-            return dados
+        # Para inflação, pode ser necessário processar por período
+        # Por enquanto, usa o último valor disponível do ano atual
+        inicio = max(inicio or data_inicial_consulta(), date(datetime.now().year, 1, 1))
+        df = _consultar(
+            ep,
+            [ep.Indicador == 'IPCA', ep.Data >= inicio],
+            ('Indicador', 'Data', 'Mediana', 'baseCalculo')
+        )
+        
+        if df.empty:
+            return {}
+        return _ultima_mediana_por_ano(df)
     except Exception as e:
         print(f"Erro ao buscar inflação: {str(e)}")
         return {}
@@ -290,9 +365,7 @@ def buscar_dados_focus_manual():
     Usa método mais direto da API
     """
     try:
-        from bcb import Expectativas
-        
-        em = Expectativas()
+        em = criar_api_expectativas()
         hoje = date.today()
         
         # Verifica se já existe
@@ -311,30 +384,11 @@ def buscar_dados_focus_manual():
         if not dados.get('ipca'):
             dados['ipca'] = buscar_inflacao_separado(em)
         
-        # Cria registro no banco
+        # Cria o snapshot no banco
         if dados:
-            novo_focus = FocusData(
-                date=hoje,
-                ipca_2025=dados.get('ipca', {}).get(2025),
-                ipca_2026=dados.get('ipca', {}).get(2026),
-                ipca_2027=dados.get('ipca', {}).get(2027),
-                ipca_2028=dados.get('ipca', {}).get(2028),
-                selic_2025=dados.get('selic', {}).get(2025),
-                selic_2026=dados.get('selic', {}).get(2026),
-                selic_2027=dados.get('selic', {}).get(2027),
-                selic_2028=dados.get('selic', {}).get(2028),
-                pib_2025=dados.get('pib', {}).get(2025),
-                pib_2026=dados.get('pib', {}).get(2026),
-                pib_2027=dados.get('pib', {}).get(2027),
-                pib_2028=dados.get('pib', {}).get(2028),
-                cambio_2025=dados.get('cambio', {}).get(2025),
-                cambio_2026=dados.get('cambio', {}).get(2026),
-                cambio_2027=dados.get('cambio', {}).get(2027),
-                cambio_2028=dados.get('cambio', {}).get(2028)
-            )
-            
-            db.session.add(novo_focus)
+            FocusData.registrar(hoje, dados, coleta=True)
             db.session.commit()
+            FocusData.invalidate_cache()
             return True
         
         return False
@@ -71,8 +71,9 @@ def test_api():
             latest = FocusData.get_latest()
             if latest:
                 print(f"\n✓ Dados mais recentes no banco: {latest.date}")
-                print(f"  IPCA 2025: {latest.ipca_2025}")
-                print(f"  Selic 2025: {latest.selic_2025}")
+                for ano in latest.anos():
+                    print(f"  IPCA {ano}: {latest.projecao('ipca', ano)}")
+                    print(f"  Selic {ano}: {latest.projecao('selic', ano)}")
             else:
                 print("\n✗ Nenhum dado encontrado no banco")
         
@@ -0,0 +1,377 @@
+"""
+Motor da calculadora de Liberdade Financeira
+
+Mesmas contas de static/js/liberdade.js (patrimônio necessário, patrimônio
+acumulado, tempo até o alvo e aporte necessário), em taxa real mensal e em
+versão vetorizada: cada campo do cenário vira um array, então uma tabela de
+milhares de cenários sai de uma avaliação das fórmulas fechadas. O tempo até
+o alvo vem do logaritmo da anuidade, sem laço mês a mês.
+
+O IR dos saques usa os modos da página ('bruto', '15', 'isento' e 'custom'
+com a alíquota informada) mais a tabela regressiva de app.calculations (modo
+'tabela'); com taxa nominal, a taxa real desconta o IPCA e os valores nominais
+na data da liberdade seguem ajustar_inflacao.
+
+Diferença em relação ao JS: com taxa real negativa, liberdade.js trata r <= 0
+como acumulação simples (sem juros), enquanto aqui a taxa negativa corrói o
+patrimônio e os saques mês a mês. Para taxas positivas os resultados coincidem.
+
+O modo Monte Carlo sorteia retornos reais mensais (log-normais em torno da
+taxa real, com a volatilidade informada) para a acumulação e os saques e
+devolve a probabilidade de o patrimônio durar até a expectativa de vida.
+"""
+import math
+
+import numpy as np
+
+from app.calculations import ajustar_inflacao, get_ir_rates
+from app.monte_carlo import BYTES_POR_BLOCO, PERCENTIS_PADRAO, trajetorias_por_bloco
+
+IR_MODOS = ('bruto', '15', 'isento', 'tabela', 'custom')
+
+# Alíquota fixa do modo '15' (static/js/liberdade.js)
+ALIQUOTA_IR_PADRAO = 15.0
+
+# Padrões da calculadora (static/js/liberdade.js)
+CENARIO_PADRAO = {
+    'idade_atual': 30,
+    'idade_liberdade': 55,
+    'expectativa_vida': 90,
+    'renda_desejada': 0.0,
+    'aporte_mensal': 0.0,
+    'patrimonio_atual': 0.0,
+    'taxa_real': 7.0,
+    'ir_modo': 'bruto',
+    'aliquota_ir': 0.0
+}
+CAMPOS_VALOR = ('renda_desejada', 'aporte_mensal', 'patrimonio_atual')
+
+# Acima dessa idade o alvo é tratado como inalcançável
+IDADE_MAXIMA = 120
+
+# Variações de "E se eu ajustar"
+ADIAMENTO_MESES = 60
+AUMENTO_APORTE = 0.5
+REDUCAO_RENDA = 0.2
+
+VOLATILIDADE_PADRAO = 10.0
+
+
+def taxa_mensal(taxa_real):
+    """Taxa real mensal equivalente à anual (% a.a.)."""
+    return (1 + np.asarray(taxa_real, dtype=float) / 100) ** (1/12) - 1
+
+
+def aplicar_ir(renda_liquida, aliquota):
+    """Saque bruto que rende `renda_liquida` depois do IR (alíquota em decimal)."""
+    aliquota = np.asarray(aliquota, dtype=float)
+    with np.errstate(divide='ignore'):
+        return np.where(aliquota >= 1, np.inf, renda_liquida / (1 - np.maximum(aliquota, 0.0)))
+
+
+def patrimonio_necessario(renda_mensal, taxa_real, anos_usufruto):
+    """Valor presente dos saques mensais ao longo de `anos_usufruto`."""
+    r = taxa_mensal(taxa_real)
+    n = np.asarray(anos_usufruto, dtype=float) * 12
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fator = np.where(r == 0, n, -np.expm1(-n * np.log1p(r)) / r)
+    return renda_mensal * fator
+
+
+def patrimonio_acumulado(patrimonio_atual, aporte_mensal, taxa_real, meses):
+    """Patrimônio após `meses` com aportes no fim de cada mês."""
+    r = taxa_mensal(taxa_real)
+    meses = np.asarray(meses, dtype=float)
+    crescimento = np.expm1(meses * np.log1p(r))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        anuidade = np.where(r == 0, meses, crescimento / r)
+    return patrimonio_atual * (1 + crescimento) + aporte_mensal * anuidade
+
+
+def meses_para_atingir(patrimonio_atual, aporte_mensal, taxa_real, alvo):
+    """
+    Meses (inteiros, arredondados para cima) até o patrimônio chegar ao alvo;
+    inf quando não chega. Resolve PV·(1+r)^n + A·((1+r)^n − 1)/r = alvo com
+    logaritmos: n = log((alvo·r + A) / (PV·r + A)) / log(1 + r).
+    """
+    r = taxa_mensal(taxa_real)
+    patrimonio_atual, aporte_mensal, alvo, r = np.broadcast_arrays(
+        np.asarray(patrimonio_atual, dtype=float), np.asarray(aporte_mensal, dtype=float),
+        np.asarray(alvo, dtype=float), r
+    )
+    with np.errstate(divide='ignore', invalid='ignore'):
+        razao = (alvo * r + aporte_mensal) / (patrimonio_atual * r + aporte_mensal)
+        n = np.where(r == 0, (alvo - patrimonio_atual) / aporte_mensal, np.log(razao) / np.log1p(r))
+    # Arredonda resíduos de ponto flutuante antes do teto (n = 12,0000000001 → 12)
+    n = np.where(np.isfinite(n) & (n > 0), np.ceil(np.round(n, 9)), np.inf)
+    return np.where(alvo <= patrimonio_atual, 0.0, n)
+
+
+def aporte_necessario(patrimonio_atual, alvo, taxa_real, meses):
+    """Aporte mensal que leva o patrimônio ao alvo em `meses` (nunca negativo)."""
+    r = taxa_mensal(taxa_real)
+    meses = np.asarray(meses, dtype=float)
+    crescimento = np.expm1(meses * np.log1p(r))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        anuidade = np.where(r == 0, meses, crescimento / r)
+        aporte = (alvo - patrimonio_atual * (1 + crescimento)) / anuidade
+    return np.where(meses > 0, np.maximum(aporte, 0.0), np.inf)
+
+
+def aliquota_saques(ir_modo, aliquota_ir=0.0, anos_usufruto=None):
+    """
+    Alíquota (decimal) sobre os saques: zero em 'bruto' e 'isento', 15% em
+    '15', a informada em 'custom' e, em 'tabela', a da tabela regressiva pelo
+    prazo do usufruto (15% acima de dois anos).
+    """
+    if ir_modo in ('bruto', 'isento'):
+        return np.zeros(np.shape(aliquota_ir))
+    if ir_modo == '15':
+        return np.full(np.shape(aliquota_ir), ALIQUOTA_IR_PADRAO / 100)
+    if ir_modo == 'tabela':
+        return get_ir_rates(np.asarray(anos_usufruto, dtype=float) * 360)
+    return np.asarray(aliquota_ir, dtype=float) / 100
+
+
+def validar_cenario(dados, padrao=None):
+    """
+    Normaliza um cenário: idades, valores (R$), taxa_real ou taxa_nominal e
+    ipca (% a.a.), ir_modo e aliquota_ir (%). Campos ausentes vêm de `padrao`
+    e depois de CENARIO_PADRAO; ipca pode ficar None para ser resolvido depois.
+    """
+    if not isinstance(dados, dict):
+        raise ValueError('Cenário deve ser um objeto')
+    padrao = padrao or {}
+
+    def campo(nome, base=None):
+        valor = dados.get(nome, padrao.get(nome))
+        return CENARIO_PADRAO.get(nome, base) if valor is None else valor
+
+    cenario = {
+        nome: float(campo(nome))
+        for nome in ('idade_atual', 'idade_liberdade', 'expectativa_vida', *CAMPOS_VALOR, 'aliquota_ir')
+    }
+    if cenario['idade_liberdade'] <= cenario['idade_atual']:
+        raise ValueError('A idade da liberdade precisa ser maior que a idade atual')
+    if any(cenario[nome] < 0 for nome in CAMPOS_VALOR):
+        raise ValueError('Renda, aporte e patrimônio não podem ser negativos')
+
+    # A página envia o modo como texto ("15"); clientes JSON podem mandar 15
+    cenario['ir_modo'] = str(campo('ir_modo'))
+    if cenario['ir_modo'] not in IR_MODOS:
+        raise ValueError(f'Modo de IR inválido: {cenario["ir_modo"]} (use {", ".join(IR_MODOS)})')
+    if not 0 <= cenario['aliquota_ir'] < 100:
+        raise ValueError('Alíquota de IR deve estar entre 0 e 100')
+
+    ipca = campo('ipca')
+    cenario['ipca'] = None if ipca is None else float(ipca)
+    # Taxa nominal só vale quando a real não foi informada
+    nominal = dados.get('taxa_nominal', padrao.get('taxa_nominal'))
+    real = dados.get('taxa_real', padrao.get('taxa_real'))
+    if real is None and nominal is not None:
+        cenario['taxa_real'] = None
+        cenario['taxa_nominal'] = float(nominal)
+    else:
+        cenario['taxa_real'] = float(CENARIO_PADRAO['taxa_real'] if real is None else real)
+        cenario['taxa_nominal'] = None
+    if (cenario['taxa_real'] if cenario['taxa_real'] is not None else cenario['taxa_nominal']) <= -100:
+        raise ValueError('Rentabilidade deve ser maior que -100%')
+    return cenario
+
+
+def _colunas(cenarios):
+    """Campos dos cenários como arrays (None vira NaN) e grandezas derivadas."""
+    colunas = {
+        nome: np.array([np.nan if cenario[nome] is None else cenario[nome] for cenario in cenarios], dtype=float)
+        for nome in (*CENARIO_PADRAO, 'ipca', 'taxa_nominal') if nome != 'ir_modo'
+    }
+    colunas['taxa_real'] = np.where(
+        np.isnan(colunas['taxa_real']),
+        ((1 + colunas['taxa_nominal'] / 100) / (1 + colunas['ipca'] / 100) - 1) * 100,
+        colunas['taxa_real']
+    )
+    colunas['meses_acumulacao'] = np.rint((colunas['idade_liberdade'] - colunas['idade_atual']) * 12)
+    colunas['anos_usufruto'] = np.maximum(1.0, colunas['expectativa_vida'] - colunas['idade_liberdade'])
+
+    aliquota = np.zeros(len(cenarios))
+    for modo in IR_MODOS:
+        indices = [k for k, cenario in enumerate(cenarios) if cenario['ir_modo'] == modo]
+        if indices:
+            aliquota[indices] = aliquota_saques(modo, colunas['aliquota_ir'][indices], colunas['anos_usufruto'][indices])
+    colunas['aliquota'] = aliquota
+    return colunas
+
+
+def _valores(array, casas=2):
+    """Lista JSON: inf/NaN viram None."""
+    array = np.asarray(array, dtype=float)
+    valores = np.round(array, casas).astype(object)
+    valores[~np.isfinite(array)] = None
+    return valores.tolist()
+
+
+def _status(idade_chegada, idade_liberdade):
+    if not np.isfinite(idade_chegada) or idade_chegada > IDADE_MAXIMA:
+        return 'nao_atinge'
+    return 'antes' if idade_chegada <= idade_liberdade else 'depois'
+
+
+def planejar_lote(cenarios):
+    """
+    Avalia todos os cenários de uma vez (arrays com um elemento por cenário).
+
+    Returns:
+        list: por cenário, patrimônio alvo e projetado (reais e nominais),
+        renda bruta, meses e idade de chegada, aporte ideal, status e as
+        variações de "E se eu ajustar" (adiar 5 anos, aporte +50%, renda −20%).
+    """
+    c = _colunas(cenarios)
+    taxa = c['taxa_real']
+    renda_bruta = aplicar_ir(c['renda_desejada'], c['aliquota'])
+    alvo = patrimonio_necessario(renda_bruta, taxa, c['anos_usufruto'])
+    projetado = patrimonio_acumulado(c['patrimonio_atual'], c['aporte_mensal'], taxa, c['meses_acumulacao'])
+    meses_alvo = meses_para_atingir(c['patrimonio_atual'], c['aporte_mensal'], taxa, alvo)
+    idade_chegada = c['idade_atual'] + meses_alvo / 12
+    aporte_ideal = aporte_necessario(c['patrimonio_atual'], alvo, taxa, c['meses_acumulacao'])
+
+    # Valores na data da liberdade em reais da época (inverso de ajustar_inflacao)
+    deflator = ajustar_inflacao(1.0, c['meses_acumulacao'], ipca=np.nan_to_num(c['ipca']))
+
+    aporte_adiando = aporte_necessario(c['patrimonio_atual'], alvo, taxa, c['meses_acumulacao'] + ADIAMENTO_MESES)
+    idade_aumentando = c['idade_atual'] + meses_para_atingir(
+        c['patrimonio_atual'], c['aporte_mensal'] * (1 + AUMENTO_APORTE), taxa, alvo
+    ) / 12
+    # O alvo é proporcional à renda
+    idade_reduzindo = c['idade_atual'] + meses_para_atingir(
+        c['patrimonio_atual'], c['aporte_mensal'], taxa, alvo * (1 - REDUCAO_RENDA)
+    ) / 12
+
+    colunas = {
+        'taxa_real': _valores(taxa, 4),
+        'renda_bruta': _valores(renda_bruta),
+        'patrimonio_alvo': _valores(alvo),
+        'patrimonio_projetado': _valores(projetado),
+        'patrimonio_alvo_nominal': _valores(np.where(np.isnan(c['ipca']), np.nan, alvo / deflator)),
+        'patrimonio_projetado_nominal': _valores(np.where(np.isnan(c['ipca']), np.nan, projetado / deflator)),
+        'meses_ate_alvo': _valores(meses_alvo, 0),
+        'idade_chegada': _valores(idade_chegada, 2),
+        'aporte_ideal': _valores(aporte_ideal),
+        'aporte_adiando_5_anos': _valores(aporte_adiando),
+        'idade_aporte_mais_50': _valores(idade_aumentando, 2),
+        'idade_renda_menos_20': _valores(idade_reduzindo, 2)
+    }
+    return [
+        {
+            **{nome: valores[k] for nome, valores in colunas.items()},
+            'status': _status(idade_chegada[k], c['idade_liberdade'][k])
+        }
+        for k in range(len(cenarios))
+    ]
+
+
+def planejar(cenario):
+    """Resultado de um cenário mais a curva anual do patrimônio para o gráfico."""
+    resultado = planejar_lote([cenario])[0]
+    anos = np.arange(int(round(cenario['idade_liberdade'] - cenario['idade_atual'])) + 1)
+    patrimonio = patrimonio_acumulado(
+        cenario['patrimonio_atual'], cenario['aporte_mensal'], _colunas([cenario])['taxa_real'][0], anos * 12
+    )
+    resultado['grafico'] = {
+        'idades': (cenario['idade_atual'] + anos).tolist(),
+        'patrimonio': _valores(patrimonio, 0)
+    }
+    return resultado
+
+
+def _fluxos(cenario, renda_bruta):
+    """Fluxo de cada mês: aporte na acumulação, saque (negativo) no usufruto."""
+    meses_acumulacao = int(round((cenario['idade_liberdade'] - cenario['idade_atual']) * 12))
+    meses_usufruto = int(round(max(1.0, cenario['expectativa_vida'] - cenario['idade_liberdade']) * 12))
+    return np.concatenate([
+        np.full(meses_acumulacao, cenario['aporte_mensal']),
+        np.full(meses_usufruto, -renda_bruta)
+    ]), meses_acumulacao
+
+
+def simular_liberdade(
+    cenario,
+    trajetorias=10000,
+    volatilidade=VOLATILIDADE_PADRAO,
+    semente=None,
+    percentis=PERCENTIS_PADRAO,
+    bytes_por_bloco=BYTES_POR_BLOCO
+):
+    """
+    Monte Carlo do plano: retornos reais mensais log-normais com mediana na
+    taxa real e `volatilidade` (% a.a.); aportes até a idade da liberdade e
+    saques da renda bruta até a expectativa de vida.
+
+    O patrimônio de cada trajetória sai de somas acumuladas do log dos
+    retornos (W_t = G_t·(W_0 + Σ c_s/G_s)), sem laço por mês. Depois de
+    negativo ele não volta a ser positivo (os saques continuam), então o
+    sinal no último mês decide o sucesso.
+
+    Returns:
+        dict: resultado determinístico, probabilidades de atingir o alvo na
+        idade da liberdade e de o dinheiro durar até a expectativa de vida,
+        percentis do patrimônio na liberdade e da idade de esgotamento, e
+        bandas anuais do patrimônio para o gráfico.
+    """
+    if trajetorias < 1:
+        raise ValueError('Informe ao menos uma trajetória')
+    if volatilidade < 0:
+        raise ValueError('Volatilidade não pode ser negativa')
+
+    base = planejar_lote([cenario])[0]
+    colunas = _colunas([cenario])
+    taxa_real = float(colunas['taxa_real'][0])
+    fluxos, meses_acumulacao = _fluxos(cenario, float(aplicar_ir(cenario['renda_desejada'], colunas['aliquota'][0])))
+    meses = len(fluxos)
+    grade = np.arange(0, meses + 1, 12)
+    if grade[-1] != meses:
+        grade = np.append(grade, meses)
+
+    media = math.log1p(taxa_real / 100) / 12
+    desvio = volatilidade / 100 / math.sqrt(12)
+    patrimonio_inicial = float(cenario['patrimonio_atual'])
+
+    na_liberdade = np.empty(trajetorias)
+    esgotamento = np.full(trajetorias, np.nan)
+    bandas = np.empty((trajetorias, len(grade)), dtype=np.float32)
+    rng = np.random.default_rng(semente)
+    tamanho_bloco = trajetorias_por_bloco(1, meses, bytes_por_bloco)
+    for inicio in range(0, trajetorias, tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, trajetorias)
+        acumulado = np.cumsum(media + desvio * rng.standard_normal((fim - inicio, meses)), axis=1)
+        patrimonio = np.exp(acumulado) * (patrimonio_inicial + np.cumsum(fluxos * np.exp(-acumulado), axis=1))
+        del acumulado
+        patrimonio = np.concatenate([np.full((fim - inicio, 1), patrimonio_inicial), patrimonio], axis=1)
+
+        na_liberdade[inicio:fim] = patrimonio[:, meses_acumulacao]
+        esgotou = patrimonio[:, -1] < 0
+        primeiro = np.argmax(patrimonio < 0, axis=1)
+        esgotamento[inicio:fim] = np.where(esgotou, cenario['idade_atual'] + primeiro / 12, np.nan)
+        bandas[inicio:fim] = np.maximum(patrimonio[:, grade], 0.0)
+
+    percentis = [float(p) for p in percentis]
+    chaves = [f'p{p:g}' for p in percentis]
+    esgotados = esgotamento[~np.isnan(esgotamento)]
+    faixas = np.percentile(bandas, percentis, axis=0)
+    finais = np.percentile(na_liberdade, percentis)
+    idades = np.percentile(esgotados, percentis) if len(esgotados) else [None] * len(percentis)
+
+    return {
+        'trajetorias': int(trajetorias),
+        'semente': semente,
+        'volatilidade': float(volatilidade),
+        'percentis': percentis,
+        'deterministico': base,
+        'prob_atinge_alvo': round(float((na_liberdade >= base['patrimonio_alvo']).mean() * 100), 2),
+        'prob_sucesso': round(float((1 - len(esgotados) / trajetorias) * 100), 2),
+        'patrimonio_liberdade': {chave: round(float(finais[k]), 2) for k, chave in enumerate(chaves)},
+        'idade_esgotamento': {
+            chave: None if idades[k] is None else round(float(idades[k]), 2) for k, chave in enumerate(chaves)
+        },
+        'idades': (cenario['idade_atual'] + grade / 12).round(2).tolist(),
+        'bandas': {chave: np.round(faixas[k], 2).tolist() for k, chave in enumerate(chaves)}
+    }
@@ -1,7 +1,14 @@
 from app import db
+from app.cache import TTLCache
+from app.cache_backends import CacheConfiguravel
+from flask import current_app
 from flask_login import UserMixin
 from datetime import datetime, timedelta
 
+# Cache do snapshot mais recente do Focus (os dados mudam uma vez por semana);
+# o backend (memória, SQLite ou Redis) é definido em create_app
+_focus_cache = CacheConfiguravel(TTLCache(ttl=3600))
+
 class User(UserMixin, db.Model):
     """Modelo de usuário"""
     __tablename__ = 'users'
@@ -74,46 +81,205 @@ class AccessCode(db.Model):
 
 
 class FocusData(db.Model):
-    """Modelo para armazenar dados do Boletim Focus"""
+    """
+    Snapshot do Boletim Focus (uma linha por data de coleta).
+    As projeções ficam em FocusProjection, uma linha por indicador e ano.
+    """
     __tablename__ = 'focus_data'
     
+    # Indicadores coletados do Focus
+    INDICADORES = ('ipca', 'selic', 'pib', 'cambio')
+    
     id = db.Column(db.Integer, primary_key=True)
     date = db.Column(db.Date, nullable=False, unique=True, index=True)
-    
-    # Projeções IPCA (%)
-    ipca_2025 = db.Column(db.Float, nullable=True)
-    ipca_2026 = db.Column(db.Float, nullable=True)
-    ipca_2027 = db.Column(db.Float, nullable=True)
-    ipca_2028 = db.Column(db.Float, nullable=True)
-    
-    # Projeções Selic (% a.a.)
-    selic_2025 = db.Column(db.Float, nullable=True)
-    selic_2026 = db.Column(db.Float, nullable=True)
-    selic_2027 = db.Column(db.Float, nullable=True)
-    selic_2028 = db.Column(db.Float, nullable=True)
-    
-    # Projeções PIB (var. %)
-    pib_2025 = db.Column(db.Float, nullable=True)
-    pib_2026 = db.Column(db.Float, nullable=True)
-    pib_2027 = db.Column(db.Float, nullable=True)
-    pib_2028 = db.Column(db.Float, nullable=True)
-    
-    # Projeções Câmbio (R$/US$)
-    cambio_2025 = db.Column(db.Float, nullable=True)
-    cambio_2026 = db.Column(db.Float, nullable=True)
-    cambio_2027 = db.Column(db.Float, nullable=True)
-    cambio_2028 = db.Column(db.Float, nullable=True)
+    # Snapshot gravado na data da coleta, não em uma data de pesquisa do Focus:
+    # fica fora dos agregados do histórico
+    is_collection = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    projecoes_registradas = db.relationship(
+        'FocusProjection',
+        backref='snapshot',
+        lazy=True,
+        cascade='all, delete-orphan'
+    )
+    
     def __repr__(self):
         return f'<FocusData {self.date}>'
     
+    @property
+    def projecoes(self):
+        """
+        Projeções do snapshot: {indicador: {ano: {'median', 'mean', 'stdev', 'respondents'}}}.
+        """
+        tabela = self.__dict__.get('_projecoes')
+        if tabela is None:
+            tabela = {}
+            for registro in self.projecoes_registradas:
+                tabela.setdefault(registro.indicator, {})[registro.reference_year] = registro.estatisticas()
+        return tabela
+    
+    def projecao(self, indicador, ano, campo='median'):
+        """Valor projetado (mediana, por padrão) de um indicador para o ano, ou None."""
+        return self.projecoes.get(indicador, {}).get(int(ano), {}).get(campo)
+    
+    def anos(self):
+        """Anos de referência presentes no snapshot, em ordem crescente."""
+        return sorted({ano for anos in self.projecoes.values() for ano in anos})
+    
+    def medianas(self, indicador):
+        """{ano: mediana} de um indicador, em ordem de ano."""
+        return {ano: valores.get('median') for ano, valores in sorted(self.projecoes.get(indicador, {}).items())}
+    
+    @classmethod
+    def registrar(cls, data, dados, coleta=False):
+        """
+        Cria o snapshot da data com as projeções recebidas (não faz commit).
+        
+        Args:
+            data (date): data do snapshot.
+            dados (dict): {indicador: {ano: valor}}, onde valor é a mediana ou
+                um dict com median/mean/stdev/respondents.
+            coleta (bool): a data é a da coleta, não a de uma pesquisa do Focus.
+        """
+        snapshot = cls(date=data, is_collection=coleta)
+        for indicador, anos in dados.items():
+            for ano, valor in (anos or {}).items():
+                estatisticas = valor if isinstance(valor, dict) else {'median': valor}
+                if estatisticas.get('median') is None:
+                    continue
+                snapshot.projecoes_registradas.append(FocusProjection(
+                    snapshot_date=data,
+                    indicator=indicador,
+                    reference_year=int(ano),
+                    median=estatisticas.get('median'),
+                    mean=estatisticas.get('mean'),
+                    stdev=estatisticas.get('stdev'),
+                    respondents=estatisticas.get('respondents')
+                ))
+        db.session.add(snapshot)
+        return snapshot
+    
     @classmethod
     def get_latest(cls):
-        """Retorna os dados mais recentes do Focus"""
-        return cls.query.order_by(cls.date.desc()).first()
+        """
+        Retorna os dados mais recentes do Focus.
+        
+        O snapshot fica em cache (backend CACHE_BACKEND) por FOCUS_CACHE_TTL
+        segundos; o objeto retornado é uma cópia desvinculada da sessão
+        (somente leitura).
+        """
+        dados = _focus_cache.get_or_set(
+            'latest',
+            cls._consultar_latest,
+            ttl=current_app.config.get('FOCUS_CACHE_TTL')
+        )
+        if not dados:
+            return None
+        dados = dict(dados)
+        projecoes = dados.pop('projecoes')
+        focus = cls(**dados)
+        focus.__dict__['_projecoes'] = projecoes
+        return focus
+    
+    @classmethod
+    def _consultar_latest(cls):
+        focus = cls.query.order_by(cls.date.desc()).first()
+        if focus is None:
+            return None
+        dados = {coluna.name: getattr(focus, coluna.name) for coluna in cls.__table__.columns}
+        dados['projecoes'] = focus.projecoes
+        return dados
+    
+    @classmethod
+    def invalidate_cache(cls):
+        """Descarta o snapshot em cache (chamar após gravar novos dados)"""
+        _focus_cache.invalidate()
+    
+    @classmethod
+    def cache_stats(cls):
+        """Contadores de acerto/falta do cache do snapshot mais recente"""
+        return _focus_cache.stats()
+
+
+class FocusProjection(db.Model):
+    """
+    Projeção de um indicador do Focus para um ano de referência, em um snapshot.
+    
+    O índice (indicator, reference_year, snapshot_date) atende consultas como
+    "expectativas de IPCA para o ano X em todos os snapshots" com uma única
+    varredura por faixa; a restrição única cobre a leitura de um snapshot.
+    """
+    __tablename__ = 'focus_projections'
+    __table_args__ = (
+        db.UniqueConstraint('snapshot_date', 'indicator', 'reference_year', name='uq_focus_projections_snapshot'),
+        db.Index('ix_focus_projections_indicator_year', 'indicator', 'reference_year', 'snapshot_date'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    snapshot_date = db.Column(
+        db.Date,
+        db.ForeignKey('focus_data.date', ondelete='CASCADE'),
+        nullable=False
+    )
+    indicator = db.Column(db.String(20), nullable=False)  # ipca, selic, pib, cambio
+    reference_year = db.Column(db.Integer, nullable=False)
+    median = db.Column(db.Float, nullable=True)
+    mean = db.Column(db.Float, nullable=True)
+    stdev = db.Column(db.Float, nullable=True)
+    respondents = db.Column(db.Integer, nullable=True)
+    
+    def __repr__(self):
+        return f'<FocusProjection {self.snapshot_date} {self.indicator} {self.reference_year}>'
+    
+    def estatisticas(self):
+        return {
+            'median': self.median,
+            'mean': self.mean,
+            'stdev': self.stdev,
+            'respondents': self.respondents
+        }
+    
+    @classmethod
+    def serie(cls, indicador, ano):
+        """Projeções de um indicador para o ano em todos os snapshots, da mais antiga à mais recente."""
+        return (
+            cls.query
+            .filter_by(indicator=indicador, reference_year=int(ano))
+            .order_by(cls.snapshot_date)
+            .all()
+        )
+
+
+class FocusAggregate(db.Model):
+    """
+    Agregado pré-calculado do histórico de uma projeção do Focus por período
+    (semana ou mês): última mediana, média, mínimo e máximo das medianas.
+    Recalculado por app.focus_historico sempre que o histórico é importado.
+    """
+    __tablename__ = 'focus_aggregates'
+    __table_args__ = (
+        db.UniqueConstraint(
+            'indicator', 'reference_year', 'granularity', 'period_start',
+            name='uq_focus_aggregates_periodo'
+        ),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    indicator = db.Column(db.String(20), nullable=False)
+    reference_year = db.Column(db.Integer, nullable=False)
+    granularity = db.Column(db.String(10), nullable=False)  # semana, mes
+    period_start = db.Column(db.Date, nullable=False)
+    median_last = db.Column(db.Float, nullable=True)
+    median_mean = db.Column(db.Float, nullable=True)
+    median_min = db.Column(db.Float, nullable=True)
+    median_max = db.Column(db.Float, nullable=True)
+    samples = db.Column(db.Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f'<FocusAggregate {self.indicator} {self.reference_year} {self.granularity} {self.period_start}>'
 
 
 class InvestmentComparison(db.Model):
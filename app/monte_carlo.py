@@ -0,0 +1,326 @@
+"""
+Simulação de Monte Carlo das taxas para o simulador padrão
+
+Em vez de uma única trajetória de Selic e IPCA, sorteia milhares de
+trajetórias anuais correlacionadas em torno das medianas do Focus. O desvio
+de cada ano vem do desvio-padrão das projeções do Focus (ou dos parâmetros,
+quando ausente); a correlação entre Selic e IPCA e a persistência dos choques
+de um ano para o seguinte são parâmetros.
+
+Todos os produtos de `simular_investimentos_padrao` são avaliados em todas as
+trajetórias como arrays (trajetórias × produtos × meses), com as mesmas regras
+do simulador (custódia, IR pelo prazo). As trajetórias são processadas em
+blocos de tamanho limitado pela memória; como os sorteios saem em sequência do
+mesmo gerador, o resultado para uma semente não depende do tamanho do bloco.
+"""
+import math
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+from app.backtest import POUPANCA_LIMITE_SELIC
+from app.calculations import (
+    INVESTIMENTOS_ISENTOS,
+    INVESTIMENTOS_TESOURO,
+    IPCA_PADRAO,
+    SELIC_PADRAO,
+    _produtos_padrao,
+    amostrar_meses,
+    get_ir_rates,
+    spread_cdi
+)
+
+PERCENTIS_PADRAO = (5, 25, 50, 75, 95)
+PONTOS_PADRAO = 60
+
+# Usados quando o Focus não traz o desvio-padrão do ano (p.p.)
+DESVIO_SELIC_PADRAO = 1.5
+DESVIO_IPCA_PADRAO = 1.0
+CORRELACAO_PADRAO = 0.5
+PERSISTENCIA_PADRAO = 0.7
+
+# Memória de trabalho por bloco (arrays trajetórias × produtos × meses)
+BYTES_POR_BLOCO = 64 * 1024 * 1024
+_ARRAYS_POR_BLOCO = 4
+
+NOME_CORRECAO_IPCA = 'Correção pelo IPCA'
+
+
+@dataclass(frozen=True)
+class CenarioTaxas:
+    """Medianas e desvios (% a.a.) de Selic e IPCA para cada ano da simulação."""
+    anos: tuple
+    selic: np.ndarray
+    ipca: np.ndarray
+    desvio_selic: np.ndarray
+    desvio_ipca: np.ndarray
+    fonte: str
+
+    def como_dict(self):
+        return {
+            'anos': list(self.anos),
+            'selic': np.round(self.selic, 4).tolist(),
+            'ipca': np.round(self.ipca, 4).tolist(),
+            'desvio_selic': np.round(self.desvio_selic, 4).tolist(),
+            'desvio_ipca': np.round(self.desvio_ipca, 4).tolist(),
+            'fonte': self.fonte
+        }
+
+
+def _parametro(parametros, nome, padrao):
+    """Valor informado em `parametros` (zero inclusive) ou o padrão."""
+    valor = parametros.get(nome)
+    return padrao if valor is None else valor
+
+
+def cenario_taxas(meses, parametros=None, focus=None, ano_inicial=None):
+    """
+    Monta o CenarioTaxas de `meses` meses. O ano k da simulação usa a projeção
+    do Focus para ano_inicial + k (ou a do último ano projetado); sem Focus,
+    valem as taxas de `parametros` (selic, ipca) e os desvios padrão ou
+    informados (desvio_selic, desvio_ipca).
+    """
+    parametros = parametros or {}
+    ano_inicial = ano_inicial or datetime.now().year
+    anos = tuple(range(ano_inicial, ano_inicial + math.ceil(int(meses) / 12)))
+
+    selic_base = _parametro(parametros, 'selic', SELIC_PADRAO)
+    ipca_base = _parametro(parametros, 'ipca', IPCA_PADRAO)
+    desvios = {
+        'selic': _parametro(parametros, 'desvio_selic', DESVIO_SELIC_PADRAO),
+        'ipca': _parametro(parametros, 'desvio_ipca', DESVIO_IPCA_PADRAO)
+    }
+
+    projetados = focus.anos() if focus is not None else []
+
+    def curva(indicador, campo, padrao):
+        # Anos sem projeção repetem o último ano projetado antes deles
+        valores = []
+        for ano in anos:
+            valor = None
+            if projetados:
+                valor = focus.projecao(indicador, min(max(ano, projetados[0]), projetados[-1]), campo)
+            if valor is None:
+                valor = valores[-1] if valores else padrao
+            valores.append(valor)
+        return np.array(valores, dtype=float)
+
+    selic = curva('selic', 'median', selic_base)
+    ipca = curva('ipca', 'median', ipca_base)
+    usou_focus = any(focus.projecao(indicador, ano) is not None for indicador in ('selic', 'ipca') for ano in projetados)
+    return CenarioTaxas(
+        anos=anos,
+        selic=selic,
+        ipca=ipca,
+        desvio_selic=curva('selic', 'stdev', desvios['selic']),
+        desvio_ipca=curva('ipca', 'stdev', desvios['ipca']),
+        fonte='focus' if usou_focus else 'parametros'
+    )
+
+
+def sortear_trajetorias(rng, quantidade, cenario, correlacao=CORRELACAO_PADRAO, persistencia=PERSISTENCIA_PADRAO):
+    """
+    Trajetórias anuais (quantidade × anos) de Selic e IPCA em % a.a.
+
+    Os choques padronizados seguem um AR(1) com variância estacionária 1
+    (persistência entre anos) e correlação `correlacao` entre os indicadores;
+    cada ano é a mediana mais desvio × choque. A Selic não fica negativa.
+    """
+    anos = len(cenario.anos)
+    ruido = rng.standard_normal((quantidade, anos, 2))
+    choque_selic = ruido[..., 0]
+    choque_ipca = correlacao * ruido[..., 0] + math.sqrt(1 - correlacao ** 2) * ruido[..., 1]
+
+    inovacao = math.sqrt(1 - persistencia ** 2)
+    for ano in range(1, anos):
+        choque_selic[:, ano] = persistencia * choque_selic[:, ano - 1] + inovacao * choque_selic[:, ano]
+        choque_ipca[:, ano] = persistencia * choque_ipca[:, ano - 1] + inovacao * choque_ipca[:, ano]
+
+    selic = np.maximum(cenario.selic + cenario.desvio_selic * choque_selic, 0.0)
+    ipca = cenario.ipca + cenario.desvio_ipca * choque_ipca
+    return selic, ipca
+
+
+def _definicoes(parametros):
+    """Produtos do simulador padrão mais a correção pelo IPCA."""
+    definicoes = [
+        {
+            'nome': produto['nome'],
+            'tipo': produto['investimento_type'],
+            'rentabilidade_type': produto['rentabilidade_type'],
+            'valor': float(produto['rentabilidade_value']),
+            'custos_extra': produto.get('taxa_custos_extra', 0.0),
+            'tributavel': produto['investimento_type'] not in INVESTIMENTOS_ISENTOS and produto.get('incluir_ir', True)
+        }
+        for produto in _produtos_padrao(parametros)
+    ]
+    definicoes.append({
+        'nome': NOME_CORRECAO_IPCA,
+        'tipo': 'correcao_ipca',
+        'rentabilidade_type': 'ipca',
+        'valor': 0.0,
+        'custos_extra': 0.0,
+        'tributavel': False
+    })
+    return definicoes
+
+
+def _taxas_anuais(definicoes, parametros, cenario, selic, ipca):
+    """
+    Taxa anual (decimal) de cada produto em cada trajetória e ano
+    (trajetórias × produtos × anos), já sem a taxa de administração.
+    """
+    # O CDI acompanha cada trajetória da Selic com a diferença Selic - CDI dos
+    # parâmetros (a mesma convenção do simulador padrão)
+    cdi = np.maximum(selic - spread_cdi(parametros), 0.0)
+    poupanca_fixa = (1 + parametros.get('poupanca_mensal', 0.5) / 100) ** 12 - 1
+
+    taxas = []
+    for definicao in definicoes:
+        tipo = definicao['tipo']
+        if tipo == 'tesouro_selic':
+            taxa = selic / 100
+        elif tipo == 'tesouro_prefixado':
+            # Contratado hoje, igual em todas as trajetórias; sem taxa nem
+            # Selic nos parâmetros, usa a mediana da Selic do primeiro ano
+            nominal = _parametro(parametros, 'tesouro_prefixado_nominal', parametros.get('selic'))
+            if nominal is None:
+                nominal = cenario.selic[0]
+            taxa = np.full_like(selic, nominal / 100)
+        elif tipo == 'poupanca':
+            taxa = np.where(selic <= POUPANCA_LIMITE_SELIC, 0.7 * selic / 100, poupanca_fixa)
+        elif tipo == 'correcao_ipca':
+            taxa = ipca / 100
+        elif definicao['rentabilidade_type'] == 'cdi':
+            taxa = cdi / 100 * definicao['valor'] / 100
+        elif definicao['rentabilidade_type'] == 'ipca_mais':
+            taxa = (1 + ipca / 100) * (1 + definicao['valor'] / 100) - 1
+        else:
+            taxa = np.full_like(selic, definicao['valor'] / 100)
+        taxas.append(taxa - definicao['custos_extra'])
+    return np.stack(taxas, axis=1)
+
+
+def _avaliar_bloco(taxas_anuais, grade, valor_inicial, aportes_mensais, custodia, tributado):
+    """
+    Valor líquido nos meses da grade (trajetórias × produtos × pontos) a partir
+    das taxas anuais. O fator acumulado e a soma dos aportes saem de somas
+    acumuladas do log mensal, como no backtest.
+    """
+    meses = int(grade[-1])
+    ano_do_mes = np.arange(meses) // 12
+    log_mensal = np.log1p(taxas_anuais)[..., ano_do_mes] / 12
+    acumulado = np.cumsum(log_mensal, axis=-1)
+    inversos = np.cumsum(np.exp(-acumulado), axis=-1)[..., grade - 1]
+    fator = np.exp(acumulado[..., grade - 1])
+    del log_mensal, acumulado
+
+    valor_bruto = fator * (valor_inicial + aportes_mensais * inversos)
+    custos = valor_bruto * custodia[:, None] * (grade / 12)
+    total_investido = valor_inicial + aportes_mensais * grade
+    ganho_bruto = valor_bruto - total_investido
+    valor_ir = np.where(tributado[:, None] & (ganho_bruto > 0), ganho_bruto * get_ir_rates(grade * 30), 0.0)
+    return valor_bruto - custos - valor_ir, fator
+
+
+def trajetorias_por_bloco(produtos, meses, bytes_por_bloco=BYTES_POR_BLOCO):
+    """Trajetórias por bloco para que os arrays de trabalho caibam em `bytes_por_bloco`."""
+    return max(1, int(bytes_por_bloco // (produtos * int(meses) * 8 * _ARRAYS_POR_BLOCO)))
+
+
+def simular_monte_carlo(
+    valor_inicial,
+    aportes_mensais,
+    meses,
+    parametros=None,
+    incluir_ir=True,
+    trajetorias=10000,
+    semente=None,
+    correlacao=CORRELACAO_PADRAO,
+    persistencia=PERSISTENCIA_PADRAO,
+    percentis=PERCENTIS_PADRAO,
+    pontos=PONTOS_PADRAO,
+    focus=None,
+    bytes_por_bloco=BYTES_POR_BLOCO
+):
+    """
+    Simula os produtos do simulador padrão em `trajetorias` trajetórias
+    sorteadas de Selic e IPCA.
+
+    Args:
+        parametros (dict): os do simulador padrão; selic/ipca e
+            desvio_selic/desvio_ipca só são usados sem projeção do Focus.
+        semente (int): semente do gerador; a mesma semente reproduz o resultado.
+        pontos (int): meses amostrados nas bandas (None = todos).
+        focus (FocusData): snapshot usado como centro e dispersão.
+
+    Returns:
+        dict: cenário de taxas, grade de meses e, por produto, as bandas de
+        percentis do valor líquido ao longo do prazo, os percentis do valor
+        líquido e do valor real no fim e a probabilidade de superar a inflação.
+    """
+    parametros = parametros or {}
+    meses = int(meses)
+    if meses < 1:
+        raise ValueError('Prazo deve ser maior que zero')
+    if trajetorias < 1:
+        raise ValueError('Informe ao menos uma trajetória')
+    if not -1 <= correlacao <= 1 or not 0 <= persistencia < 1:
+        raise ValueError('Correlação deve estar entre -1 e 1 e persistência entre 0 e 1')
+
+    cenario = cenario_taxas(meses, parametros, focus)
+    definicoes = _definicoes(parametros)
+    custodia = np.array([
+        parametros.get('taxa_custodia', 0.2) / 100 if definicao['tipo'] in INVESTIMENTOS_TESOURO else 0.0
+        for definicao in definicoes
+    ])
+    tributado = np.array([bool(incluir_ir) and definicao['tributavel'] for definicao in definicoes])
+    grade = amostrar_meses(meses, pontos)
+    total_investido = float(valor_inicial) + max(float(aportes_mensais), 0.0) * meses
+    correcao_ipca = len(definicoes) - 1
+
+    # Só o valor líquido nos pontos da grade é guardado entre os blocos
+    liquido = np.empty((trajetorias, len(definicoes), len(grade)), dtype=np.float32)
+    real = np.empty((trajetorias, len(definicoes)))
+    rng = np.random.default_rng(semente)
+    tamanho_bloco = trajetorias_por_bloco(len(definicoes), meses, bytes_por_bloco)
+    for inicio in range(0, trajetorias, tamanho_bloco):
+        fim = min(inicio + tamanho_bloco, trajetorias)
+        selic, ipca = sortear_trajetorias(rng, fim - inicio, cenario, correlacao, persistencia)
+        valores, fator = _avaliar_bloco(
+            _taxas_anuais(definicoes, parametros, cenario, selic, ipca),
+            grade, float(valor_inicial), max(float(aportes_mensais), 0.0), custodia, tributado
+        )
+        liquido[inicio:fim] = valores
+        deflator = fator[:, correcao_ipca, -1]
+        real[inicio:fim] = valores[..., -1] / deflator[:, None]
+        real[inicio:fim, correcao_ipca] = valores[:, correcao_ipca, -1]
+
+    percentis = [float(p) for p in percentis]
+    chaves = [f'p{p:g}' for p in percentis]
+    bandas = np.percentile(liquido, percentis, axis=0)
+    finais = liquido[..., -1].astype(float)
+    finais_percentis = np.percentile(finais, percentis, axis=0)
+    real_percentis = np.percentile(real, percentis, axis=0)
+    acima_inflacao = (finais > finais[:, [correcao_ipca]]).mean(axis=0) * 100
+
+    return {
+        'trajetorias': int(trajetorias),
+        'semente': semente,
+        'taxas': cenario.como_dict(),
+        'percentis': percentis,
+        'meses': grade.tolist(),
+        'total_investido': round(total_investido, 2),
+        'resultados': [
+            {
+                'nome': definicao['nome'],
+                'bandas': {chave: np.round(bandas[k, indice], 2).tolist() for k, chave in enumerate(chaves)},
+                'valor_liquido': {chave: round(float(finais_percentis[k, indice]), 2) for k, chave in enumerate(chaves)},
+                'valor_real': {chave: round(float(real_percentis[k, indice]), 2) for k, chave in enumerate(chaves)},
+                'valor_liquido_medio': round(float(finais[:, indice].mean()), 2),
+                'prob_supera_inflacao': round(float(acima_inflacao[indice]), 2)
+            }
+            for indice, definicao in enumerate(definicoes)
+        ]
+    }
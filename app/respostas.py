@@ -0,0 +1,98 @@
+"""
+Cabeçalhos de cache (ETag / GET condicional) e compressão das respostas JSON
+"""
+import gzip
+
+from flask import current_app, jsonify, request
+
+from app.cache import chave_conteudo
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só gzip é oferecido
+    brotli = None
+
+# Incluída nas ETags dos cálculos: altere quando a fórmula mudar, para que
+# resultados guardados por navegadores e proxies deixem de ser aceitos.
+VERSAO_CALCULO = '2'
+
+_CODIFICACOES = ('br', 'gzip')
+
+
+def gerar_etag(*partes):
+    """ETag forte a partir de valores serializáveis em JSON (ordem das chaves irrelevante)."""
+    return chave_conteudo(*partes)
+
+
+def _etag_do_cliente(etag):
+    """
+    Variante da ETag (sem compressão ou com sufixo da codificação) que o
+    cliente já tem, segundo o `If-None-Match`; None se nenhuma.
+    """
+    variantes = [etag] + [f'{etag}-{codificacao}' for codificacao in _CODIFICACOES]
+    return next((variante for variante in variantes if variante in request.if_none_match), None)
+
+
+def resposta_condicional(etag, gerar_payload, cache_control='private, no-cache'):
+    """
+    Responde 304 se o `If-None-Match` do cliente já contém a ETag; caso
+    contrário chama `gerar_payload()` e devolve o JSON com a ETag.
+    O payload só é calculado e serializado quando realmente precisa ser enviado.
+    """
+    etag_cliente = _etag_do_cliente(etag)
+    if etag_cliente:
+        resposta = current_app.response_class(status=304)
+        resposta.set_etag(etag_cliente)
+    else:
+        resposta = jsonify(gerar_payload())
+        resposta.set_etag(etag)
+    resposta.headers['Cache-Control'] = cache_control
+    return resposta
+
+
+def _escolher_codificacao():
+    aceitas = request.accept_encodings
+    if brotli is not None and aceitas['br']:
+        return 'br'
+    if aceitas['gzip']:
+        return 'gzip'
+    return None
+
+
+def comprimir_resposta(resposta):
+    """
+    Hook `after_request`: comprime respostas JSON acima de COMPRESSAO_MIN_BYTES
+    com brotli ou gzip, conforme o `Accept-Encoding` do cliente.
+    A ETag recebe o sufixo da codificação, pois o corpo enviado é outro.
+    """
+    resposta.vary.add('Accept-Encoding')
+
+    if (
+        resposta.status_code != 200
+        or resposta.mimetype != 'application/json'
+        or resposta.direct_passthrough
+        or resposta.is_streamed
+        or 'Content-Encoding' in resposta.headers
+    ):
+        return resposta
+
+    corpo = resposta.get_data()
+    if len(corpo) < current_app.config.get('COMPRESSAO_MIN_BYTES', 1024):
+        return resposta
+
+    codificacao = _escolher_codificacao()
+    if codificacao is None:
+        return resposta
+
+    if codificacao == 'br':
+        comprimido = brotli.compress(corpo, quality=current_app.config.get('COMPRESSAO_NIVEL_BROTLI', 5))
+    else:
+        comprimido = gzip.compress(corpo, compresslevel=current_app.config.get('COMPRESSAO_NIVEL_GZIP', 6))
+
+    resposta.set_data(comprimido)
+    resposta.headers['Content-Encoding'] = codificacao
+
+    etag, fraca = resposta.get_etag()
+    if etag:
+        resposta.set_etag(f'{etag}-{codificacao}', weak=fraca)
+    return resposta
@@ -1,16 +1,34 @@
 import json
+import math
 import os
-from pathlib import Path
+import secrets
 
 from datetime import datetime
-from flask import Blueprint, render_template, request, jsonify, flash, url_for, current_app, session, redirect, Response
+from flask import Blueprint, render_template, request, jsonify, flash, url_for, current_app, session, redirect, Response, stream_with_context
 from flask_login import login_required, current_user
 from app import db
 from app.models import FocusData
+from app.taxas import obter_taxas
+from app.focus_boletins import boletim_mais_recente, listar_boletins
+from app.focus_historico import GRANULARIDADES, consultar_historico
+from app.backtest import PERCENTIS_PADRAO, SERIES_BACKTEST, backtest, distribuicao_janelas, obter_historico, validar_janelas
+from app.curva_taxas import curva_focus
+from app.equivalencia import inflacao_equilibrio, prazos_equilibrio, taxa_equivalente, validar_produto
+from app.liberdade import VOLATILIDADE_PADRAO, planejar, planejar_lote, simular_liberdade, validar_cenario
+from app.monte_carlo import CORRELACAO_PADRAO, PERSISTENCIA_PADRAO, PONTOS_PADRAO as PONTOS_MONTE_CARLO, simular_monte_carlo
+from app.sensibilidade import CAMPOS_CENARIO, grade_sensibilidade, valores_eixo
+from app.sgs_historico import PASTA_PADRAO as PASTA_SGS, versao_series
+from app.respostas import VERSAO_CALCULO, gerar_etag, resposta_condicional
 from app.calculations import (
+    FORMATOS_EVOLUCAO,
+    amostrar_meses,
+    cache_resultados,
     calcular_investimento_completo,
+    calcular_pontos_mensais,
     get_focus_projection,
-    simular_investimentos_padrao
+    resolver_contexto_mercado,
+    simular_investimentos_padrao,
+    simular_lote
 )
 
 main_bp = Blueprint('main', __name__)
@@ -36,50 +54,24 @@ def _require_disclaimer_acceptance():
         return
     return redirect(url_for('main.disclaimer'))
 
-def _get_latest_focus_pdf():
-    """Retorna a URL do PDF mais recente do Boletim Focus armazenado em static/focus"""
-    focus_dir = os.path.join(current_app.static_folder, 'focus')
-    
-    if not os.path.isdir(focus_dir):
-        return None
-    
-    pdf_files = [
-        f for f in os.listdir(focus_dir)
-        if os.path.isfile(os.path.join(focus_dir, f)) and f.lower().endswith('.pdf')
-    ]
-    
-    if not pdf_files:
-        return None
-    
-    latest_pdf = max(
-        pdf_files,
-        key=lambda f: os.path.getmtime(os.path.join(focus_dir, f))
-    )
-    
-    return url_for('static', filename=f'focus/{latest_pdf}')
+def _pasta_focus():
+    return os.path.join(current_app.static_folder, 'focus')
 
-def _load_latest_rates():
-    """Carrega o arquivo JSON com as taxas mais recentes, se existir."""
-    base_path = Path(current_app.root_path).parent
-    rates_path = base_path / "data" / "taxas.json"
-    
-    if not rates_path.exists():
-        return {}
-    
-    try:
-        with rates_path.open("r", encoding="utf-8") as fp:
-            return json.load(fp)
-    except Exception:
-        return {}
+def _pasta_sgs():
+    return current_app.config.get('SGS_HISTORICO_PATH') or PASTA_SGS
 
-def _rate_value(rates, key, default, ndigits=2):
-    value = rates.get(key)
-    if value is None:
-        return default
-    try:
-        return round(float(value), ndigits)
-    except Exception:
-        return default
+def _etag_focus(focus_data):
+    """ETag dos dados do Focus: muda só quando a linha é recriada ou atualizada."""
+    if not focus_data:
+        return gerar_etag('focus', None)
+    return gerar_etag('focus', focus_data.date, focus_data.updated_at)
+
+def _get_latest_focus_pdf():
+    """Retorna a URL do PDF mais recente do Boletim Focus (via manifesto em memória)"""
+    boletim = boletim_mais_recente(_pasta_focus())
+    if not boletim:
+        return None
+    return url_for('static', filename=f"focus/{boletim['arquivo']}")
 
 @main_bp.route('/')
 @login_required
@@ -114,56 +106,14 @@ def liberdade():
 def simulador_renda_fixa():
     """Página da calculadora rápida de renda fixa."""
     focus_data = FocusData.get_latest()
-    rates = _load_latest_rates()
-
-    selic = _rate_value(rates, 'selic_meta', 10.0)
-    cdi = _rate_value(rates, 'cdi_over', selic)
-    ipca = _rate_value(rates, 'ipca_12m', 4.0)
-    tr = _rate_value(rates, 'tr_mensal', 0.17, ndigits=4)
-    poupanca_mensal = _rate_value(rates, 'poupanca_mensal', 0.6731, ndigits=4)
-
-    # Percentuais relativos ao CDI
-    rentabilidade_cdb = 100.0
-    rentabilidade_fundo_di = 98.0
-    rentabilidade_lci_lca = 85.0
-
-    if rates.get('fundo_di_liquido') and rates.get('cdi_over'):
-        rentabilidade_fundo_di = round(
-            (float(rates['fundo_di_liquido']) / float(rates['cdi_over'])) * 100,
-            2
-        )
-    if rates.get('lci_lca_85_cdi') and rates.get('cdi_over'):
-        rentabilidade_lci_lca = round(
-            (float(rates['lci_lca_85_cdi']) / float(rates['cdi_over'])) * 100,
-            2
-        )
+    default_params = dict(obter_taxas().parametros_padrao)
     
-    tesouro_prefixado = rates.get('tesouro_prefixado_nominal')
-    if tesouro_prefixado is None and focus_data and focus_data.selic_2025:
-        tesouro_prefixado = round(focus_data.selic_2025, 2)
-    tesouro_prefixado = _rate_value(
-        {'tmp': tesouro_prefixado} if tesouro_prefixado is not None else {},
-        'tmp',
-        10.0
-    )
-
-    tesouro_ipca = _rate_value(rates, 'tesouro_ipca_mais', 6.5)
-    taxa_admin_fundo_di = _rate_value(rates, 'taxa_admin_fundo_di', 0.25)
-    
-    default_params = {
-        'selic': selic,
-        'cdi': cdi,
-        'ipca': ipca,
-        'tr': tr,
-        'taxa_custodia': 0.20,
-        'tesouro_prefixado_nominal': tesouro_prefixado,
-        'tesouro_ipca_mais': tesouro_ipca,
-        'taxa_admin_fundo_di': taxa_admin_fundo_di,
-        'rentabilidade_cdb': rentabilidade_cdb,
-        'rentabilidade_fundo_di': rentabilidade_fundo_di,
-        'rentabilidade_lci_lca': rentabilidade_lci_lca,
-        'poupanca_mensal': poupanca_mensal
-    }
+    if default_params['tesouro_prefixado_nominal'] is None:
+        tesouro_prefixado = 10.0
+        selic_ano = focus_data.projecao('selic', datetime.now().year) if focus_data else None
+        if selic_ano:
+            tesouro_prefixado = round(selic_ano, 2)
+        default_params['tesouro_prefixado_nominal'] = tesouro_prefixado
     
     return render_template(
         'simulador_renda_fixa.html',
@@ -269,6 +219,17 @@ def admin_export_users():
         headers={'Content-Disposition': 'attachment; filename=usuarios.csv'}
     )
 
+@main_bp.route('/api/cache/status')
+@login_required
+def api_cache_status():
+    """Contadores dos caches em memória (somente admin)"""
+    if not _is_admin_user():
+        return jsonify({'error': 'Acesso restrito'}), 403
+    return jsonify({
+        'focus': FocusData.cache_stats(),
+        'simulacao': cache_resultados.stats()
+    })
+
 @main_bp.route('/api/calculate', methods=['POST'])
 @login_required
 def api_calculate():
@@ -293,6 +254,8 @@ def api_calculate():
         meses = int(data['meses'])
         incluir_ir = data.get('incluir_ir', True)
         ajustar_inflacao = data.get('ajustar_inflacao', True)
+        # Selic e IPCA de cada ano projetado pelo Focus em vez de uma taxa única
+        usar_curva = bool(data.get('curva_focus', False))
         # REMOVE ESTAS LINHAS:
         # tax_regime = data.get('tax_regime', '2025')
         # if tax_regime not in ['2025', '2026']:
@@ -309,38 +272,313 @@ def api_calculate():
         if rentabilidade_value < 0:
             return jsonify({'error': 'Rentabilidade não pode ser negativa'}), 400
         
-        # Calcula investimento
-        resultado = calcular_investimento_completo(
-            investimento_type=investimento_type,
-            rentabilidade_type=rentabilidade_type,
-            rentabilidade_value=rentabilidade_value,
-            valor_inicial=valor_inicial,
-            aportes_mensais=aportes_mensais,
-            meses=meses,
-            incluir_ir=incluir_ir,
-            ajustar_inflacao_flag=ajustar_inflacao,
-            tax_regime=tax_regime
-        )
+        focus = FocusData.get_latest()
         
-        # Formata valores para exibição
-        resultado_formatado = {
-            'total_investido': round(resultado['total_investido'], 2),
-            'valor_bruto': round(resultado['valor_bruto'], 2),
-            'rentabilidade_bruta': round(resultado['rentabilidade_bruta'], 2),
-            'custos': round(resultado['custos'], 2),
-            'valor_ir': round(resultado['valor_ir'], 2),
-            'valor_liquido': round(resultado['valor_liquido'], 2),
-            'rentabilidade_liquida': round(resultado['rentabilidade_liquida'], 2),
-            'ganho_liquido': round(resultado['ganho_liquido'], 2),
-            'valor_real': round(resultado['valor_real'], 2),
-            'ganho_real': round(resultado['ganho_real'], 2)
-        }
+        def calcular():
+            resultado = calcular_investimento_completo(
+                investimento_type=investimento_type,
+                rentabilidade_type=rentabilidade_type,
+                rentabilidade_value=rentabilidade_value,
+                valor_inicial=valor_inicial,
+                aportes_mensais=aportes_mensais,
+                meses=meses,
+                incluir_ir=incluir_ir,
+                ajustar_inflacao_flag=ajustar_inflacao,
+                tax_regime=tax_regime,
+                curva=curva_focus(focus) if usar_curva else None
+            )
+            
+            # Formata valores para exibição
+            return {
+                'total_investido': round(resultado['total_investido'], 2),
+                'valor_bruto': round(resultado['valor_bruto'], 2),
+                'rentabilidade_bruta': round(resultado['rentabilidade_bruta'], 2),
+                'custos': round(resultado['custos'], 2),
+                'valor_ir': round(resultado['valor_ir'], 2),
+                'valor_liquido': round(resultado['valor_liquido'], 2),
+                'rentabilidade_liquida': round(resultado['rentabilidade_liquida'], 2),
+                'ganho_liquido': round(resultado['ganho_liquido'], 2),
+                'valor_real': round(resultado['valor_real'], 2),
+                'ganho_real': round(resultado['ganho_real'], 2)
+            }
         
-        return jsonify(resultado_formatado)
+        # Selic e IPCA vêm do Focus: a ETag inclui a versão dos dados em uso
+        etag = gerar_etag(
+            VERSAO_CALCULO, 'calculate',
+            [investimento_type, rentabilidade_type, rentabilidade_value, valor_inicial,
+             aportes_mensais, meses, incluir_ir, ajustar_inflacao, tax_regime, usar_curva],
+            _etag_focus(focus)
+        )
+        return resposta_condicional(etag, calcular)
     
     except Exception as e:
         return jsonify({'error': f'Erro ao calcular: {str(e)}'}), 500
 
+@main_bp.route('/api/evolucao', methods=['POST'])
+@login_required
+def api_evolucao():
+    """
+    API para avaliar um investimento em meses específicos.
+
+    Aceita `meses_consulta` (lista de meses) ou `pontos` (o servidor escolhe
+    uma grade uniforme até `meses`). Cada mês é calculado pela fórmula
+    fechada, sem percorrer os meses intermediários.
+    """
+    try:
+        data = request.get_json()
+
+        required_fields = ['investimento_type', 'rentabilidade_type', 'rentabilidade_value',
+                          'valor_inicial']
+        for field in required_fields:
+            if field not in data:
+                return jsonify({'error': f'Campo obrigatório faltando: {field}'}), 400
+
+        limite = current_app.config.get('EVOLUCAO_PONTOS_MAX', 1200)
+        if data.get('meses_consulta') is not None:
+            meses_consulta = sorted({int(mes) for mes in data['meses_consulta']})
+            if not meses_consulta or meses_consulta[0] <= 0:
+                return jsonify({'error': 'Os meses consultados devem ser maiores que zero'}), 400
+        elif data.get('meses') is not None:
+            meses = int(data['meses'])
+            if meses <= 0:
+                return jsonify({'error': 'Prazo deve ser maior que zero'}), 400
+            meses_consulta = amostrar_meses(meses, int(data.get('pontos') or limite)).tolist()
+        else:
+            return jsonify({'error': 'Informe "meses_consulta" ou "meses"'}), 400
+
+        if len(meses_consulta) > limite:
+            return jsonify({'error': f'Máximo de {limite} meses por consulta'}), 400
+
+        try:
+            parametros = _ler_parametros(data.get('parametros') or {})
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        entrada = {
+            'investimento_type': data['investimento_type'],
+            'rentabilidade_type': data['rentabilidade_type'],
+            'rentabilidade_value': float(data['rentabilidade_value']),
+            'valor_inicial': float(data['valor_inicial']),
+            'aportes_mensais': float(data.get('aportes_mensais', 0)),
+            'meses': meses_consulta,
+            'parametros': parametros,
+            'incluir_ir': data.get('incluir_ir', True),
+            'taxa_custos_extra': float(data.get('taxa_custos_extra', 0.0))
+        }
+
+        # Com curva_focus, CDI e IPCA seguem as projeções por ano do Focus
+        focus = FocusData.get_latest() if data.get('curva_focus') else None
+
+        def calcular():
+            serie = calcular_pontos_mensais(**entrada, curva=curva_focus(focus))
+            return {
+                'meses': meses_consulta,
+                **{
+                    campo: [round(valor, 2) for valor in serie[campo].tolist()]
+                    for campo in ('valor_bruto', 'custos', 'valor_ir', 'valor_liquido')
+                }
+            }
+
+        etag = gerar_etag(VERSAO_CALCULO, 'evolucao', entrada, _etag_focus(focus) if focus else None)
+        return resposta_condicional(etag, calcular)
+
+    except Exception as e:
+        return jsonify({'error': f'Erro ao calcular: {str(e)}'}), 500
+
+_SOLVERS_EQUIVALENCIA = {
+    'taxa': taxa_equivalente,
+    'inflacao': inflacao_equilibrio,
+    'prazo': prazos_equilibrio
+}
+
+
+@main_bp.route('/api/equivalencia', methods=['POST'])
+@login_required
+def api_equivalencia():
+    """
+    API de equivalência entre dois produtos (no formato de /api/calculate):
+    - tipo 'taxa': rentabilidade que `produto` precisa para empatar com `referencia`;
+    - tipo 'inflacao': IPCA que empata um produto IPCA+ com o outro;
+    - tipo 'prazo': meses, até meses_max, em que o melhor dos dois muda.
+
+    `meses` pode ser um prazo ou uma lista (curva de equivalência em uma
+    chamada). Selic e IPCA vêm de selic/ipca ou do Focus.
+    """
+    try:
+        data = request.get_json() or {}
+
+        try:
+            tipo = data.get('tipo', 'taxa')
+            if tipo not in _SOLVERS_EQUIVALENCIA:
+                raise ValueError(f'Tipo inválido: {tipo} (use {", ".join(_SOLVERS_EQUIVALENCIA)})')
+            for field in ['produto', 'referencia', 'valor_inicial']:
+                if field not in data:
+                    raise ValueError(f'Campo obrigatório faltando: {field}')
+
+            limite = current_app.config.get('EVOLUCAO_PONTOS_MAX', 1200)
+            if tipo == 'prazo':
+                prazos = int(data.get('meses_max', data.get('meses', 120)))
+                if not 1 <= prazos <= limite:
+                    raise ValueError(f'meses_max deve estar entre 1 e {limite}')
+            else:
+                if 'meses' not in data:
+                    raise ValueError('Campo obrigatório faltando: meses')
+                meses = data['meses'] if isinstance(data['meses'], list) else [data['meses']]
+                prazos = sorted({int(mes) for mes in meses})
+                if not prazos or prazos[0] <= 0:
+                    raise ValueError('Prazo deve ser maior que zero')
+                if len(prazos) > limite:
+                    raise ValueError(f'Máximo de {limite} prazos por consulta')
+
+            entrada = {
+                'produto': validar_produto(data['produto']),
+                'referencia': validar_produto(data['referencia']),
+                'valor_inicial': float(data['valor_inicial']),
+                'aportes_mensais': float(data.get('aportes_mensais', 0.0)),
+                'incluir_ir': bool(data.get('incluir_ir', True))
+            }
+            if entrada['valor_inicial'] < 0:
+                raise ValueError('Valor inicial não pode ser negativo')
+            atrelados = [entrada[campo]['rentabilidade_type'] == 'ipca_mais' for campo in ('produto', 'referencia')]
+            if tipo == 'inflacao' and sum(atrelados) != 1:
+                raise ValueError('A inflação de equilíbrio exige exatamente um produto IPCA+')
+            selic = float(data['selic']) if data.get('selic') is not None else None
+            ipca = float(data['ipca']) if data.get('ipca') is not None else None
+        except (TypeError, ValueError) as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        focus = FocusData.get_latest()
+
+        def calcular():
+            contexto = resolver_contexto_mercado(selic, ipca)
+            resultado = _SOLVERS_EQUIVALENCIA[tipo](
+                entrada['produto'], entrada['referencia'], prazos,
+                entrada['valor_inicial'], entrada['aportes_mensais'],
+                contexto=contexto, incluir_ir=entrada['incluir_ir']
+            )
+            return {'tipo': tipo, 'selic': contexto.selic, 'ipca': contexto.ipca, **resultado}
+
+        etag = gerar_etag(VERSAO_CALCULO, 'equivalencia', tipo, entrada, prazos, selic, ipca, _etag_focus(focus))
+        return resposta_condicional(etag, calcular)
+
+    except Exception as exc:
+        return jsonify({'error': f'Erro ao calcular: {str(exc)}'}), 500
+
+def _ler_cenarios_liberdade(cenarios, padrao=None):
+    """
+    Valida os cenários da calculadora de Liberdade Financeira; o IPCA ausente
+    vem do Focus (ou do padrão), resolvido uma única vez.
+    """
+    lidos = []
+    for indice, cenario in enumerate(cenarios):
+        try:
+            lidos.append(validar_cenario(cenario, padrao))
+        except (TypeError, ValueError) as exc:
+            raise ValueError(f'Cenário {indice}: {exc}' if len(cenarios) > 1 else str(exc))
+    if any(cenario['ipca'] is None for cenario in lidos):
+        ipca = resolver_contexto_mercado(precisa_selic=False).ipca
+        for cenario in lidos:
+            if cenario['ipca'] is None:
+                cenario['ipca'] = ipca
+    return lidos
+
+
+@main_bp.route('/api/liberdade', methods=['POST'])
+@login_required
+def api_liberdade():
+    """
+    API da calculadora de Liberdade Financeira: patrimônio necessário,
+    projeção, idade de chegada, aporte ideal, variações "E se eu ajustar" e a
+    curva anual do patrimônio (mesmas contas de static/js/liberdade.js).
+    """
+    try:
+        data = request.get_json() or {}
+
+        try:
+            cenario = _ler_cenarios_liberdade([data])[0]
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        etag = gerar_etag(VERSAO_CALCULO, 'liberdade', cenario)
+        return resposta_condicional(etag, lambda: planejar(cenario))
+
+    except Exception as exc:
+        return jsonify({'error': f'Erro ao calcular: {str(exc)}'}), 500
+
+
+@main_bp.route('/api/liberdade/lote', methods=['POST'])
+@login_required
+def api_liberdade_lote():
+    """
+    Tabela de cenários da Liberdade Financeira avaliada de uma vez.
+
+    Recebe {'cenarios': [...]} (campos no nível superior valem como padrão
+    para todos) e devolve {'resultados': [...]} na ordem recebida.
+    """
+    try:
+        data = request.get_json() or {}
+
+        try:
+            cenarios = data.get('cenarios')
+            if not isinstance(cenarios, list) or not cenarios:
+                raise ValueError('Informe uma lista não vazia em "cenarios"')
+            limite = current_app.config.get('LIBERDADE_CENARIOS_MAX', 10000)
+            if len(cenarios) > limite:
+                raise ValueError(f'Máximo de {limite} cenários por lote')
+            padrao = {campo: valor for campo, valor in data.items() if campo != 'cenarios'}
+            lidos = _ler_cenarios_liberdade(cenarios, padrao)
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        etag = gerar_etag(VERSAO_CALCULO, 'liberdade-lote', lidos)
+        return resposta_condicional(etag, lambda: {'resultados': planejar_lote(lidos)})
+
+    except Exception as exc:
+        return jsonify({'error': f'Erro ao calcular: {str(exc)}'}), 500
+
+
+@main_bp.route('/api/liberdade/monte-carlo', methods=['POST'])
+@login_required
+def api_liberdade_monte_carlo():
+    """
+    Probabilidade de sucesso do plano da Liberdade Financeira com retornos
+    reais sorteados. Recebe o cenário de /api/liberdade mais trajetorias,
+    volatilidade (% a.a.), semente e percentis (todos opcionais).
+    """
+    try:
+        data = request.get_json() or {}
+
+        try:
+            cenario = _ler_cenarios_liberdade([data])[0]
+            limite = current_app.config.get('MONTE_CARLO_TRAJETORIAS_MAX', 50000)
+            trajetorias = int(data.get('trajetorias', 10000))
+            if not 1 <= trajetorias <= limite:
+                raise ValueError(f'Trajetórias devem estar entre 1 e {limite}')
+            percentis = [float(p) for p in data.get('percentis') or PERCENTIS_PADRAO]
+            if any(p < 0 or p > 100 for p in percentis):
+                raise ValueError('Percentis devem estar entre 0 e 100')
+            simulacao = {
+                'trajetorias': trajetorias,
+                'volatilidade': float(data.get('volatilidade', VOLATILIDADE_PADRAO)),
+                # Sem semente o resultado muda a cada chamada; a sorteada volta na resposta
+                'semente': int(data['semente']) if data.get('semente') is not None else secrets.randbits(32),
+                'percentis': percentis
+            }
+            if simulacao['volatilidade'] < 0:
+                raise ValueError('Volatilidade não pode ser negativa')
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        bytes_por_bloco = current_app.config.get('MONTE_CARLO_BLOCO_MB', 64) * 1024 * 1024
+        etag = gerar_etag(VERSAO_CALCULO, 'liberdade-monte-carlo', cenario, simulacao)
+        return resposta_condicional(
+            etag,
+            lambda: simular_liberdade(cenario, bytes_por_bloco=bytes_por_bloco, **simulacao)
+        )
+
+    except Exception as exc:
+        return jsonify({'error': f'Erro ao calcular: {str(exc)}'}), 500
+
 @main_bp.route('/api/focus', methods=['GET'])
 @login_required
 def api_focus():
@@ -350,35 +588,141 @@ def api_focus():
     if not focus_data:
         return jsonify({'error': 'Dados do Focus não disponíveis'}), 404
     
-    return jsonify({
+    return resposta_condicional(_etag_focus(focus_data), lambda: {
         'date': focus_data.date.isoformat(),
-        'ipca': {
-            '2025': focus_data.ipca_2025,
-            '2026': focus_data.ipca_2026,
-            '2027': focus_data.ipca_2027,
-            '2028': focus_data.ipca_2028
-        },
-        'selic': {
-            '2025': focus_data.selic_2025,
-            '2026': focus_data.selic_2026,
-            '2027': focus_data.selic_2027,
-            '2028': focus_data.selic_2028
-        },
-        'pib': {
-            '2025': focus_data.pib_2025,
-            '2026': focus_data.pib_2026,
-            '2027': focus_data.pib_2027,
-            '2028': focus_data.pib_2028
-        },
-        'cambio': {
-            '2025': focus_data.cambio_2025,
-            '2026': focus_data.cambio_2026,
-            '2027': focus_data.cambio_2027,
-            '2028': focus_data.cambio_2028
+        **{
+            indicador: {str(ano): valor for ano, valor in focus_data.medianas(indicador).items()}
+            for indicador in FocusData.INDICADORES
         }
     })
 
 
+@main_bp.route('/api/focus/history', methods=['GET'])
+@login_required
+def api_focus_history():
+    """
+    API com o histórico das projeções do Focus para um indicador e ano.
+
+    Parâmetros: indicador, ano, granularidade (semana|mes), inicio/fim
+    (AAAA-MM-DD), pagina e por_pagina. Os pontos vêm dos agregados
+    pré-calculados, em ordem cronológica.
+    """
+    args = request.args
+    indicador = args.get('indicador', 'ipca')
+    granularidade = args.get('granularidade', 'semana')
+
+    try:
+        ano = int(args.get('ano', datetime.now().year))
+        pagina = int(args.get('pagina', 1))
+        limite = current_app.config.get('FOCUS_HISTORICO_POR_PAGINA_MAX', 500)
+        por_pagina = min(int(args.get('por_pagina', limite)), limite)
+        inicio = datetime.strptime(args['inicio'], '%Y-%m-%d').date() if args.get('inicio') else None
+        fim = datetime.strptime(args['fim'], '%Y-%m-%d').date() if args.get('fim') else None
+    except ValueError:
+        return jsonify({'error': 'Parâmetros inválidos (ano, pagina e por_pagina inteiros; datas AAAA-MM-DD)'}), 400
+
+    if indicador not in FocusData.INDICADORES:
+        return jsonify({'error': f'Indicador inválido: {indicador}'}), 400
+    if granularidade not in GRANULARIDADES:
+        return jsonify({'error': f'Granularidade inválida: {granularidade}'}), 400
+    if pagina < 1 or por_pagina < 1:
+        return jsonify({'error': 'pagina e por_pagina devem ser maiores que zero'}), 400
+
+    # Os agregados só mudam quando um novo snapshot é importado
+    etag = gerar_etag(
+        'focus-history', _etag_focus(FocusData.get_latest()),
+        indicador, ano, granularidade, inicio, fim, pagina, por_pagina
+    )
+    return resposta_condicional(etag, lambda: consultar_historico(
+        indicador, ano,
+        granularidade=granularidade,
+        inicio=inicio,
+        fim=fim,
+        pagina=pagina,
+        por_pagina=por_pagina
+    ))
+
+
+def _ler_parametros(parametros):
+    """
+    Taxas do simulador (em %): todas precisam ser números finitos. Um null ou
+    texto viraria NaN nos arrays e a resposta sairia com NaN (JSON inválido).
+    """
+    if not isinstance(parametros, dict):
+        raise ValueError('parametros deve ser um objeto')
+    lidos = {}
+    for nome, valor in parametros.items():
+        if isinstance(valor, bool) or not isinstance(valor, (int, float)) or not math.isfinite(valor):
+            raise ValueError(f'Parâmetro inválido: {nome} deve ser um número')
+        lidos[nome] = float(valor)
+    return lidos
+
+
+def _ler_cenario_simulacao(data, padrao=None):
+    """
+    Valida e normaliza um cenário do simulador de renda fixa.
+    Campos ausentes no cenário são herdados de `padrao` (usado no lote).
+    Lança ValueError com a mensagem de erro para o usuário.
+    """
+    if not isinstance(data, dict):
+        raise ValueError('Cenário deve ser um objeto')
+    padrao = padrao or {}
+    for field in ['valor_inicial', 'meses', 'parametros']:
+        if field not in data and field not in padrao:
+            raise ValueError(f'Campo obrigatório faltando: {field}')
+
+    def campo(nome, default=None):
+        return data.get(nome, padrao.get(nome, default))
+
+    meses = int(campo('meses'))
+    if meses <= 0:
+        raise ValueError('Prazo deve ser maior que zero')
+
+    formato_evolucao = campo('formato_evolucao') or 'objetos'
+    if formato_evolucao not in FORMATOS_EVOLUCAO:
+        raise ValueError(f'Formato de evolução inválido: {formato_evolucao}')
+
+    pontos = campo('pontos')
+    if pontos is not None:
+        pontos = int(pontos)
+        if pontos < 2:
+            raise ValueError('Informe ao menos 2 pontos para a evolução')
+
+    return {
+        'valor_inicial': float(campo('valor_inicial')),
+        'aportes_mensais': float(campo('aportes_mensais', 0.0)),
+        'meses': meses,
+        'parametros': {**_ler_parametros(padrao.get('parametros') or {}), **_ler_parametros(data.get('parametros') or {})},
+        'incluir_ir': campo('incluir_ir', True),
+        'ajustar_inflacao': campo('ajustar_inflacao', True),
+        'pontos': pontos,
+        'formato_evolucao': formato_evolucao
+    }
+
+
+def _cabecalho_evolucao(cenario):
+    """
+    Campos extras da resposta nos formatos compactos: a grade de meses é
+    enviada uma única vez, compartilhada por todos os produtos.
+    """
+    if cenario['formato_evolucao'] == 'objetos':
+        return {}
+    return {
+        'formato_evolucao': cenario['formato_evolucao'],
+        'meses': amostrar_meses(cenario['meses'], cenario['pontos']).tolist()
+    }
+
+
+@main_bp.route('/api/focus/boletins', methods=['GET'])
+@login_required
+def api_focus_boletins():
+    """API com o histórico dos PDFs do Boletim Focus (mais recente primeiro)"""
+    boletins = [
+        {**boletim, 'url': url_for('static', filename=f"focus/{boletim['arquivo']}")}
+        for boletim in listar_boletins(_pasta_focus())
+    ]
+    return jsonify({'boletins': boletins})
+
 @main_bp.route('/api/simular-renda-fixa', methods=['POST'])
 @login_required
 def api_simular_renda_fixa():
@@ -386,34 +730,270 @@ def api_simular_renda_fixa():
     try:
         data = request.get_json()
 
-        required_fields = ['valor_inicial', 'meses', 'parametros']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Campo obrigatório faltando: {field}'}), 400
+        try:
+            cenario = _ler_cenario_simulacao(data)
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
 
-        valor_inicial = float(data['valor_inicial'])
-        aportes_mensais = float(data.get('aportes_mensais', 0.0))
-        meses = int(data['meses'])
-        parametros = data.get('parametros', {})
-        incluir_ir = data.get('incluir_ir', True)
-        ajustar_inflacao = data.get('ajustar_inflacao', True)
         tax_regime = 'vigente'
 
-        if meses <= 0:
-            return jsonify({'error': 'Prazo deve ser maior que zero'}), 400
+        def simular():
+            cache_resultados.garantir_versao(
+                (VERSAO_CALCULO, obter_taxas().versao, _etag_focus(FocusData.get_latest()))
+            )
+            resultados = simular_investimentos_padrao(
+                valor_inicial=cenario['valor_inicial'],
+                aportes_mensais=cenario['aportes_mensais'],
+                meses=cenario['meses'],
+                parametros=cenario['parametros'],
+                incluir_ir=cenario['incluir_ir'],
+                ajustar_inflacao_flag=cenario['ajustar_inflacao'],
+                tax_regime=tax_regime,
+                pontos=cenario['pontos'],
+                formato_evolucao=cenario['formato_evolucao']
+            )
+            return {**_cabecalho_evolucao(cenario), 'resultados': resultados}
+
+        # O resultado depende só do cenário: a mesma entrada gera a mesma ETag
+        etag = gerar_etag(VERSAO_CALCULO, 'simular-renda-fixa', cenario, tax_regime)
+        return resposta_condicional(etag, simular)
+
+    except Exception as exc:
+        return jsonify({'error': f'Erro ao calcular: {str(exc)}'}), 500
+
+
+@main_bp.route('/api/simular-renda-fixa/lote', methods=['POST'])
+@login_required
+def api_simular_renda_fixa_lote():
+    """
+    API para simular vários cenários em uma única chamada.
+
+    Recebe {'cenarios': [...]} (cada cenário no formato de /api/simular-renda-fixa;
+    campos no nível superior valem como padrão para todos) e devolve NDJSON:
+    uma linha {'indice': i, 'resultados': [...]} por cenário, na ordem recebida,
+    enviada assim que o bloco correspondente é calculado.
+    """
+    try:
+        data = request.get_json()
+        cenarios = data.get('cenarios')
+
+        if not isinstance(cenarios, list) or not cenarios:
+            return jsonify({'error': 'Informe uma lista não vazia em "cenarios"'}), 400
+
+        limite = current_app.config.get('SIMULACAO_LOTE_MAX', 1000)
+        if len(cenarios) > limite:
+            return jsonify({'error': f'Máximo de {limite} cenários por lote'}), 400
+
+        lote = []
+        for indice, cenario in enumerate(cenarios):
+            try:
+                lote.append(_ler_cenario_simulacao(cenario, padrao=data))
+            except ValueError as exc:
+                return jsonify({'error': f'Cenário {indice}: {exc}'}), 400
+
+    except Exception as exc:
+        return jsonify({'error': f'Erro ao calcular: {str(exc)}'}), 500
+
+    def gerar():
+        try:
+            for indice, resultados in enumerate(simular_lote(lote)):
+                linha = {'indice': indice, **_cabecalho_evolucao(lote[indice]), 'resultados': resultados}
+                yield json.dumps(linha) + '\n'
+        except Exception as exc:
+            yield json.dumps({'error': f'Erro ao calcular: {str(exc)}'}) + '\n'
+
+    return Response(stream_with_context(gerar()), mimetype='application/x-ndjson')
+
+
+@main_bp.route('/api/simular-renda-fixa/sensibilidade', methods=['POST'])
+@login_required
+def api_simular_renda_fixa_sensibilidade():
+    """
+    API da grade de sensibilidade: valor líquido e produto vencedor em cada
+    combinação de dois parâmetros.
+
+    Recebe o cenário de /api/simular-renda-fixa mais `eixos`: dois itens
+    {'parametro', 'inicio', 'fim', 'passos'} ou {'parametro', 'valores'}
+    (campos do cenário ou chaves de parametros, ver app.sensibilidade). Com por_produto, devolve também a matriz de
+    cada produto.
+    """
+    try:
+        data = request.get_json() or {}
+
+        try:
+            eixos = data.get('eixos')
+            if not isinstance(eixos, list) or len(eixos) != 2:
+                raise ValueError('Informe dois eixos em "eixos"')
+            limite = current_app.config.get('SENSIBILIDADE_CELULAS_MAX', 40000)
+            grade = [
+                (
+                    eixo.get('parametro'),
+                    valores_eixo(
+                        eixo.get('parametro'), eixo.get('inicio'), eixo.get('fim'), eixo.get('passos'),
+                        eixo.get('valores'), maximo=limite
+                    )
+                )
+                for eixo in eixos
+            ]
+            if grade[0][0] == grade[1][0]:
+                raise ValueError('Os dois eixos devem variar parâmetros diferentes')
+            if len(grade[0][1]) * len(grade[1][1]) > limite:
+                raise ValueError(f'Máximo de {limite} células por grade')
+
+            # Campos do cenário que são eixos não precisam ser informados
+            base = {**data, **{nome: valores[0] for nome, valores in grade if nome in CAMPOS_CENARIO and nome not in data}}
+            base.setdefault('parametros', {})
+            cenario = _ler_cenario_simulacao(base)
+            por_produto = bool(data.get('por_produto', False))
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        entrada = {
+            'cenario': cenario,
+            'eixos': [[nome, valores.tolist()] for nome, valores in grade],
+            'por_produto': por_produto
+        }
+        etag = gerar_etag(VERSAO_CALCULO, 'sensibilidade', entrada)
+        return resposta_condicional(etag, lambda: grade_sensibilidade(cenario, grade[0], grade[1], por_produto))
 
-        resultados = simular_investimentos_padrao(
-            valor_inicial=valor_inicial,
-            aportes_mensais=aportes_mensais,
-            meses=meses,
-            parametros=parametros,
-            incluir_ir=incluir_ir,
-            ajustar_inflacao_flag=ajustar_inflacao,
-            tax_regime=tax_regime
+    except Exception as exc:
+        return jsonify({'error': f'Erro ao calcular: {str(exc)}'}), 500
+
+
+@main_bp.route('/api/simular-renda-fixa/monte-carlo', methods=['POST'])
+@login_required
+def api_simular_renda_fixa_monte_carlo():
+    """
+    API do simulador padrão em modo estocástico: os produtos são avaliados
+    em trajetórias sorteadas de Selic e IPCA em torno do Focus.
+
+    Recebe o cenário de /api/simular-renda-fixa mais trajetorias, semente,
+    correlacao, persistencia e percentis (todos opcionais) e devolve as
+    bandas de percentis do valor líquido para o gráfico.
+    """
+    try:
+        data = request.get_json() or {}
+
+        try:
+            cenario = _ler_cenario_simulacao(data)
+            limite = current_app.config.get('MONTE_CARLO_TRAJETORIAS_MAX', 50000)
+            trajetorias = int(data.get('trajetorias', 10000))
+            if not 1 <= trajetorias <= limite:
+                raise ValueError(f'Trajetórias devem estar entre 1 e {limite}')
+            percentis = [float(p) for p in data.get('percentis') or PERCENTIS_PADRAO]
+            if any(p < 0 or p > 100 for p in percentis):
+                raise ValueError('Percentis devem estar entre 0 e 100')
+            simulacao = {
+                'valor_inicial': cenario['valor_inicial'],
+                'aportes_mensais': cenario['aportes_mensais'],
+                'meses': cenario['meses'],
+                'parametros': cenario['parametros'],
+                'incluir_ir': cenario['incluir_ir'],
+                'trajetorias': trajetorias,
+                # Sem semente o resultado muda a cada chamada; a sorteada volta na resposta
+                'semente': int(data['semente']) if data.get('semente') is not None else secrets.randbits(32),
+                'correlacao': float(data.get('correlacao', CORRELACAO_PADRAO)),
+                'persistencia': float(data.get('persistencia', PERSISTENCIA_PADRAO)),
+                'percentis': percentis,
+                'pontos': cenario['pontos'] or PONTOS_MONTE_CARLO
+            }
+            if not -1 <= simulacao['correlacao'] <= 1 or not 0 <= simulacao['persistencia'] < 1:
+                raise ValueError('Correlação deve estar entre -1 e 1 e persistência entre 0 e 1')
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        focus = FocusData.get_latest()
+        bytes_por_bloco = current_app.config.get('MONTE_CARLO_BLOCO_MB', 64) * 1024 * 1024
+        etag = gerar_etag(VERSAO_CALCULO, 'monte-carlo', simulacao, _etag_focus(focus))
+        return resposta_condicional(
+            etag,
+            lambda: simular_monte_carlo(focus=focus, bytes_por_bloco=bytes_por_bloco, **simulacao)
         )
 
-        return jsonify({'resultados': resultados})
+    except Exception as exc:
+        return jsonify({'error': f'Erro ao calcular: {str(exc)}'}), 500
+
+
+@main_bp.route('/api/backtest', methods=['POST'])
+@login_required
+def api_backtest():
+    """
+    API de backtest: capitaliza os produtos do simulador com as taxas
+    realizadas (CDI, Selic, IPCA, TR) a partir de um mês de início.
+
+    Recebe inicio (AAAA-MM), meses, valor_inicial, aportes_mensais,
+    parametros, incluir_ir e pontos (opcional, meses amostrados na evolução).
+    """
+    try:
+        data = request.get_json() or {}
+
+        try:
+            for field in ['inicio', 'meses', 'valor_inicial']:
+                if field not in data:
+                    raise ValueError(f'Campo obrigatório faltando: {field}')
+            inicio = datetime.strptime(str(data['inicio']), '%Y-%m').strftime('%Y-%m')
+            meses = int(data['meses'])
+            pontos = int(data['pontos']) if data.get('pontos') is not None else None
+            cenario = {
+                'inicio': inicio,
+                'meses': meses,
+                'valor_inicial': float(data['valor_inicial']),
+                'aportes_mensais': float(data.get('aportes_mensais', 0.0)),
+                'parametros': _ler_parametros(data.get('parametros') or {}),
+                'incluir_ir': bool(data.get('incluir_ir', True)),
+                'pontos': pontos
+            }
+            historico = obter_historico(_pasta_sgs())
+            validar_janelas(historico, historico.indice(inicio), meses)
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        # Muda quando o histórico do SGS é atualizado
+        etag = gerar_etag(VERSAO_CALCULO, 'backtest', cenario, versao_series(SERIES_BACKTEST, _pasta_sgs()))
+        return resposta_condicional(etag, lambda: backtest(historico=historico, **cenario))
 
     except Exception as exc:
         return jsonify({'error': f'Erro ao calcular: {str(exc)}'}), 500
 
+
+@main_bp.route('/api/backtest/janelas', methods=['POST'])
+@login_required
+def api_backtest_janelas():
+    """
+    API de janelas móveis: resultado de cada produto para todos os meses de
+    início do histórico com o prazo informado, resumido em percentis,
+    probabilidade de superar a poupança e a inflação e pior janela.
+
+    Recebe meses, valor_inicial, aportes_mensais, parametros, incluir_ir e
+    percentis (opcional, entre 0 e 100).
+    """
+    try:
+        data = request.get_json() or {}
+
+        try:
+            for field in ['meses', 'valor_inicial']:
+                if field not in data:
+                    raise ValueError(f'Campo obrigatório faltando: {field}')
+            percentis = [float(p) for p in data.get('percentis') or PERCENTIS_PADRAO]
+            if any(p < 0 or p > 100 for p in percentis):
+                raise ValueError('Percentis devem estar entre 0 e 100')
+            cenario = {
+                'meses': int(data['meses']),
+                'valor_inicial': float(data['valor_inicial']),
+                'aportes_mensais': float(data.get('aportes_mensais', 0.0)),
+                'parametros': _ler_parametros(data.get('parametros') or {}),
+                'incluir_ir': bool(data.get('incluir_ir', True)),
+                'percentis': percentis
+            }
+            historico = obter_historico(_pasta_sgs())
+            if cenario['meses'] < 1 or cenario['meses'] > len(historico.meses):
+                primeiro, ultimo = historico.periodo()
+                raise ValueError(f'Prazo deve estar entre 1 e {len(historico.meses)} meses ({primeiro} a {ultimo})')
+        except ValueError as exc:
+            return jsonify({'error': str(exc)}), 400
+
+        etag = gerar_etag(VERSAO_CALCULO, 'backtest_janelas', cenario, versao_series(SERIES_BACKTEST, _pasta_sgs()))
+        return resposta_condicional(etag, lambda: distribuicao_janelas(historico=historico, **cenario))
+
+    except Exception as exc:
+        return jsonify({'error': f'Erro ao calcular: {str(exc)}'}), 500
@@ -0,0 +1,159 @@
+"""
+Grade de sensibilidade do simulador padrão
+
+Varia dois parâmetros do cenário (ex.: Selic × prazo) e calcula o valor
+líquido de todos os produtos em todas as células de uma vez: cada eixo vira
+um array com broadcasting (eixo x nas linhas, eixo y nas colunas) e as
+fórmulas fechadas do simulador (_taxa_anual_lote, _serie_mensal_arrays) são
+avaliadas sobre a matriz produtos × x × y, sem laço por célula.
+
+Num eixo de Selic, o CDI segue a convenção de app.calculations: a Selic de
+cada célula menos a diferença Selic - CDI dos parâmetros do cenário.
+"""
+import numpy as np
+
+from app.calculations import (
+    INVESTIMENTOS_ISENTOS,
+    INVESTIMENTOS_TESOURO,
+    _produtos_padrao,
+    _serie_mensal_arrays,
+    _taxa_anual_lote,
+    cdi_parametros,
+    spread_cdi
+)
+
+# Campos do cenário e parâmetros (em %) que podem ser eixos da grade
+CAMPOS_CENARIO = ('meses', 'aportes_mensais', 'valor_inicial')
+PARAMETROS_GRADE = (
+    'selic',
+    'cdi',
+    'ipca',
+    'rentabilidade_cdb',
+    'rentabilidade_lci_lca',
+    'rentabilidade_fundo_di',
+    'taxa_admin_fundo_di',
+    'tesouro_prefixado_nominal',
+    'tesouro_ipca_mais',
+    'poupanca_mensal',
+    'taxa_custodia'
+)
+EIXOS_GRADE = CAMPOS_CENARIO + PARAMETROS_GRADE
+
+
+def valores_eixo(parametro, inicio=None, fim=None, passos=None, valores=None, maximo=None):
+    """
+    Valores de um eixo: a lista informada ou `passos` valores igualmente
+    espaçados de `inicio` a `fim`. O prazo é arredondado para meses inteiros.
+    """
+    if parametro not in EIXOS_GRADE:
+        raise ValueError(f'Parâmetro inválido para a grade: {parametro} (use {", ".join(EIXOS_GRADE)})')
+    if valores is not None:
+        try:
+            eixo = np.asarray(valores, dtype=float)
+        except (TypeError, ValueError):
+            raise ValueError(f'Eixo {parametro}: os valores devem ser números')
+    else:
+        if inicio is None or fim is None or passos is None:
+            raise ValueError(f'Eixo {parametro}: informe valores ou inicio, fim e passos')
+        if maximo is not None and int(passos) > maximo:
+            raise ValueError(f'Eixo {parametro}: máximo de {maximo} valores')
+        eixo = np.linspace(float(inicio), float(fim), int(passos))
+    if eixo.ndim != 1 or not len(eixo):
+        raise ValueError(f'Eixo {parametro} sem valores')
+    # null vira NaN no array e sairia como NaN (JSON inválido) na resposta
+    if not np.all(np.isfinite(eixo)):
+        raise ValueError(f'Eixo {parametro}: os valores devem ser números finitos')
+    if parametro == 'meses':
+        eixo = np.rint(eixo)
+        if np.any(eixo < 1):
+            raise ValueError('Prazo deve ser maior que zero')
+    return eixo
+
+
+def grade_sensibilidade(cenario, eixo_x, eixo_y, por_produto=False):
+    """
+    Valor líquido de cada produto do simulador padrão em cada célula da grade.
+
+    Args:
+        cenario (dict): valor_inicial, aportes_mensais, meses, parametros e
+            incluir_ir, como em simular_investimentos_padrao; os campos dos
+            eixos são substituídos pelos valores da grade.
+        eixo_x, eixo_y (tuple): (parâmetro, array de valores).
+        por_produto (bool): inclui a matriz de cada produto na resposta.
+
+    Returns:
+        dict: eixos, produtos, índice do produto vencedor e seu valor líquido
+        por célula (listas x × y) e, opcionalmente, as matrizes por produto.
+    """
+    (nome_x, valores_x), (nome_y, valores_y) = eixo_x, eixo_y
+    if nome_x == nome_y:
+        raise ValueError('Os dois eixos devem variar parâmetros diferentes')
+    grade = {nome_x: np.asarray(valores_x, dtype=float)[:, None], nome_y: np.asarray(valores_y, dtype=float)[None, :]}
+    forma = (len(valores_x), len(valores_y))
+
+    def campo(nome, padrao=0.0):
+        return grade[nome] if nome in grade else float(cenario.get(nome, padrao) or padrao)
+
+    valor_inicial = campo('valor_inicial')
+    aportes_mensais = np.maximum(campo('aportes_mensais'), 0.0)
+    meses = np.broadcast_to(campo('meses'), forma).astype(int)
+    parametros = {**(cenario.get('parametros') or {}), **{nome: grade[nome] for nome in grade if nome in PARAMETROS_GRADE}}
+
+    # Mesmas taxas de _simular_bloco. Com a Selic como eixo e o CDI fixo, o
+    # CDI acompanha a Selic com a diferença Selic - CDI do cenário (spread_cdi)
+    if 'selic' in grade and 'cdi' not in grade:
+        cdi = np.maximum(grade['selic'] - spread_cdi(cenario.get('parametros') or {}), 0.0)
+    else:
+        cdi = cdi_parametros(parametros)
+    ipca = parametros.get('ipca')
+    ipca = 0.0 if ipca is None else ipca
+    taxa_custodia = np.asarray(parametros.get('taxa_custodia', 0.2), dtype=float) / 100
+
+    produtos = _produtos_padrao(parametros)
+    incluir_ir = bool(cenario.get('incluir_ir', True))
+    taxa_mensal = np.stack([
+        np.broadcast_to(
+            (1 + _taxa_anual_lote(
+                produto['rentabilidade_type'],
+                np.asarray(produto['rentabilidade_value'], dtype=float),
+                np.asarray(cdi, dtype=float),
+                np.asarray(ipca, dtype=float)
+            ) - produto.get('taxa_custos_extra', 0.0)) ** (1/12) - 1,
+            forma
+        )
+        for produto in produtos
+    ])
+    custodia = np.stack([
+        np.broadcast_to(taxa_custodia if produto['investimento_type'] in INVESTIMENTOS_TESOURO else 0.0, forma)
+        for produto in produtos
+    ])
+    tributado = np.array([
+        incluir_ir and produto['investimento_type'] not in INVESTIMENTOS_ISENTOS and produto.get('incluir_ir', True)
+        for produto in produtos
+    ])[:, None, None]
+
+    valor_liquido = _serie_mensal_arrays(
+        taxa_mensal=taxa_mensal,
+        valor_inicial=valor_inicial,
+        aportes_mensais=aportes_mensais,
+        mes=meses,
+        taxa_custodia=custodia,
+        tributado=tributado
+    )['valor_liquido']
+    vencedor = np.argmax(valor_liquido, axis=0)
+
+    resultado = {
+        'eixos': [
+            {'parametro': nome_x, 'valores': np.asarray(valores_x, dtype=float).tolist()},
+            {'parametro': nome_y, 'valores': np.asarray(valores_y, dtype=float).tolist()}
+        ],
+        'produtos': [produto['nome'] for produto in produtos],
+        'vencedor': vencedor.tolist(),
+        'valor_liquido': np.round(np.take_along_axis(valor_liquido, vencedor[None], axis=0)[0], 2).tolist()
+    }
+    if por_produto:
+        resultado['por_produto'] = {
+            produto['nome']: np.round(valor_liquido[indice], 2).tolist()
+            for indice, produto in enumerate(produtos)
+        }
+    return resultado
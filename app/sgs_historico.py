@@ -0,0 +1,249 @@
+"""
+Histórico local das séries do SGS (Banco Central)
+
+Cada série fica em `data/sgs/<nome>.npy`: um array NumPy estruturado
+(data: datetime64[D], valor: float64), em ordem de data, com uma linha por
+observação (diária ou mensal, conforme a série). Os arquivos são abertos
+com memory map, então o motor de cálculo lê só as páginas que usar, e ficam
+em memória até o arquivo mudar.
+
+A atualização é incremental: baixa apenas o intervalo após a última
+observação gravada, em janelas de até 10 anos (limite da API para séries
+diárias), e substitui o arquivo de forma atômica.
+
+Uso:
+    python -m app.sgs_historico atualizar                 # todas as séries
+    python -m app.sgs_historico atualizar selic ipca --inicio 1995-01-01
+    python -m app.sgs_historico resumo
+"""
+import argparse
+import os
+import tempfile
+import threading
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app.cache import CacheArquivo
+
+# Nome local -> (código SGS, descrição)
+SERIES = {
+    'selic': (11, 'Selic diária (% a.d.)'),
+    'cdi': (12, 'CDI diário (% a.d.)'),
+    'selic_meta': (432, 'Meta Selic (% a.a.)'),
+    'ipca': (433, 'IPCA mensal (% a.m.)'),
+    'tr': (226, 'TR (% no período mensal iniciado na data)')
+}
+
+SERIE_DTYPE = np.dtype([('data', 'datetime64[D]'), ('valor', 'float64')])
+
+PASTA_PADRAO = Path(__file__).resolve().parents[1] / 'data' / 'sgs'
+SGS_BASE_URL = os.environ.get('SGS_BASE_URL', 'https://api.bcb.gov.br/dados/serie')
+INICIO_PADRAO = date(2000, 1, 1)
+
+# A API recusa consultas de séries diárias com mais de 10 anos
+_JANELA_MAXIMA_ANOS = 10
+
+
+def caminho_serie(nome, pasta=PASTA_PADRAO):
+    return Path(pasta) / f'{nome}.npy'
+
+
+def _serie_vazia():
+    return np.empty(0, dtype=SERIE_DTYPE)
+
+
+def _ler_arquivo(caminho):
+    return np.load(caminho, mmap_mode='r')
+
+
+def gravar_serie(nome, observacoes, pasta=PASTA_PADRAO):
+    """Grava a série inteira de forma atômica (arquivo temporário + os.replace)."""
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=pasta, prefix=f'.{nome}-', suffix='.npy.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as fp:
+            np.save(fp, np.ascontiguousarray(observacoes, dtype=SERIE_DTYPE))
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, caminho_serie(nome, pasta))
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
+
+
+_series = {}
+_series_lock = threading.Lock()
+
+
+def _arquivo_serie(nome, pasta):
+    if nome not in SERIES:
+        raise ValueError(f'Série desconhecida: {nome} (use {", ".join(SERIES)})')
+    caminho = caminho_serie(nome, pasta)
+    arquivo = _series.get(caminho)
+    if arquivo is None:
+        with _series_lock:
+            arquivo = _series.setdefault(caminho, CacheArquivo(caminho, _ler_arquivo, padrao=_serie_vazia()))
+    return arquivo
+
+
+def carregar_serie(nome, pasta=PASTA_PADRAO):
+    """
+    Série gravada (array estruturado somente leitura, via memory map); vazia
+    se ainda não foi baixada. Só é reaberta quando o arquivo muda.
+    """
+    return _arquivo_serie(nome, pasta).obter()
+
+
+def versao_series(nomes=None, pasta=PASTA_PADRAO):
+    """Versão (mtime, tamanho) dos arquivos das séries; muda a cada atualização."""
+    return tuple(_arquivo_serie(nome, pasta).obter_com_versao()[0] for nome in (nomes or SERIES))
+
+
+def serie_entre(nome, inicio=None, fim=None, pasta=PASTA_PADRAO):
+    """
+    Datas e valores da série entre `inicio` e `fim` (inclusive), como views
+    do arquivo mapeado (sem cópia).
+    """
+    observacoes = carregar_serie(nome, pasta)
+    datas = observacoes['data']
+    de = 0 if inicio is None else np.searchsorted(datas, np.datetime64(inicio, 'D'), side='left')
+    ate = len(datas) if fim is None else np.searchsorted(datas, np.datetime64(fim, 'D'), side='right')
+    return datas[de:ate], observacoes['valor'][de:ate]
+
+
+def criar_sessao():
+    """Sessão HTTP com keep-alive e novas tentativas para falhas temporárias."""
+    sessao = requests.Session()
+    tentativas = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=('GET',)
+    )
+    sessao.mount('https://', HTTPAdapter(max_retries=tentativas))
+    sessao.mount('http://', HTTPAdapter(max_retries=tentativas))
+    return sessao
+
+
+def _janelas(inicio, fim):
+    """Divide [inicio, fim] em intervalos aceitos pela API."""
+    while inicio <= fim:
+        try:
+            limite = inicio.replace(year=inicio.year + _JANELA_MAXIMA_ANOS) - timedelta(days=1)
+        except ValueError:  # 29 de fevereiro
+            limite = date(inicio.year + _JANELA_MAXIMA_ANOS, 2, 28)
+        janela_fim = min(limite, fim)
+        yield inicio, janela_fim
+        inicio = janela_fim + timedelta(days=1)
+
+
+def baixar_observacoes(codigo, inicio, fim, sessao=None, base_url=SGS_BASE_URL):
+    """Observações da série SGS `codigo` entre `inicio` e `fim`, como array estruturado."""
+    sessao = sessao or criar_sessao()
+    url = f"{base_url.rstrip('/')}/bcdata.sgs.{codigo}/dados"
+    registros = []
+    for de, ate in _janelas(inicio, fim):
+        resposta = sessao.get(
+            url,
+            params={
+                'formato': 'json',
+                'dataInicial': de.strftime('%d/%m/%Y'),
+                'dataFinal': ate.strftime('%d/%m/%Y')
+            },
+            timeout=30
+        )
+        # Janela sem observações: a API responde 404
+        if resposta.status_code == 404:
+            continue
+        resposta.raise_for_status()
+        registros.extend(resposta.json())
+
+    observacoes = np.empty(len(registros), dtype=SERIE_DTYPE)
+    observacoes['data'] = [datetime.strptime(registro['data'], '%d/%m/%Y').date() for registro in registros]
+    observacoes['valor'] = [float(str(registro['valor']).replace(',', '.')) for registro in registros]
+    return observacoes
+
+
+def atualizar_serie(nome, pasta=PASTA_PADRAO, inicio=INICIO_PADRAO, hoje=None, sessao=None, base_url=SGS_BASE_URL):
+    """
+    Baixa as observações posteriores à última gravada (ou desde `inicio`,
+    se a série ainda não existe) e regrava o arquivo.
+
+    Returns:
+        int: quantidade de observações novas.
+    """
+    codigo, _ = SERIES[nome]
+    hoje = hoje or date.today()
+    caminho = caminho_serie(nome, pasta)
+    atuais = np.load(caminho) if caminho.exists() else _serie_vazia()
+
+    if len(atuais):
+        ultima = atuais['data'][-1]
+        inicio = (ultima + np.timedelta64(1, 'D')).astype(date)
+    if inicio > hoje:
+        return 0
+
+    novas = baixar_observacoes(codigo, inicio, hoje, sessao=sessao, base_url=base_url)
+    if len(atuais):
+        novas = novas[novas['data'] > ultima]
+    if not len(novas):
+        return 0
+
+    novas = novas[np.argsort(novas['data'], kind='stable')]
+    gravar_serie(nome, np.concatenate([atuais, novas]), pasta)
+    return len(novas)
+
+
+def atualizar_series(nomes=None, pasta=PASTA_PADRAO, inicio=INICIO_PADRAO, base_url=SGS_BASE_URL):
+    """Atualiza as séries indicadas (ou todas) com uma sessão compartilhada."""
+    with criar_sessao() as sessao:
+        return {
+            nome: atualizar_serie(nome, pasta, inicio=inicio, sessao=sessao, base_url=base_url)
+            for nome in (nomes or SERIES)
+        }
+
+
+def resumo(pasta=PASTA_PADRAO):
+    """Quantidade de observações e primeira/última data de cada série."""
+    linhas = {}
+    for nome in SERIES:
+        observacoes = carregar_serie(nome, pasta)
+        linhas[nome] = {
+            'observacoes': len(observacoes),
+            'inicio': str(observacoes['data'][0]) if len(observacoes) else None,
+            'fim': str(observacoes['data'][-1]) if len(observacoes) else None
+        }
+    return linhas
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Mantém o histórico local das séries do SGS.')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+    atualizar = subparsers.add_parser('atualizar', help='Baixa as observações novas.')
+    atualizar.add_argument('series', nargs='*', metavar='serie', help=f'Séries ({", ".join(SERIES)}); padrão: todas.')
+    atualizar.add_argument('--inicio', type=date.fromisoformat, default=INICIO_PADRAO,
+                           help='Primeira data das séries ainda não baixadas (AAAA-MM-DD).')
+    atualizar.add_argument('--base-url', default=SGS_BASE_URL)
+    subparsers.add_parser('resumo', help='Mostra o período gravado de cada série.')
+    args = parser.parse_args()
+
+    if args.comando == 'atualizar':
+        desconhecidas = set(args.series) - set(SERIES)
+        if desconhecidas:
+            parser.error(f'séries desconhecidas: {", ".join(sorted(desconhecidas))}')
+        for nome, novas in atualizar_series(args.series, inicio=args.inicio, base_url=args.base_url).items():
+            print(f'{nome}: {novas} observações novas')
+    else:
+        for nome, linha in resumo().items():
+            print(f"{nome}: {linha['observacoes']} observações ({linha['inicio']} a {linha['fim']})")
+
+
+if __name__ == '__main__':
+    main()
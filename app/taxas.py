@@ -0,0 +1,112 @@
+"""
+Carregamento das taxas de mercado gravadas em data/taxas.json
+(arquivo gerado por scripts/update_rates.py)
+"""
+import json
+import threading
+from collections import namedtuple
+from pathlib import Path
+
+from flask import current_app
+
+from app.cache import CacheArquivo
+from app.calculations import SPREAD_CDI
+
+TaxasCarregadas = namedtuple('TaxasCarregadas', ['versao', 'taxas', 'parametros_padrao'])
+
+
+def _rate_value(rates, key, default, ndigits=2):
+    value = rates.get(key)
+    if value is None:
+        return default
+    try:
+        return round(float(value), ndigits)
+    except Exception:
+        return default
+
+
+def montar_parametros_padrao(rates):
+    """
+    Deriva os parâmetros padrão do simulador de renda fixa a partir das taxas.
+    `tesouro_prefixado_nominal` fica None quando o arquivo não traz a taxa
+    (a rota completa com a projeção do Focus).
+    """
+    selic = _rate_value(rates, 'selic_meta', 10.0)
+    cdi = _rate_value(rates, 'cdi_over', round(max(selic - SPREAD_CDI, 0.0), 2))
+    ipca = _rate_value(rates, 'ipca_12m', 4.0)
+    tr = _rate_value(rates, 'tr_mensal', 0.17, ndigits=4)
+    poupanca_mensal = _rate_value(rates, 'poupanca_mensal', 0.6731, ndigits=4)
+
+    # Percentuais relativos ao CDI
+    rentabilidade_cdb = 100.0
+    rentabilidade_fundo_di = 98.0
+    rentabilidade_lci_lca = 85.0
+
+    if rates.get('fundo_di_liquido') and rates.get('cdi_over'):
+        rentabilidade_fundo_di = round(
+            (float(rates['fundo_di_liquido']) / float(rates['cdi_over'])) * 100,
+            2
+        )
+    if rates.get('lci_lca_85_cdi') and rates.get('cdi_over'):
+        rentabilidade_lci_lca = round(
+            (float(rates['lci_lca_85_cdi']) / float(rates['cdi_over'])) * 100,
+            2
+        )
+
+    return {
+        'selic': selic,
+        'cdi': cdi,
+        'ipca': ipca,
+        'tr': tr,
+        'taxa_custodia': 0.20,
+        'tesouro_prefixado_nominal': _rate_value(rates, 'tesouro_prefixado_nominal', None),
+        'tesouro_ipca_mais': _rate_value(rates, 'tesouro_ipca_mais', 6.5),
+        'taxa_admin_fundo_di': _rate_value(rates, 'taxa_admin_fundo_di', 0.25),
+        'rentabilidade_cdb': rentabilidade_cdb,
+        'rentabilidade_fundo_di': rentabilidade_fundo_di,
+        'rentabilidade_lci_lca': rentabilidade_lci_lca,
+        'poupanca_mensal': poupanca_mensal
+    }
+
+
+def _ler_taxas(caminho):
+    with open(caminho, 'r', encoding='utf-8') as fp:
+        taxas = json.load(fp)
+    return taxas, montar_parametros_padrao(taxas)
+
+
+class CarregadorTaxas:
+    """
+    Mantém em memória as taxas lidas do arquivo e os parâmetros derivados.
+
+    A cada consulta só verifica mtime e tamanho do arquivo (CacheArquivo); o
+    JSON é relido apenas quando um deles muda, e o novo estado é trocado de
+    uma vez. O script de atualização grava com temp-file-e-rename, então o
+    arquivo nunca é lido pela metade.
+    """
+
+    def __init__(self, caminho):
+        self._arquivo = CacheArquivo(caminho, _ler_taxas, padrao=({}, montar_parametros_padrao({})))
+
+    @property
+    def recargas(self):
+        return self._arquivo.recargas
+
+    def obter(self):
+        """Retorna o TaxasCarregadas atual, recarregando se o arquivo mudou."""
+        versao, (taxas, parametros_padrao) = self._arquivo.obter_com_versao()
+        return TaxasCarregadas(versao, taxas, parametros_padrao)
+
+
+_carregadores = {}
+_carregadores_lock = threading.Lock()
+
+
+def obter_taxas():
+    """Retorna as taxas em memória da aplicação atual (data/taxas.json)."""
+    caminho = Path(current_app.root_path).parent / 'data' / 'taxas.json'
+    carregador = _carregadores.get(caminho)
+    if carregador is None:
+        with _carregadores_lock:
+            carregador = _carregadores.setdefault(caminho, CarregadorTaxas(caminho))
+    return carregador.obter()
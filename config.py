@@ -19,20 +19,52 @@ class Config:
     # Configurações de atualização do Focus
     FOCUS_UPDATE_DAY = 1  # Segunda-feira (0=Monday)
     FOCUS_UPDATE_TIME = '09:00'  # 9h da manhã
+    FOCUS_CACHE_TTL = int(os.environ.get('FOCUS_CACHE_TTL', 3600))  # Segundos em cache no processo
+    FOCUS_HISTORICO_POR_PAGINA_MAX = 500  # Pontos por página em /api/focus/history
     
     # Configurações do BCB
     BCB_FOCUS_URL = 'https://www.bcb.gov.br/publicacoes/focus'
     BCB_FOCUS_EMAIL = 'focus@bcb.gov.br'
+    BCB_EXPECTATIVAS_URL = os.environ.get('BCB_EXPECTATIVAS_URL')  # Outra URL OData (ex.: servidor de fixtures); None = API oficial
+    FOCUS_JANELA_INICIAL_DIAS = int(os.environ.get('FOCUS_JANELA_INICIAL_DIAS', 730))  # Histórico baixado com o banco vazio
+    FOCUS_SOBREPOSICAO_DIAS = 7  # Dias antes do último snapshot gravado que são baixados de novo
+    SGS_HISTORICO_PATH = os.environ.get('SGS_HISTORICO_PATH')  # Séries do SGS para o backtest; padrão: data/sgs
     
     # Configurações de cálculo
     CUSTODIA_TESOURO_ANUAL = 0.002  # 0,2% ao ano
     SELIC_TAX = 0.10  # Taxa aproximada CDI = Selic - 0,10%
+    SIMULACAO_LOTE_MAX = int(os.environ.get('SIMULACAO_LOTE_MAX', 1000))  # Cenários por chamada ao lote
+    EVOLUCAO_PONTOS_MAX = 1200  # Meses por consulta em /api/evolucao
+    SENSIBILIDADE_CELULAS_MAX = int(os.environ.get('SENSIBILIDADE_CELULAS_MAX', 40000))  # Células por grade de sensibilidade
+    MONTE_CARLO_TRAJETORIAS_MAX = int(os.environ.get('MONTE_CARLO_TRAJETORIAS_MAX', 50000))  # Por chamada ao Monte Carlo
+    LIBERDADE_CENARIOS_MAX = int(os.environ.get('LIBERDADE_CENARIOS_MAX', 10000))  # Cenários por chamada à tabela da Liberdade Financeira
+    MONTE_CARLO_BLOCO_MB = int(os.environ.get('MONTE_CARLO_BLOCO_MB', 64))  # Memória de trabalho de cada bloco de trajetórias
+    SIMULACAO_CACHE_ITENS = int(os.environ.get('SIMULACAO_CACHE_ITENS', 256))  # Resultados guardados em memória
+    SIMULACAO_CACHE_MB = int(os.environ.get('SIMULACAO_CACHE_MB', 64))  # Memória máxima desses resultados
+    SIMULACAO_CACHE_TTL = int(os.environ.get('SIMULACAO_CACHE_TTL', 86400))  # Segundos por resultado
+    
+    # Backend dos caches: 'memoria' (por processo), 'sqlite' (compartilhado na
+    # máquina) ou 'redis' (compartilhado entre máquinas)
+    CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'memoria')
+    CACHE_SQLITE_PATH = os.environ.get('CACHE_SQLITE_PATH')  # Padrão: instance/cache.sqlite3
+    CACHE_REDIS_URL = os.environ.get('CACHE_REDIS_URL') or os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
+    CACHE_REDIS_CLIENTE = None  # Cliente já criado (ex.: ClienteRedisMemoria em testes); requer o pacote redis se None
+    
+    # Compressão das respostas JSON
+    COMPRESSAO_MIN_BYTES = 1024  # Respostas menores seguem sem compressão
+    COMPRESSAO_NIVEL_GZIP = 6
+    COMPRESSAO_NIVEL_BROTLI = 5
 
 class DevelopmentConfig(Config):
     """Configuração para desenvolvimento"""
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = 'sqlite:///comparador.db'
 
+class TestingConfig(Config):
+    """Configuração dos testes automatizados (banco em memória)"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
 class ProductionConfig(Config):
     """Configuração para produção"""
     DEBUG = False
@@ -44,6 +76,7 @@ class ProductionConfig(Config):
 
 config = {
     'development': DevelopmentConfig,
+    'testing': TestingConfig,
     'production': ProductionConfig,
     'default': DevelopmentConfig
 }
@@ -0,0 +1,93 @@
+"""Normaliza as projeções do Focus em focus_projections
+
+Move as colunas fixas de focus_data (ipca_2025 ... cambio_2028) para a tabela
+focus_projections, com uma linha por (snapshot_date, indicator, reference_year).
+
+Bancos criados por db.create_all() com o modelo novo já têm a tabela e não
+têm as colunas antigas; a migração verifica o que existe antes de agir.
+
+Revision ID: 3c9d2f1a7b10
+Revises:
+Create Date: 2026-10-17 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3c9d2f1a7b10'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+INDICADORES = ('ipca', 'selic', 'pib', 'cambio')
+ANOS_ANTIGOS = (2025, 2026, 2027, 2028)
+COLUNAS_ANTIGAS = [f'{indicador}_{ano}' for indicador in INDICADORES for ano in ANOS_ANTIGOS]
+
+
+def _inspetor():
+    return sa.inspect(op.get_bind())
+
+
+def upgrade():
+    inspetor = _inspetor()
+
+    if not inspetor.has_table('focus_projections'):
+        op.create_table(
+            'focus_projections',
+            sa.Column('id', sa.Integer(), nullable=False),
+            sa.Column('snapshot_date', sa.Date(), nullable=False),
+            sa.Column('indicator', sa.String(length=20), nullable=False),
+            sa.Column('reference_year', sa.Integer(), nullable=False),
+            sa.Column('median', sa.Float(), nullable=True),
+            sa.Column('mean', sa.Float(), nullable=True),
+            sa.Column('stdev', sa.Float(), nullable=True),
+            sa.Column('respondents', sa.Integer(), nullable=True),
+            sa.ForeignKeyConstraint(['snapshot_date'], ['focus_data.date'], ondelete='CASCADE'),
+            sa.PrimaryKeyConstraint('id'),
+            sa.UniqueConstraint('snapshot_date', 'indicator', 'reference_year', name='uq_focus_projections_snapshot')
+        )
+        op.create_index(
+            'ix_focus_projections_indicator_year',
+            'focus_projections',
+            ['indicator', 'reference_year', 'snapshot_date']
+        )
+
+    colunas = {coluna['name'] for coluna in inspetor.get_columns('focus_data')}
+    antigas = [coluna for coluna in COLUNAS_ANTIGAS if coluna in colunas]
+    if not antigas:
+        return
+
+    # Copia cada coluna larga como uma linha (snapshot, indicador, ano)
+    for coluna in antigas:
+        indicador, ano = coluna.rsplit('_', 1)
+        op.execute(
+            f"INSERT INTO focus_projections (snapshot_date, indicator, reference_year, median) "
+            f"SELECT date, '{indicador}', {int(ano)}, {coluna} FROM focus_data "
+            f"WHERE {coluna} IS NOT NULL AND NOT EXISTS ("
+            f" SELECT 1 FROM focus_projections p WHERE p.snapshot_date = focus_data.date"
+            f" AND p.indicator = '{indicador}' AND p.reference_year = {int(ano)})"
+        )
+
+    with op.batch_alter_table('focus_data') as batch_op:
+        for coluna in antigas:
+            batch_op.drop_column(coluna)
+
+
+def downgrade():
+    with op.batch_alter_table('focus_data') as batch_op:
+        for coluna in COLUNAS_ANTIGAS:
+            batch_op.add_column(sa.Column(coluna, sa.Float(), nullable=True))
+
+    # Só os anos que existiam no layout antigo voltam para as colunas
+    for coluna in COLUNAS_ANTIGAS:
+        indicador, ano = coluna.rsplit('_', 1)
+        op.execute(
+            f"UPDATE focus_data SET {coluna} = ("
+            f" SELECT median FROM focus_projections p WHERE p.snapshot_date = focus_data.date"
+            f" AND p.indicator = '{indicador}' AND p.reference_year = {int(ano)})"
+        )
+
+    op.drop_index('ix_focus_projections_indicator_year', table_name='focus_projections')
+    op.drop_table('focus_projections')
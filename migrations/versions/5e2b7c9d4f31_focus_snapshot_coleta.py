@@ -0,0 +1,34 @@
+"""Marca os snapshots do Focus gravados na data da coleta (focus_data.is_collection)
+
+Os agregados do histórico só contam datas de pesquisa; o snapshot que o
+scraper grava no dia da coleta fica de fora.
+
+Revision ID: 5e2b7c9d4f31
+Revises: 8a41e6b0c2d7
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5e2b7c9d4f31'
+down_revision = '8a41e6b0c2d7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() não altera tabelas existentes, mas pode ter criado focus_data já com a coluna
+    colunas = {coluna['name'] for coluna in sa.inspect(op.get_bind()).get_columns('focus_data')}
+    if 'is_collection' in colunas:
+        return
+
+    with op.batch_alter_table('focus_data') as batch_op:
+        batch_op.add_column(sa.Column('is_collection', sa.Boolean(), nullable=False, server_default=sa.false()))
+
+
+def downgrade():
+    with op.batch_alter_table('focus_data') as batch_op:
+        batch_op.drop_column('is_collection')
@@ -0,0 +1,45 @@
+"""Agregados do histórico de projeções do Focus (focus_aggregates)
+
+Revision ID: 8a41e6b0c2d7
+Revises: 3c9d2f1a7b10
+Create Date: 2026-10-17 14:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8a41e6b0c2d7'
+down_revision = '3c9d2f1a7b10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # db.create_all() pode ter criado a tabela antes da migração
+    if sa.inspect(op.get_bind()).has_table('focus_aggregates'):
+        return
+
+    op.create_table(
+        'focus_aggregates',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('indicator', sa.String(length=20), nullable=False),
+        sa.Column('reference_year', sa.Integer(), nullable=False),
+        sa.Column('granularity', sa.String(length=10), nullable=False),
+        sa.Column('period_start', sa.Date(), nullable=False),
+        sa.Column('median_last', sa.Float(), nullable=True),
+        sa.Column('median_mean', sa.Float(), nullable=True),
+        sa.Column('median_min', sa.Float(), nullable=True),
+        sa.Column('median_max', sa.Float(), nullable=True),
+        sa.Column('samples', sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint(
+            'indicator', 'reference_year', 'granularity', 'period_start',
+            name='uq_focus_aggregates_periodo'
+        )
+    )
+
+
+def downgrade():
+    op.drop_table('focus_aggregates')
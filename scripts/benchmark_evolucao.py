@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark da evolução mensal: laço em Python (implementação anterior)
+versus o núcleo vetorizado em NumPy de `app.calculations`.
+
+Cada "requisição" calcula a evolução dos sete produtos do simulador
+padrão: no laço, um produto por vez; no NumPy, os sete juntos em
+calcular_evolucoes_mensais. Antes de medir, o script confere que as
+implementações produzem exatamente os mesmos valores (ao centavo).
+
+Uso:
+    python scripts/benchmark_evolucao.py
+    python scripts/benchmark_evolucao.py --meses 12 120 600 --duracao 2
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.calculations import (  # noqa: E402
+    INVESTIMENTOS_ISENTOS,
+    calcular_evolucao_mensal,
+    calcular_evolucoes_mensais,
+    get_ir_rate,
+)
+
+PARAMETROS = {
+    "selic": 14.75,
+    "cdi": 14.65,
+    "ipca": 3.81,
+    "taxa_custodia": 0.20,
+    "taxa_admin_fundo_di": 0.25,
+}
+
+# (investimento_type, rentabilidade_type, rentabilidade_value, taxa_custos_extra)
+PRODUTOS = [
+    ("lci", "cdi", 85.0, 0.0),
+    ("cdb", "cdi", 100.0, 0.0),
+    ("tesouro_selic", "prefixado", 14.75, 0.0),
+    ("fundo_di", "cdi", 98.0, 0.0025),
+    ("tesouro_prefixado", "prefixado", 13.0, 0.0),
+    ("tesouro_ipca", "ipca_mais", 7.2, 0.0),
+    ("poupanca", "prefixado", 8.37, 0.0),
+]
+
+
+def evolucao_mensal_laco(
+    investimento_type,
+    rentabilidade_type,
+    rentabilidade_value,
+    valor_inicial,
+    aportes_mensais,
+    meses,
+    parametros,
+    incluir_ir=True,
+    ajustar_inflacao_flag=True,
+    tax_regime="vigente",
+    taxa_custos_extra=0.0,
+):
+    """Cópia da implementação original (mês a mês) usada como referência."""
+    selic = parametros.get("selic", 0.0)
+    cdi = parametros.get("cdi", selic)
+    ipca = parametros.get("ipca", 0.0)
+    taxa_custodia = parametros.get("taxa_custodia", 0.2) / 100
+
+    if rentabilidade_type == "prefixado":
+        taxa_anual = rentabilidade_value / 100
+    elif rentabilidade_type == "cdi":
+        taxa_anual = (cdi / 100 * rentabilidade_value) / 100
+    elif rentabilidade_type == "ipca_mais":
+        taxa_anual = (1 + ipca / 100) * (1 + rentabilidade_value / 100) - 1
+    else:
+        taxa_anual = 0
+
+    if taxa_custos_extra > 0:
+        taxa_anual = taxa_anual - taxa_custos_extra
+
+    taxa_mensal = (1 + taxa_anual) ** (1 / 12) - 1
+
+    evolucao = []
+    valor_atual = valor_inicial
+    for mes in range(1, meses + 1):
+        if aportes_mensais > 0:
+            valor_atual = valor_atual * (1 + taxa_mensal) + aportes_mensais
+        else:
+            valor_atual = valor_atual * (1 + taxa_mensal)
+
+        custos = 0
+        if investimento_type in ["tesouro_selic", "tesouro_ipca", "tesouro_prefixado"]:
+            custos = valor_atual * taxa_custodia * (mes / 12)
+
+        total_investido_mes = valor_inicial + (aportes_mensais * mes)
+        ganho_bruto = valor_atual - total_investido_mes
+
+        valor_ir = 0
+        if incluir_ir and ganho_bruto > 0:
+            aliquota = get_ir_rate(mes * 30, investimento_type=investimento_type)
+            if investimento_type not in INVESTIMENTOS_ISENTOS:
+                valor_ir = ganho_bruto * aliquota
+
+        evolucao.append({"mes": mes, "valor_liquido": round(valor_atual - valor_ir - custos, 2)})
+
+    return evolucao
+
+
+def simular_requisicao(funcao: Callable, meses: int) -> List[List[Dict]]:
+    """Uma requisição do simulador: evolução dos sete produtos."""
+    return [
+        funcao(
+            investimento_type=investimento,
+            rentabilidade_type=tipo,
+            rentabilidade_value=valor,
+            valor_inicial=10000.0,
+            aportes_mensais=1000.0,
+            meses=meses,
+            parametros=PARAMETROS,
+            taxa_custos_extra=extra,
+        )
+        for investimento, tipo, valor, extra in PRODUTOS
+    ]
+
+
+def simular_requisicao_numpy(meses: int) -> List[List[Dict]]:
+    """A mesma requisição, com os sete produtos avaliados juntos."""
+    produtos = [
+        {
+            "investimento_type": investimento,
+            "rentabilidade_type": tipo,
+            "rentabilidade_value": valor,
+            "taxa_custos_extra": extra,
+        }
+        for investimento, tipo, valor, extra in PRODUTOS
+    ]
+    return calcular_evolucoes_mensais(produtos, 10000.0, 1000.0, meses, PARAMETROS)
+
+
+def requisicoes_por_segundo(requisicao: Callable, meses: int, duracao: float) -> float:
+    execucoes = 0
+    inicio = time.perf_counter()
+    while True:
+        requisicao(meses)
+        execucoes += 1
+        decorrido = time.perf_counter() - inicio
+        if decorrido >= duracao:
+            return execucoes / decorrido
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark da evolução mensal.")
+    parser.add_argument("--meses", type=int, nargs="+", default=[12, 120, 600])
+    parser.add_argument("--duracao", type=float, default=1.0, help="Segundos por medição.")
+    args = parser.parse_args()
+
+    for meses in args.meses:
+        referencia = simular_requisicao(evolucao_mensal_laco, meses)
+        if referencia != simular_requisicao(calcular_evolucao_mensal, meses) or referencia != simular_requisicao_numpy(meses):
+            raise SystemExit(f"Divergência entre implementações para {meses} meses")
+
+    print(f"{'meses':>6} {'laço (req/s)':>14} {'NumPy (req/s)':>14} {'ganho':>7}")
+    for meses in args.meses:
+        antes = requisicoes_por_segundo(lambda m: simular_requisicao(evolucao_mensal_laco, m), meses, args.duracao)
+        depois = requisicoes_por_segundo(simular_requisicao_numpy, meses, args.duracao)
+        print(f"{meses:>6} {antes:>14.1f} {depois:>14.1f} {depois / antes:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark da redução das expectativas anuais do Focus: o processamento
+anterior (um `str.contains` por apelido de indicador sobre a tabela inteira
+e um filtro por ano) versus `preparar_projecoes` + `ultimas_projecoes`
+de `app.focus_scraper` (categorias, uma ordenação e um groupby).
+
+A tabela sintética imita ExpectativasMercadoAnuais completa: vários
+indicadores além dos quatro usados, anos de referência como texto e uma
+linha por dia de pesquisa. Antes de medir, o script confere que as duas
+implementações chegam às mesmas medianas.
+
+Uso:
+    python scripts/benchmark_focus_reducao.py
+    python scripts/benchmark_focus_reducao.py --linhas 500000 3000000 --repeticoes 3
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import date
+from typing import Callable, Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.focus_scraper import preparar_projecoes, ultimas_projecoes  # noqa: E402
+
+ANO_ATUAL = date.today().year
+ANOS = [ANO_ATUAL, ANO_ATUAL + 1, ANO_ATUAL + 2, ANO_ATUAL + 3]
+
+# Os quatro indicadores usados e outros publicados no mesmo endpoint
+# (nenhum contém os apelidos abaixo, para que os dois lados sejam comparáveis)
+INDICADORES = [
+    "IPCA", "Selic", "PIB Total", "Câmbio",
+    "IGP-M", "IGP-DI", "Resultado primário", "Resultado nominal",
+    "Dívida líquida do setor público", "Balança comercial",
+    "Conta corrente", "Investimento direto no país", "Taxa de desocupação",
+]
+
+# Apelidos do processamento anterior
+APELIDOS = {
+    "IPCA": "ipca",
+    "Selic": "selic",
+    "PIB Total": "pib",
+    "PIB": "pib",
+    "Câmbio": "cambio",
+    "Câmbio R$/US$": "cambio",
+}
+
+
+def tabela_sintetica(linhas: int, semente: int = 7) -> pd.DataFrame:
+    """Linhas ordenadas pela data da pesquisa, como a consulta com $orderby."""
+    rng = np.random.default_rng(semente)
+    anos_ref = np.arange(2000, ANO_ATUAL + 5)
+    por_data = len(INDICADORES) * 5
+    datas = pd.bdate_range(end=pd.Timestamp(date.today()), periods=max(linhas // por_data, 1))
+
+    indice_data = np.sort(rng.integers(0, len(datas), linhas))
+    data = datas[indice_data]
+    # Cada pesquisa projeta o próprio ano e os seguintes
+    ano_ref = np.minimum(data.year.to_numpy() + rng.integers(0, 5, linhas), anos_ref[-1])
+
+    return pd.DataFrame({
+        "Indicador": np.asarray(INDICADORES, dtype=object)[rng.integers(0, len(INDICADORES), linhas)],
+        "Data": data,
+        "DataReferencia": ano_ref.astype(str).astype(object),
+        "Media": rng.normal(4.0, 1.0, linhas).round(4),
+        "Mediana": rng.normal(4.0, 1.0, linhas).round(4),
+        "DesvioPadrao": rng.uniform(0.1, 0.9, linhas).round(4),
+        "numeroRespondentes": rng.integers(10, 120, linhas),
+        "baseCalculo": np.zeros(linhas, dtype=np.int64),
+    })
+
+
+def reducao_anterior(df: pd.DataFrame) -> Dict[str, Dict[int, float]]:
+    """Processamento anterior: um str.contains por apelido e um filtro por ano."""
+    df = df.copy()
+    df["DataReferencia"] = pd.to_datetime(df["DataReferencia"], errors="coerce")
+    dados: Dict[str, Dict[int, float]] = {chave: {} for chave in APELIDOS.values()}
+    for nome, chave in APELIDOS.items():
+        df_ind = df[df["Indicador"].str.contains(nome, case=False, na=False)]
+        if df_ind.empty:
+            continue
+        for ano in ANOS:
+            df_ano = df_ind[df_ind["DataReferencia"].dt.year == ano]
+            if not df_ano.empty:
+                linha = df_ano.iloc[-1]
+                if pd.notna(linha["Mediana"]):
+                    dados[chave][ano] = float(linha["Mediana"])
+    return dados
+
+
+def reducao_atual(df: pd.DataFrame) -> Dict[str, Dict[int, float]]:
+    ultimas = ultimas_projecoes(preparar_projecoes(df), ANOS)
+    return {
+        chave: {ano: valores["median"] for ano, valores in por_ano.items()}
+        for chave, por_ano in ultimas.items()
+    }
+
+
+def medir(funcao: Callable[[pd.DataFrame], object], df: pd.DataFrame, repeticoes: int) -> Tuple[float, float]:
+    """Melhor tempo (s) e pico de memória alocada (MB) de `repeticoes` execuções."""
+    tempos: List[float] = []
+    for _ in range(repeticoes):
+        gc.collect()
+        inicio = time.perf_counter()
+        funcao(df)
+        tempos.append(time.perf_counter() - inicio)
+
+    gc.collect()
+    tracemalloc.start()
+    funcao(df)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(tempos), pico / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--linhas", type=int, nargs="+", default=[500_000, 3_000_000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'linhas':>10} {'anterior (s)':>13} {'atual (s)':>10} {'ganho':>7} {'mem. ant. (MB)':>15} {'mem. atual (MB)':>16}")
+    for linhas in args.linhas:
+        df = tabela_sintetica(linhas)
+
+        anterior, atual = reducao_anterior(df), reducao_atual(df)
+        if anterior != atual:
+            raise SystemExit(f"Resultados diferentes com {linhas} linhas:\n{anterior}\n{atual}")
+
+        tempo_ant, mem_ant = medir(reducao_anterior, df, args.repeticoes)
+        tempo_atual, mem_atual = medir(reducao_atual, df, args.repeticoes)
+        print(
+            f"{linhas:>10} {tempo_ant:>13.3f} {tempo_atual:>10.3f} {tempo_ant / tempo_atual:>6.1f}x"
+            f" {mem_ant:>15.1f} {mem_atual:>16.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Servidor local de fixtures da API de expectativas (Olinda/BCB).
+
+Grava as respostas reais uma vez (--gravar) e depois as reproduz sem acesso
+à rede, para rodar o scraper do Focus contra dados conhecidos. Cada
+requisição (caminho + query string, incluindo $filter/$select) vira um
+arquivo JSON na pasta de fixtures; requisições não gravadas respondem 404
+com a URL pedida, o que mostra quando o scraper mudou a consulta.
+
+O limite inferior de data do $filter (`Data ge AAAA-MM-DD`, que depende do
+dia e do último snapshot gravado) não entra na chave da fixture: a resposta
+gravada é reproduzida só com as linhas a partir da data pedida. Grave com o
+banco vazio (janela inicial completa) para cobrir consultas posteriores.
+
+A origem do BCB nas respostas (ex.: @odata.context do documento de serviço)
+é trocada pela do servidor local, então a python-bcb busca o $metadata
+também nas fixtures.
+
+Uso:
+    python scripts/focus_fixture_server.py --pasta fixtures/focus --gravar
+    python scripts/focus_fixture_server.py --pasta fixtures/focus
+
+    BCB_EXPECTATIVAS_URL=http://127.0.0.1:8765/olinda/servico/Expectativas/versao/v1/odata/ \\
+        python tasks/update_focus.py
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import urllib.error
+import urllib.parse
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+ORIGEM_BCB = "https://olinda.bcb.gov.br"
+MARCADOR_ORIGEM = "{{ORIGEM}}"
+
+# Limite inferior de data no $filter (ex.: "Data ge 2025-10-01")
+_FILTRO_DATA = re.compile(r"\bData (ge|gt) (\d{4}-\d{2}-\d{2})\b")
+
+
+def limite_data(requisicao: str) -> Optional[Tuple[str, str]]:
+    """Operador e data do limite inferior de Data no $filter, se houver."""
+    consulta = urllib.parse.parse_qs(urllib.parse.urlsplit(requisicao).query)
+    encontrado = _FILTRO_DATA.search(consulta.get("$filter", [""])[0])
+    return encontrado.groups() if encontrado else None
+
+
+def chave_requisicao(requisicao: str) -> str:
+    """Caminho + parâmetros decodificados, com o limite de Data trocado por um marcador."""
+    partes = urllib.parse.urlsplit(requisicao)
+    parametros = urllib.parse.parse_qsl(partes.query, keep_blank_values=True)
+    normalizados = [
+        (nome, _FILTRO_DATA.sub(r"Data \1 {DATA}", valor) if nome == "$filter" else valor)
+        for nome, valor in parametros
+    ]
+    return partes.path + "?" + "&".join(f"{nome}={valor}" for nome, valor in normalizados)
+
+
+def nome_fixture(requisicao: str) -> str:
+    return hashlib.sha256(chave_requisicao(requisicao).encode("utf-8")).hexdigest()[:24] + ".json"
+
+
+def aplicar_limite_data(corpo: str, limite: Optional[Tuple[str, str]]) -> str:
+    """Mantém só as linhas da resposta gravada a partir do limite de data pedido."""
+    if limite is None:
+        return corpo
+    operador, data = limite
+    documento = json.loads(corpo)
+    documento["value"] = [
+        linha for linha in documento.get("value", [])
+        if (linha.get("Data", "") > data if operador == "gt" else linha.get("Data", "") >= data)
+    ]
+    return json.dumps(documento, ensure_ascii=False)
+
+
+def criar_handler(pasta: str, origem: str, gravar: bool):
+    class FixtureHandler(BaseHTTPRequestHandler):
+        def _origem_local(self) -> str:
+            return f"http://{self.headers.get('Host') or '%s:%s' % self.server.server_address[:2]}"
+
+        def _buscar_origem(self) -> dict:
+            requisicao = urllib.request.Request(
+                origem + self.path,
+                headers={"OData-Version": "4.0", "OData-MaxVersion": "4.0"},
+            )
+            with urllib.request.urlopen(requisicao, timeout=120) as resposta:
+                return {
+                    "requisicao": self.path,
+                    "content_type": resposta.headers.get("Content-Type", "application/json"),
+                    "corpo": resposta.read().decode("utf-8").replace(origem, MARCADOR_ORIGEM),
+                }
+
+        def do_GET(self):
+            caminho = os.path.join(pasta, nome_fixture(self.path))
+            fixture = None
+            if os.path.exists(caminho):
+                with open(caminho, "r", encoding="utf-8") as fp:
+                    fixture = json.load(fp)
+            elif gravar:
+                try:
+                    fixture = self._buscar_origem()
+                except urllib.error.HTTPError as erro:
+                    self.send_error(erro.code, f"Origem respondeu {erro.code} para {self.path}")
+                    return
+                with open(caminho, "w", encoding="utf-8") as fp:
+                    json.dump(fixture, fp, ensure_ascii=False, indent=1)
+
+            if fixture is None:
+                self.send_error(404, f"Requisição não gravada: {self.path}")
+                return
+
+            corpo = aplicar_limite_data(fixture["corpo"], limite_data(self.path))
+            corpo = corpo.replace(MARCADOR_ORIGEM, self._origem_local()).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", fixture["content_type"])
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+    return FixtureHandler
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Grava e reproduz respostas da API de expectativas do BCB.")
+    parser.add_argument("--pasta", required=True, help="Pasta das fixtures (criada se não existir).")
+    parser.add_argument("--gravar", action="store_true", help="Busca na origem o que ainda não foi gravado.")
+    parser.add_argument("--origem", default=ORIGEM_BCB)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--porta", type=int, default=8765)
+    args = parser.parse_args()
+
+    os.makedirs(args.pasta, exist_ok=True)
+    servidor = ThreadingHTTPServer(
+        (args.host, args.porta),
+        criar_handler(args.pasta, args.origem.rstrip("/"), args.gravar),
+    )
+    modo = "gravando" if args.gravar else "reproduzindo"
+    print(f"Fixtures em {args.pasta} ({modo}): http://{args.host}:{args.porta}/olinda/servico/Expectativas/versao/v1/odata/")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
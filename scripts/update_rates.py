@@ -8,20 +8,31 @@ um arquivo JSON em `data/taxas.json` com todas as informações mais recentes.
 Além disso, calcula algumas métricas derivadas (rentabilidades de CDB,
 LCI/LCA, fundos DI e poupança) com base nas taxas coletadas.
 
+As séries são buscadas em paralelo por uma sessão HTTP com keep-alive,
+com novas tentativas (backoff exponencial limitado) e um prazo total para
+a execução. A latência de cada série vai para o log e para o JSON.
+
 Uso:
     python scripts/update_rates.py             # roda apenas no dia útil pós-Copom
     python scripts/update_rates.py --force     # força a atualização em qualquer dia
+    python scripts/update_rates.py --force --base-url http://127.0.0.1:8000/dados/serie --prazo 5
 """
 from __future__ import annotations
 
 import argparse
 import json
 import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from pathlib import Path
 from typing import Dict, Optional
 
 import requests
+from requests.adapters import HTTPAdapter
 
 
 # Datas oficiais das reuniões do Copom (2025-2026). Sempre revisitar
@@ -46,6 +57,18 @@ SGS_SERIES = {
     "tr_mensal": 226,
 }
 
+# Base da API SGS; pode apontar para um servidor local em testes
+SGS_BASE_URL = os.environ.get("SGS_BASE_URL", "https://api.bcb.gov.br/dados/serie")
+
+REQUEST_TIMEOUT = 10  # Segundos por tentativa
+MAX_ATTEMPTS = 3
+BACKOFF_BASE = 0.5  # Espera antes da 2ª tentativa; dobra a cada nova tentativa
+BACKOFF_MAX = 4.0
+RUN_DEADLINE = 30.0  # Prazo total para buscar todas as séries
+
+# Respostas que valem nova tentativa (limite de requisições e falhas do servidor)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
 OUTPUT_PATH = (
     Path(__file__)
     .resolve()
@@ -72,23 +95,124 @@ def should_update_today(today: date) -> bool:
     return any(today == meeting + timedelta(days=1) for meeting in COPOM_DATES)
 
 
-def fetch_sgs_series(series_id: int) -> Optional[float]:
-    """Busca a última observação de uma série SGS do Banco Central."""
-    url = (
-        f"https://api.bcb.gov.br/dados/serie/bcdata.sgs.{series_id}/"
-        "dados/ultimos/1?formato=json"
-    )
+@dataclass
+class SeriesResult:
+    """Resultado da busca de uma série: valor (ou None), latência e tentativas."""
+
+    value: Optional[float]
+    latency: float
+    attempts: int
+    error: Optional[str] = None
+
+
+class _RetryableError(Exception):
+    pass
+
+
+def create_session(pool_size: int = len(SGS_SERIES)) -> requests.Session:
+    """Sessão com pool de conexões (keep-alive) dimensionado para as threads."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def backoff_delay(attempt: int) -> float:
+    """Espera antes da tentativa seguinte à `attempt` (1, 2, ...)."""
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1))
+
+
+def _request_last_value(
+    session: requests.Session, url: str, timeout: float
+) -> Optional[float]:
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        if not data:
-            return None
-        valor = data[0]["valor"].replace(",", ".")
-        return float(valor)
-    except Exception as exc:  # pragma: no cover - tratamos genericamente
-        logging.exception("Falha ao buscar série %s: %s", series_id, exc)
+        response = session.get(url, timeout=timeout)
+    except (requests.ConnectionError, requests.Timeout) as exc:
+        raise _RetryableError(str(exc)) from exc
+    if response.status_code in RETRY_STATUS:
+        raise _RetryableError(f"HTTP {response.status_code}")
+    response.raise_for_status()
+    data = response.json()
+    if not data:
         return None
+    valor = data[0]["valor"].replace(",", ".")
+    return float(valor)
+
+
+def fetch_sgs_series(
+    series_id: int,
+    session: Optional[requests.Session] = None,
+    base_url: str = SGS_BASE_URL,
+    deadline: Optional[float] = None,
+) -> SeriesResult:
+    """
+    Busca a última observação de uma série SGS do Banco Central.
+
+    Falhas de conexão, timeouts e respostas 429/5xx são tentadas de novo até
+    MAX_ATTEMPTS vezes, com backoff exponencial, sem passar de `deadline`
+    (instante em time.monotonic()).
+    """
+    url = f"{base_url.rstrip('/')}/bcdata.sgs.{series_id}/dados/ultimos/1?formato=json"
+    session = session or create_session(1)
+    start = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        timeout = REQUEST_TIMEOUT
+        if deadline is not None:
+            timeout = min(timeout, deadline - time.monotonic())
+        try:
+            if timeout <= 0:
+                raise TimeoutError("prazo da execução esgotado")
+            value = _request_last_value(session, url, timeout)
+            return SeriesResult(value, time.monotonic() - start, attempt)
+        except _RetryableError as exc:
+            delay = backoff_delay(attempt)
+            out_of_time = deadline is not None and time.monotonic() + delay >= deadline
+            if attempt >= MAX_ATTEMPTS or out_of_time:
+                logging.warning("Falha ao buscar série %s após %s tentativa(s): %s", series_id, attempt, exc)
+                return SeriesResult(None, time.monotonic() - start, attempt, str(exc))
+            logging.info("Série %s: %s; nova tentativa em %.1fs", series_id, exc, delay)
+            time.sleep(delay)
+        except Exception as exc:  # pragma: no cover - tratamos genericamente
+            logging.exception("Falha ao buscar série %s: %s", series_id, exc)
+            return SeriesResult(None, time.monotonic() - start, attempt, str(exc))
+
+
+def fetch_all_series(
+    series: Dict[str, int] = SGS_SERIES,
+    base_url: str = SGS_BASE_URL,
+    run_deadline: float = RUN_DEADLINE,
+    max_workers: Optional[int] = None,
+) -> Dict[str, SeriesResult]:
+    """
+    Busca as séries em paralelo, compartilhando uma sessão. Séries que não
+    terminam dentro de `run_deadline` segundos ficam com valor None.
+    """
+    max_workers = max_workers or len(series)
+    start = time.monotonic()
+    deadline = start + run_deadline
+    results: Dict[str, SeriesResult] = {}
+
+    with create_session(max_workers) as session:
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="sgs")
+        try:
+            futures = {
+                executor.submit(fetch_sgs_series, series_id, session, base_url, deadline): name
+                for name, series_id in series.items()
+            }
+            done, _ = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+            for future, name in futures.items():
+                if future in done:
+                    results[name] = future.result()
+                else:
+                    logging.warning("Série %s não terminou dentro do prazo de %.0fs.", name, run_deadline)
+                    results[name] = SeriesResult(None, time.monotonic() - start, 0, "prazo esgotado")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    return results
 
 
 def compute_derived_metrics(rates: Dict[str, Optional[float]]) -> Dict[str, float]:
@@ -115,10 +239,27 @@ def compute_derived_metrics(rates: Dict[str, Optional[float]]) -> Dict[str, floa
 
 
 def write_rates(payload: Dict[str, Optional[float]]) -> None:
-    """Grava o dicionário de taxas em JSON."""
+    """
+    Grava o dicionário de taxas em JSON de forma atômica.
+
+    O conteúdo vai primeiro para um arquivo temporário no mesmo diretório e
+    depois substitui o destino com os.replace, então a aplicação nunca lê
+    um arquivo pela metade.
+    """
     OUTPUT_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with OUTPUT_PATH.open("w", encoding="utf-8") as fp:
-        json.dump(payload, fp, ensure_ascii=False, indent=2)
+    fd, tmp_path = tempfile.mkstemp(
+        dir=OUTPUT_PATH.parent, prefix=".taxas-", suffix=".json.tmp"
+    )
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as fp:
+            json.dump(payload, fp, ensure_ascii=False, indent=2)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, OUTPUT_PATH)
+    except BaseException:
+        Path(tmp_path).unlink(missing_ok=True)
+        raise
 
 
 def configure_logging() -> None:
@@ -130,7 +271,11 @@ def configure_logging() -> None:
     )
 
 
-def main(force: bool = False) -> None:
+def main(
+    force: bool = False,
+    base_url: str = SGS_BASE_URL,
+    run_deadline: float = RUN_DEADLINE,
+) -> None:
     configure_logging()
 
     today = date.today()
@@ -142,9 +287,16 @@ def main(force: bool = False) -> None:
 
     rates: Dict[str, Optional[float]] = {"data_atualizacao": today.isoformat()}
 
+    start = time.monotonic()
+    results = fetch_all_series(SGS_SERIES, base_url, run_deadline)
     for name, series_id in SGS_SERIES.items():
-        rates[name] = fetch_sgs_series(series_id)
-        logging.info("Série %s (%s) -> %s", name, series_id, rates[name])
+        result = results[name]
+        rates[name] = result.value
+        logging.info(
+            "Série %s (%s) -> %s [%.0f ms, %s tentativa(s)]",
+            name, series_id, result.value, result.latency * 1000, result.attempts,
+        )
+    logging.info("Séries buscadas em %.0f ms.", (time.monotonic() - start) * 1000)
 
     derived = compute_derived_metrics(rates)
     rates.update(derived)
@@ -152,6 +304,7 @@ def main(force: bool = False) -> None:
     rates["fonte"] = {
         "bcb_sgs": "https://api.bcb.gov.br/dados",
         "atualizado_em": datetime.now().isoformat(timespec="seconds"),
+        "latencia_ms": {name: round(result.latency * 1000) for name, result in results.items()},
     }
 
     write_rates(rates)
@@ -165,7 +318,16 @@ if __name__ == "__main__":
         action="store_true",
         help="Ignora a verificação do calendário do Copom.",
     )
+    parser.add_argument(
+        "--base-url",
+        default=SGS_BASE_URL,
+        help="Base da API SGS (padrão: API do BCB ou a variável SGS_BASE_URL).",
+    )
+    parser.add_argument(
+        "--prazo",
+        type=float,
+        default=RUN_DEADLINE,
+        help="Prazo total, em segundos, para buscar todas as séries.",
+    )
     args = parser.parse_args()
-    main(force=args.force)
-
-
+    main(force=args.force, base_url=args.base_url, run_deadline=args.prazo)
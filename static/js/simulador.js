@@ -13,6 +13,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const canvasGrafico = document.getElementById('grafico-evolucao');
     const graficoContainer = document.querySelector('.grafico-container');
     let graficoEvolucao = null;
+    // Última resposta da simulação: reenviada ao servidor como If-None-Match
+    let ultimaSimulacao = null;
     
     const camposParametros = {
         selic: document.getElementById('param-selic'),
@@ -63,10 +65,35 @@ document.addEventListener('DOMContentLoaded', () => {
             parametros: coletarParametros(),
             incluir_ir: document.getElementById('chk-ir').checked,
             ajustar_inflacao: document.getElementById('chk-inflacao').checked,
-            tax_regime: obterTaxRegime()
+            tax_regime: obterTaxRegime(),
+            formato_evolucao: 'delta'
         };
     }
     
+    // Converte a evolução da resposta em {meses, series} (uma série de valores por produto).
+    // 'delta': diferenças em centavos inteiros; 'colunar': valores; sem formato: lista de objetos.
+    function decodificarEvolucao(dados, resultados) {
+        if (dados.formato_evolucao === 'delta' || dados.formato_evolucao === 'colunar') {
+            const series = resultados.map((resultado) => {
+                const valores = resultado.evolucao_mensal || [];
+                if (dados.formato_evolucao === 'colunar') {
+                    return valores;
+                }
+                let centavos = 0;
+                return valores.map((delta) => {
+                    centavos += delta;
+                    return centavos / 100;
+                });
+            });
+            return { meses: dados.meses || [], series };
+        }
+        
+        const series = resultados.map(r => (r.evolucao_mensal || []).map(e => e.valor_liquido));
+        const comEvolucao = resultados.find(r => Array.isArray(r.evolucao_mensal) && r.evolucao_mensal.length > 0);
+        const meses = comEvolucao ? comEvolucao.evolucao_mensal.map(e => e.mes) : [];
+        return { meses, series };
+    }
+    
     function validarEntrada(payload) {
         if (payload.valor_inicial <= 0) {
             alert('Informe um valor inicial maior que zero.');
@@ -148,25 +175,38 @@ document.addEventListener('DOMContentLoaded', () => {
         btnSimular.textContent = 'Calculando...';
         
         try {
+            const headers = {
+                'Content-Type': 'application/json'
+            };
+            if (ultimaSimulacao) {
+                headers['If-None-Match'] = ultimaSimulacao.etag;
+            }
+            
             const resposta = await fetch('/api/simular-renda-fixa', {
                 method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json'
-                },
+                headers,
                 body: JSON.stringify(payload)
             });
             
-            if (!resposta.ok) {
-                const erro = await resposta.json();
-                throw new Error(erro.error || 'Não foi possível realizar a simulação.');
+            let dados;
+            if (resposta.status === 304 && ultimaSimulacao) {
+                // Mesma entrada da simulação anterior: reaproveita o resultado
+                dados = ultimaSimulacao.dados;
+            } else {
+                if (!resposta.ok) {
+                    const erro = await resposta.json();
+                    throw new Error(erro.error || 'Não foi possível realizar a simulação.');
+                }
+                dados = await resposta.json();
+                const etag = resposta.headers.get('ETag');
+                ultimaSimulacao = etag ? { etag, dados } : null;
             }
             
-            const dados = await resposta.json();
             const resultados = dados.resultados || [];
             
             atualizarResumo(resultados);
             atualizarTabela(resultados);
-            atualizarGrafico(resultados);
+            atualizarGrafico(resultados, decodificarEvolucao(dados, resultados));
             tabelaDetalhes.style.display = 'none';
             
         } catch (erro) {
@@ -185,7 +225,7 @@ document.addEventListener('DOMContentLoaded', () => {
         });
     }
     
-    function atualizarGrafico(resultados) {
+    function atualizarGrafico(resultados, evolucao) {
         if (!canvasGrafico) return;
 
         if (graficoContainer) {
@@ -193,7 +233,8 @@ document.addEventListener('DOMContentLoaded', () => {
         }
         
         const ativosComEvolucao = resultados
-            .filter(r => Array.isArray(r.evolucao_mensal) && r.evolucao_mensal.length > 0)
+            .map((resultado, index) => ({ ...resultado, serie: evolucao.series[index] }))
+            .filter(r => Array.isArray(r.serie) && r.serie.length > 0)
             .sort((a, b) => b.valor_liquido - a.valor_liquido);
         
         if (ativosComEvolucao.length === 0) {
@@ -208,8 +249,7 @@ document.addEventListener('DOMContentLoaded', () => {
             graficoContainer.style.display = 'block';
         }
         
-        const primeiro = ativosComEvolucao[0];
-        const meses = primeiro.evolucao_mensal.map(e => e.mes);
+        const meses = evolucao.meses;
         
         const hoje = new Date();
         const labels = meses.map(mes => {
@@ -248,7 +288,7 @@ document.addEventListener('DOMContentLoaded', () => {
             
             return {
                 label: resultado.nome,
-                data: resultado.evolucao_mensal.map(e => e.valor_liquido),
+                data: resultado.serie,
                 borderColor: corLinha,
                 backgroundColor: corArea,
                 pointBackgroundColor: corLinha,
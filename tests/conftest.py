@@ -0,0 +1,85 @@
+"""Fixtures compartilhadas dos testes."""
+import json
+import os
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app, db  # noqa: E402
+
+
+@pytest.fixture
+def app(tmp_path):
+    """Aplicação com banco SQLite em memória e login desativado."""
+    app = create_app('testing')
+    app.config['LOGIN_DISABLED'] = True
+    app.instance_path = str(tmp_path)
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+class ServidorStub:
+    """
+    Servidor HTTP local para os clientes do SGS. `responder(caminho, params)`
+    devolve (status, corpo JSON) ou (status, corpo, atraso em segundos).
+    """
+
+    def __init__(self, responder):
+        self.responder = responder
+        self.requisicoes = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                partes = urllib.parse.urlsplit(self.path)
+                params = dict(urllib.parse.parse_qsl(partes.query))
+                stub.requisicoes.append((partes.path, params))
+                status, corpo, *atraso = stub.responder(partes.path, params)
+                if atraso:
+                    time.sleep(atraso[0])
+                dados = json.dumps(corpo).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(dados)))
+                self.end_headers()
+                self.wfile.write(dados)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.httpd.daemon_threads = True
+        self.url = f'http://127.0.0.1:{self.httpd.server_address[1]}/dados/serie'
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def fechar(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def servidor_stub():
+    """Cria servidores stub (`servidor_stub(responder)`) e os encerra no fim do teste."""
+    servidores = []
+
+    def criar(responder):
+        servidor = ServidorStub(responder)
+        servidores.append(servidor)
+        return servidor
+
+    yield criar
+    for servidor in servidores:
+        servidor.fechar()
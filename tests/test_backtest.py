@@ -0,0 +1,185 @@
+"""Backtest histórico: motor de somas acumuladas de app/backtest.py contra um laço mês a mês."""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.backtest import executar_backtest, montar_historico
+from app.sgs_historico import gravar_serie
+
+MESES = pd.period_range('2003-01', '2013-12', freq='M')
+DIAS = pd.bdate_range('2003-01-01', '2014-01-10')
+DIAS_DO_MES = {mes: [dia for dia in DIAS if dia.to_period('M') == mes] for mes in MESES}
+
+PARAMETROS = {
+    'rentabilidade_lci_lca': 90.0,
+    'rentabilidade_cdb': 110.0,
+    'rentabilidade_fundo_di': 95.0,
+    'taxa_admin_fundo_di': 1.0,
+    'tesouro_ipca_mais': 6.0
+}
+
+
+def _cdi_dia(dia):
+    # % a.d., variando de mês a mês
+    return 0.05 - 0.0002 * (dia.month % 7)
+
+
+def _selic_dia(dia):
+    return _cdi_dia(dia) + 0.0004
+
+
+def _ipca(mes):
+    return 0.3 + 0.1 * (mes.month % 5) - (0.5 if mes.month == 6 else 0.0)
+
+
+def _meta(mes):
+    # Cai abaixo de 8,5% dois meses depois da regra nova da poupança
+    return 16.0 if mes < pd.Period('2012-07', 'M') else 7.25
+
+
+def _tr(mes):
+    return 0.1 if mes.year < 2010 else 0.0
+
+
+@pytest.fixture
+def historico(tmp_path):
+    diarias = {'cdi': _cdi_dia, 'selic': _selic_dia}
+    for nome, taxa in diarias.items():
+        gravar_serie(nome, [(np.datetime64(dia.date()), taxa(dia)) for dia in DIAS], tmp_path)
+    mensais = {'ipca': _ipca, 'selic_meta': _meta, 'tr': _tr}
+    for nome, taxa in mensais.items():
+        gravar_serie(nome, [(np.datetime64(mes.start_time.date()), taxa(mes)) for mes in MESES], tmp_path)
+    return montar_historico(tmp_path)
+
+
+def _fator_diario(taxa, mes, percentual=100.0):
+    fator = 1.0
+    for dia in DIAS_DO_MES[mes]:
+        fator *= 1 + taxa(dia) * percentual / 100 / 100
+    return fator
+
+
+def _fator_mensal(nome, mes, parametros, mes_compra):
+    """Fator bruto do mês, escrito direto das regras de cada produto."""
+    if nome == 'LCI e LCA':
+        return _fator_diario(_cdi_dia, mes, parametros['rentabilidade_lci_lca'])
+    if nome == 'CDB':
+        return _fator_diario(_cdi_dia, mes, parametros['rentabilidade_cdb'])
+    if nome == 'Fundo DI':
+        return _fator_diario(_cdi_dia, mes, parametros['rentabilidade_fundo_di'])
+    if nome == 'Tesouro Selic':
+        return _fator_diario(_selic_dia, mes)
+    if nome == 'Tesouro Prefixado':
+        anual = parametros.get('tesouro_prefixado_nominal', _meta(mes_compra))
+        return (1 + anual / 100) ** (1 / 12)
+    if nome == 'Tesouro IPCA+':
+        return (1 + _ipca(mes) / 100) * (1 + parametros['tesouro_ipca_mais'] / 100) ** (1 / 12)
+    if nome == 'Poupança':
+        if mes >= pd.Period('2012-05', 'M') and _meta(mes) <= 8.5:
+            return (1 + 0.7 * _meta(mes) / 100) ** (1 / 12) + _tr(mes) / 100
+        return 1.005 + _tr(mes) / 100
+    return 1 + _ipca(mes) / 100
+
+
+def _aliquota(meses_aplicados, resgate):
+    if resgate < pd.Period('2005-01', 'M'):
+        return 0.20
+    if meses_aplicados <= 6:
+        return 0.225
+    if meses_aplicados <= 12:
+        return 0.20
+    return 0.175 if meses_aplicados <= 24 else 0.15
+
+
+def _laco(nome, inicio, meses, valor_inicial, aportes, parametros):
+    """
+    Cada aplicação vira um lote capitalizado mês a mês: bruto, cota (após a
+    taxa de administração) e final (após a custódia do Tesouro). O IR de
+    cada lote usa o seu tempo aplicado.
+    """
+    taxa_admin = parametros['taxa_admin_fundo_di'] / 100 if nome == 'Fundo DI' else 0.0
+    tesouro = nome.startswith('Tesouro')
+    tributavel = nome not in ('LCI e LCA', 'Poupança', 'Correção pelo IPCA')
+
+    lotes = [{'principal': valor_inicial, 'bruto': valor_inicial, 'cota': valor_inicial,
+              'final': valor_inicial, 'mes': 0}]
+    for j in range(1, meses + 1):
+        mes = inicio + (j - 1)
+        fator = _fator_mensal(nome, mes, parametros, inicio)
+        for lote in lotes:
+            lote['bruto'] *= fator
+            lote['cota'] *= fator * (1 - taxa_admin) ** (1 / 12)
+            lote['final'] *= fator * (1 - taxa_admin) ** (1 / 12) * (1 - 0.003 / 12 if tesouro else 1)
+        if aportes:
+            lotes.append({'principal': aportes, 'bruto': aportes, 'cota': aportes, 'final': aportes, 'mes': j})
+
+    resgate = inicio + (meses - 1)
+    valor_ir = sum(
+        _aliquota(meses - lote['mes'], resgate) * max(lote['cota'] - lote['principal'], 0.0)
+        for lote in lotes
+    ) if tributavel else 0.0
+    valor_bruto = sum(lote['bruto'] for lote in lotes)
+    valor_final = sum(lote['final'] for lote in lotes)
+    return {
+        'valor_bruto': valor_bruto,
+        'custos': valor_bruto - valor_final,
+        'valor_ir': valor_ir,
+        'valor_liquido': valor_final - valor_ir
+    }
+
+
+# (início, prazo): resgate antes de 2005 (IR de 20%), passagem para a tabela
+# regressiva, todas as faixas de prazo e a troca de regra da poupança
+JANELAS = [('2003-01', 18), ('2004-03', 14), ('2004-06', 30), ('2011-01', 36), ('2012-04', 5), ('2013-06', 7)]
+
+
+@pytest.mark.parametrize('parametros', [PARAMETROS, {**PARAMETROS, 'tesouro_prefixado_nominal': 11.0}])
+@pytest.mark.parametrize('aportes', [0.0, 500.0])
+def test_motor_igual_ao_laco_mensal(historico, parametros, aportes):
+    inicios = [inicio for inicio, _ in JANELAS]
+    prazos = [meses for _, meses in JANELAS]
+
+    resultado = executar_backtest(inicios, prazos, 10000.0, aportes, parametros, historico=historico)
+
+    for janela, (inicio, meses) in enumerate(JANELAS):
+        for coluna, nome in enumerate(resultado['produtos']):
+            esperado = _laco(nome, pd.Period(inicio, 'M'), meses, 10000.0, aportes, parametros)
+            for campo, valor in esperado.items():
+                assert resultado[campo][janela, coluna] == pytest.approx(valor, rel=1e-9, abs=1e-6), (inicio, nome, campo)
+
+
+def test_historico_sintetico(historico):
+    assert historico.periodo() == ('2003-01', '2013-12')
+    assert historico.faltantes[-1] == 0
+
+
+def test_ir_anterior_a_2005(historico):
+    resultado = executar_backtest(['2003-01', '2004-06'], [18, 7], 10000.0, 0.0, PARAMETROS, historico=historico)
+    cdb = resultado['produtos'].index('CDB')
+    ganho = resultado['valor_bruto'][:, cdb] - 10000.0
+
+    # Resgate em 2004-06: 20%; em 2004-12, ainda 20% mesmo com 7 meses
+    np.testing.assert_allclose(resultado['valor_ir'][:, cdb], 0.20 * ganho, rtol=1e-12)
+
+
+@pytest.fixture
+def pasta_sgs(app, tmp_path):
+    pasta = tmp_path / 'sgs'
+    app.config['SGS_HISTORICO_PATH'] = str(pasta)
+    return pasta
+
+
+@pytest.mark.parametrize('url, corpo', [
+    ('/api/backtest', {'inicio': '2010-01', 'meses': 12, 'valor_inicial': 1000}),
+    ('/api/backtest/janelas', {'meses': 12, 'valor_inicial': 1000}),
+])
+@pytest.mark.parametrize('parametros, mensagem', [
+    ('abc', 'parametros deve ser um objeto'),
+    ({'rentabilidade_cdb': None}, 'Parâmetro inválido: rentabilidade_cdb deve ser um número'),
+    ({'tesouro_ipca_mais': '6'}, 'Parâmetro inválido: tesouro_ipca_mais deve ser um número'),
+])
+def test_api_valida_parametros(client, pasta_sgs, url, corpo, parametros, mensagem):
+    resposta = client.post(url, json={**corpo, 'parametros': parametros})
+
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'] == mensagem
@@ -0,0 +1,117 @@
+"""Caches em memória (app/cache.py) e cache de resultados do simulador."""
+import pytest
+
+from app.cache import LRUCache, chave_conteudo
+from app.calculations import cache_resultados, chave_simulacao, simular_investimentos_padrao
+
+PARAMETROS = {'selic': 14.75, 'cdi': 14.65, 'ipca': 3.81}
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 0.0
+
+    def __call__(self):
+        return self.agora
+
+
+def test_chave_conteudo_ignora_ordem_das_chaves():
+    assert chave_conteudo({'a': 1, 'b': [1, 2]}) == chave_conteudo({'b': [1, 2], 'a': 1})
+    assert chave_conteudo({'a': 1}) != chave_conteudo({'a': 2})
+    assert len(chave_conteudo('x')) == 32
+
+
+def test_lru_descarta_o_usado_ha_mais_tempo():
+    cache = LRUCache(max_itens=3)
+    for chave in 'abc':
+        cache.set(chave, chave)
+
+    cache.get('a')  # 'b' passa a ser o usado há mais tempo
+    cache.set('d', 'd')
+
+    assert [cache.get(chave) for chave in 'abcd'] == ['a', None, 'c', 'd']
+    assert cache.stats()['descartes'] == 1
+    assert cache.stats()['size'] == 3
+
+
+def test_lru_limitado_por_bytes():
+    cache = LRUCache(max_itens=None, max_bytes=100, tamanho=len)
+    cache.set('a', 'x' * 40)
+    cache.set('b', 'x' * 40)
+    cache.set('a', 'x' * 30)  # substituir desconta o tamanho anterior
+    assert cache.stats()['bytes'] == 70
+
+    cache.set('c', 'x' * 50)
+    assert cache.get('b') is None
+    assert cache.get('a') == 'x' * 30 and cache.get('c') == 'x' * 50
+    assert cache.stats()['bytes'] == 80
+
+    # Um valor maior que o limite não é guardado nem descarta os demais
+    cache.set('grande', 'x' * 101)
+    assert cache.get('grande') is None
+    assert cache.stats()['size'] == 2
+
+    cache.redimensionar(max_bytes=60)
+    assert cache.get('a') is None and cache.get('c') == 'x' * 50
+
+
+def test_lru_expira_pelo_ttl():
+    relogio = Relogio()
+    cache = LRUCache(ttl=60, clock=relogio, tamanho=len)
+    cache.set('padrao', 'abc')
+    cache.set('curto', 'de', ttl=5)
+    cache.set('sem_prazo', 'f', ttl=None)
+
+    relogio.agora = 5
+    assert cache.get('curto') is None
+    assert cache.get('padrao') == 'abc'
+
+    relogio.agora = 60
+    assert cache.get('padrao') is None
+    assert cache.get('sem_prazo') is None  # ttl=None usa o TTL do cache
+    assert cache.stats()['bytes'] == 0
+    assert cache.get_or_set('padrao', lambda: 'novo') == 'novo'
+
+
+def test_garantir_versao_esvazia_so_quando_muda():
+    cache = LRUCache(tamanho=len)
+    cache.garantir_versao(('2', 'taxas-1'))
+    cache.set('a', 'abc')
+
+    cache.garantir_versao(('2', 'taxas-1'))
+    assert cache.get('a') == 'abc'
+
+    cache.garantir_versao(('2', 'taxas-2'))
+    assert cache.get('a') is None
+    assert cache.stats()['bytes'] == 0
+    assert cache.versao == ('2', 'taxas-2')
+
+
+def test_chave_simulacao_normaliza_o_cenario():
+    base = {'valor_inicial': 10000, 'aportes_mensais': 0, 'meses': 36, 'parametros': PARAMETROS}
+    assert chave_simulacao(base) == chave_simulacao({
+        **base, 'valor_inicial': 10000.0, 'parametros': dict(reversed(PARAMETROS.items())), 'pontos': 36
+    })
+    assert chave_simulacao(base) != chave_simulacao({**base, 'pontos': 12})
+    assert chave_simulacao(base) != chave_simulacao({**base, 'formato_evolucao': 'delta'})
+    assert chave_simulacao(base) != chave_simulacao(base, tax_regime='outro')
+
+
+@pytest.fixture
+def cache_limpo():
+    anterior = cache_resultados.backend
+    cache_resultados.usar(LRUCache(max_itens=8))
+    yield cache_resultados
+    cache_resultados.usar(anterior)
+
+
+def test_simulador_reaproveita_resultados(cache_limpo):
+    primeira = simular_investimentos_padrao(10000, 500, 24, PARAMETROS)
+    segunda = simular_investimentos_padrao(10000.0, 500.0, 24, dict(reversed(PARAMETROS.items())))
+
+    assert segunda is primeira
+    assert (cache_limpo.stats()['hits'], cache_limpo.stats()['misses']) == (1, 1)
+
+    cache_limpo.garantir_versao(('2', 'taxas-novas'))
+    assert simular_investimentos_padrao(10000, 500, 24, PARAMETROS) is not primeira
+    assert simular_investimentos_padrao(10000, 500, 24, PARAMETROS, usar_cache=False) == primeira
@@ -0,0 +1,191 @@
+"""Backends de cache compartilhados: duas instâncias (dois workers) sobre o mesmo armazenamento."""
+import threading
+
+import pytest
+
+from app.cache import LRUCache
+from app.cache_backends import CacheConfiguravel, CacheRedis, CacheSQLite, ClienteRedisMemoria, criar_backend
+
+
+class Relogio:
+    def __init__(self):
+        self.agora = 1000.0
+
+    def __call__(self):
+        return self.agora
+
+
+@pytest.fixture
+def relogio():
+    return Relogio()
+
+
+@pytest.fixture(params=['sqlite', 'redis'])
+def workers(request, tmp_path, relogio):
+    """Fábrica de backends que compartilham o mesmo arquivo SQLite ou cliente Redis."""
+    if request.param == 'sqlite':
+        caminho = tmp_path / 'cache.sqlite3'
+        return lambda namespace='simulacao', **opcoes: CacheSQLite(caminho, namespace, **opcoes)
+    cliente = ClienteRedisMemoria(clock=relogio)
+    return lambda namespace='simulacao', **opcoes: CacheRedis(cliente, namespace, **opcoes)
+
+
+def test_valor_gravado_por_um_worker_e_lido_pelo_outro(workers):
+    a, b = workers(), workers()
+
+    a.set('cenario', {'valor_liquido': [1.5, 2.5]})
+
+    assert b.get('cenario') == {'valor_liquido': [1.5, 2.5]}
+    assert b.get_or_set('cenario', lambda: pytest.fail('não deveria recalcular')) == {'valor_liquido': [1.5, 2.5]}
+    assert b.get('outro', 'padrao') == 'padrao'
+    assert (b.stats()['hits'], b.stats()['misses']) == (2, 1)
+
+
+def test_invalidate_visto_pelo_outro_worker(workers):
+    a, b = workers(), workers()
+    focus = workers('focus')
+    for chave in ('x', 'y'):
+        a.set(chave, chave.upper())
+    focus.set('x', 'focus')
+
+    b.invalidate('x')
+    assert a.get('x') is None
+    assert a.get('y') == 'Y'
+
+    b.invalidate()
+    assert a.get('y') is None
+    # Só o namespace do cache invalidado é limpo
+    assert focus.get('x') == 'focus'
+
+
+def test_nova_versao_nao_le_valores_da_anterior(workers):
+    a, b = workers(), workers()
+    a.garantir_versao(('2', 'taxas-1'))
+    b.garantir_versao(('2', 'taxas-1'))
+    a.set('cenario', 'antigo')
+
+    # O worker A vê as taxas novas primeiro
+    a.garantir_versao(('2', 'taxas-2'))
+    assert a.get('cenario') is None
+    a.set('cenario', 'novo')
+
+    # B ainda na versão anterior continua com o valor dela; ao atualizar, lê o de A
+    assert b.get('cenario') == 'antigo'
+    b.garantir_versao(('2', 'taxas-2'))
+    assert b.get('cenario') == 'novo'
+
+    # Repetir a mesma versão não muda as chaves
+    b.garantir_versao(('2', 'taxas-2'))
+    assert b.get('cenario') == 'novo'
+
+
+def test_valores_expiram_pelo_ttl(tmp_path, relogio, monkeypatch):
+    cliente = ClienteRedisMemoria(clock=relogio)
+    redis_a, redis_b = CacheRedis(cliente, 'focus', ttl=60), CacheRedis(cliente, 'focus', ttl=60)
+    redis_a.set('snapshot', 1)
+    redis_a.set('curto', 2, ttl=0.2)
+
+    relogio.agora += 59
+    assert redis_b.get('snapshot') == 1
+    assert redis_b.get('curto') is None  # o Redis arredonda o TTL para 1 segundo
+    relogio.agora += 1
+    assert redis_b.get('snapshot') is None
+
+    agora = [1000.0]
+    monkeypatch.setattr('app.cache_backends.time.time', lambda: agora[0])
+    sqlite_a = CacheSQLite(tmp_path / 'cache.sqlite3', 'focus', ttl=60)
+    sqlite_b = CacheSQLite(tmp_path / 'cache.sqlite3', 'focus', ttl=60)
+    sqlite_a.set('snapshot', 1)
+
+    agora[0] += 59
+    assert sqlite_b.get('snapshot') == 1
+    agora[0] += 1
+    assert sqlite_b.get('snapshot') is None
+    assert sqlite_a.stats()['size'] == 0
+
+
+def test_sqlite_descarta_os_mais_antigos_por_itens_e_bytes(tmp_path, monkeypatch):
+    agora = [1000.0]
+    monkeypatch.setattr('app.cache_backends.time.time', lambda: agora[0])
+    caminho = tmp_path / 'cache.sqlite3'
+
+    a = CacheSQLite(caminho, 'simulacao', max_itens=3)
+    b = CacheSQLite(caminho, 'simulacao', max_itens=3)
+    outro = CacheSQLite(caminho, 'focus')
+    outro.set('fica', 0)
+    for indice in range(5):
+        agora[0] += 1
+        (a if indice % 2 else b).set(f'k{indice}', indice)
+
+    assert [a.get(f'k{indice}') for indice in range(5)] == [None, None, 2, 3, 4]
+    assert outro.get('fica') == 0
+
+    pequeno = CacheSQLite(caminho, 'lote', max_bytes=2500)
+    for indice in range(3):
+        agora[0] += 1
+        pequeno.set(f'k{indice}', b'x' * 1000)
+    stats = pequeno.stats()
+    assert stats['size'] == 2 and stats['bytes'] <= 2500
+    assert pequeno.get('k0') is None and pequeno.get('k2') == b'x' * 1000
+
+
+def test_sqlite_uma_conexao_por_thread(tmp_path):
+    cache = CacheSQLite(tmp_path / 'cache.sqlite3', 'simulacao')
+    erros = []
+
+    def gravar(indice):
+        try:
+            cache.set(f'k{indice}', indice)
+        except Exception as exc:
+            erros.append(exc)
+
+    threads = [threading.Thread(target=gravar, args=(indice,)) for indice in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert erros == []
+    assert sorted(cache.get(f'k{indice}') for indice in range(8)) == list(range(8))
+
+
+def test_cliente_redis_memoria(relogio):
+    cliente = ClienteRedisMemoria(clock=relogio)
+    cliente.set('renda_fixa:focus:a', b'1')
+    cliente.set('renda_fixa:focus:b', b'2', ex=10)
+    cliente.set('renda_fixa:simulacao:a', b'3')
+
+    assert cliente.get('renda_fixa:focus:a') == b'1'
+    assert sorted(cliente.scan_iter(match='renda_fixa:focus:*')) == ['renda_fixa:focus:a', 'renda_fixa:focus:b']
+
+    relogio.agora += 10
+    assert cliente.get('renda_fixa:focus:b') is None
+    assert list(cliente.scan_iter(match='renda_fixa:focus:*')) == ['renda_fixa:focus:a']
+    assert cliente.delete('renda_fixa:focus:a', 'inexistente') == 1
+    assert cliente.get('renda_fixa:focus:a') is None
+
+
+def test_criar_backend(tmp_path):
+    assert isinstance(criar_backend({}, 'focus'), LRUCache)
+
+    sqlite = criar_backend({'CACHE_BACKEND': 'sqlite'}, 'focus', instance_path=str(tmp_path / 'instance'))
+    assert isinstance(sqlite, CacheSQLite)
+    assert (tmp_path / 'instance' / 'cache.sqlite3').exists()
+
+    cliente = ClienteRedisMemoria()
+    redis = criar_backend({'CACHE_BACKEND': 'redis', 'CACHE_REDIS_CLIENTE': cliente}, 'focus', ttl=30)
+    assert isinstance(redis, CacheRedis) and redis.cliente is cliente and redis.ttl == 30
+
+    with pytest.raises(ValueError, match='CACHE_BACKEND inválido'):
+        criar_backend({'CACHE_BACKEND': 'memcached'}, 'focus')
+
+
+def test_cache_configuravel_troca_o_backend(tmp_path):
+    cache = CacheConfiguravel(LRUCache(max_itens=4))
+    cache.set('a', 1)
+
+    cache.usar(CacheSQLite(tmp_path / 'cache.sqlite3', 'simulacao'))
+    assert cache.get('a') is None
+    cache.set('a', 2)
+    assert cache.get('a') == 2
+    assert cache.stats()['backend'] == 'CacheSQLite'
@@ -0,0 +1,104 @@
+"""Curva de taxas: com Selic e IPCA constantes, o modo curva reproduz a taxa única."""
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.calculations import (
+    calcular_cdi,
+    calcular_investimento_completo,
+    calcular_pontos_mensais,
+    cdi_parametros
+)
+from app.curva_taxas import CurvaTaxas
+from app.models import FocusData
+
+SELIC = 15.0
+IPCA = 4.5
+MESES = [1, 12, 36, 60, 120]
+PRODUTOS = [
+    ('cdb', 'cdi', 100.0, 0.0),
+    ('lci', 'cdi', 90.0, 0.0),
+    ('fundo_di', 'cdi', 95.0, 0.005),
+    ('cdb', 'ipca_mais', 6.0, 0.0),
+]
+
+
+def _curva_plana(ano_inicial=2026, mes_inicial=1):
+    anos = range(ano_inicial, ano_inicial + 4)
+    return CurvaTaxas({ano: SELIC for ano in anos}, {ano: IPCA for ano in anos}, ano_inicial, mes_inicial)
+
+
+def test_convencao_do_cdi():
+    assert calcular_cdi(SELIC) == pytest.approx(14.9)
+    assert cdi_parametros({'selic': SELIC}) == pytest.approx(14.9)
+    assert cdi_parametros({'selic': SELIC, 'cdi': 14.65}) == 14.65
+    np.testing.assert_allclose(cdi_parametros({'selic': np.array([0.05, 15.0])}), [0.0, 14.9])
+
+
+@pytest.mark.parametrize('cdi', [None, 14.9, 15.0, 14.0])
+@pytest.mark.parametrize('investimento_type, rentabilidade_type, rentabilidade_value, custos', PRODUTOS)
+def test_curva_plana_igual_a_taxa_unica(cdi, investimento_type, rentabilidade_type, rentabilidade_value, custos):
+    parametros = {'selic': SELIC, 'ipca': IPCA, 'taxa_custodia': 0.2}
+    if cdi is not None:
+        parametros['cdi'] = cdi
+    entrada = dict(
+        investimento_type=investimento_type,
+        rentabilidade_type=rentabilidade_type,
+        rentabilidade_value=rentabilidade_value,
+        valor_inicial=10000.0,
+        aportes_mensais=500.0,
+        meses=MESES,
+        parametros=parametros,
+        taxa_custos_extra=custos
+    )
+
+    plana = calcular_pontos_mensais(**entrada)
+    curva = calcular_pontos_mensais(**entrada, curva=_curva_plana(mes_inicial=7))
+
+    np.testing.assert_allclose(curva['valor_liquido'], plana['valor_liquido'], rtol=1e-10)
+
+
+@pytest.mark.parametrize('investimento_type, rentabilidade_type, rentabilidade_value, custos', PRODUTOS)
+def test_curva_plana_no_calculo_completo(investimento_type, rentabilidade_type, rentabilidade_value, custos):
+    entrada = dict(
+        investimento_type=investimento_type,
+        rentabilidade_type=rentabilidade_type,
+        rentabilidade_value=rentabilidade_value,
+        valor_inicial=10000.0,
+        aportes_mensais=500.0,
+        meses=36,
+        selic=SELIC,
+        ipca=IPCA,
+        taxa_custos_extra=custos
+    )
+
+    plana = calcular_investimento_completo(**entrada)
+    curva = calcular_investimento_completo(**entrada, curva=_curva_plana())
+
+    assert curva['valor_liquido'] == pytest.approx(plana['valor_liquido'], rel=1e-10)
+    assert curva['valor_real'] == pytest.approx(plana['valor_real'], rel=1e-10)
+
+
+@pytest.mark.parametrize('parametros', [{'selic': SELIC, 'ipca': IPCA}, {'selic': SELIC, 'cdi': SELIC, 'ipca': IPCA}])
+def test_api_evolucao_com_focus_plano(client, parametros):
+    ano = date.today().year
+    FocusData.registrar(date.today(), {
+        'selic': {ano + k: {'median': SELIC} for k in range(4)},
+        'ipca': {ano + k: {'median': IPCA} for k in range(4)}
+    })
+    corpo = {
+        'investimento_type': 'fundo_di',
+        'rentabilidade_type': 'cdi',
+        'rentabilidade_value': 95.0,
+        'taxa_custos_extra': 0.005,
+        'valor_inicial': 10000,
+        'aportes_mensais': 500,
+        'meses': 36,
+        'parametros': parametros
+    }
+
+    plana = client.post('/api/evolucao', json=corpo).get_json()
+    curva = client.post('/api/evolucao', json={**corpo, 'curva_focus': True}).get_json()
+
+    assert curva['valor_liquido'] == plana['valor_liquido']
@@ -0,0 +1,91 @@
+"""Equivalência entre produtos: valor líquido vetorizado e inversão da taxa."""
+import numpy as np
+import pytest
+
+from app.calculations import ContextoMercado, calcular_investimento_completo
+from app.equivalencia import taxa_anual_necessaria, valor_liquido, valor_liquido_por_taxa, validar_produto
+
+CONTEXTO = ContextoMercado(selic=15.0, ipca=4.5)
+MESES = np.arange(1, 121)
+
+PRODUTOS = [
+    {'investimento_type': 'cdb', 'rentabilidade_type': 'cdi', 'rentabilidade_value': 102.0},
+    {'investimento_type': 'lci', 'rentabilidade_type': 'cdi', 'rentabilidade_value': 90.0},
+    {'investimento_type': 'fundo_di', 'rentabilidade_type': 'cdi', 'rentabilidade_value': 98.0, 'taxa_custos_extra': 0.005},
+    {'investimento_type': 'tesouro_prefixado', 'rentabilidade_type': 'prefixado', 'rentabilidade_value': 13.5},
+    {'investimento_type': 'tesouro_ipca', 'rentabilidade_type': 'ipca_mais', 'rentabilidade_value': 7.0},
+]
+
+
+@pytest.mark.parametrize('produto', PRODUTOS, ids=lambda produto: produto['investimento_type'])
+@pytest.mark.parametrize('valor_inicial, aportes_mensais', [(10000.0, 0.0), (10000.0, 750.0), (0.0, 500.0)])
+@pytest.mark.parametrize('incluir_ir', [True, False])
+def test_valor_liquido_igual_ao_calculo_completo(produto, valor_inicial, aportes_mensais, incluir_ir):
+    produto = validar_produto(produto)
+
+    vetorizado = valor_liquido(produto, MESES, valor_inicial, aportes_mensais, CONTEXTO, incluir_ir)
+
+    completo = [
+        calcular_investimento_completo(
+            produto['investimento_type'],
+            produto['rentabilidade_type'],
+            produto['rentabilidade_value'],
+            valor_inicial,
+            aportes_mensais,
+            int(meses),
+            incluir_ir=incluir_ir,
+            ajustar_inflacao_flag=False,
+            taxa_custos_extra=produto['taxa_custos_extra'],
+            contexto=CONTEXTO
+        )['valor_liquido']
+        for meses in MESES
+    ]
+    np.testing.assert_allclose(vetorizado, completo, rtol=1e-12)
+
+
+@pytest.mark.parametrize('produto', PRODUTOS, ids=lambda produto: produto['investimento_type'])
+@pytest.mark.parametrize('aportes_mensais', [0.0, 750.0], ids=['forma_fechada', 'bisseccao'])
+def test_inversao_reproduz_a_taxa(produto, aportes_mensais):
+    produto = validar_produto(produto)
+    rng = np.random.default_rng(3)
+    # Taxas com perda, abaixo dos custos e com ganho tributado
+    anual = rng.uniform(-0.2, 0.4, len(MESES))
+
+    alvo = valor_liquido_por_taxa(produto, anual, MESES, 10000.0, aportes_mensais)
+    necessaria = taxa_anual_necessaria(produto, alvo, MESES, 10000.0, aportes_mensais)
+
+    np.testing.assert_allclose(necessaria, anual, rtol=1e-9, atol=1e-12)
+    np.testing.assert_allclose(
+        valor_liquido_por_taxa(produto, necessaria, MESES, 10000.0, aportes_mensais), alvo, rtol=1e-10
+    )
+
+
+def test_alvo_fora_do_intervalo_de_busca():
+    produto = validar_produto(PRODUTOS[0])
+    necessaria = taxa_anual_necessaria(produto, [-1.0, 1e9], [12, 12], 10000.0, 0.0)
+    assert np.isnan(necessaria).all()
+    necessaria = taxa_anual_necessaria(produto, [-1.0, 1e9], [12, 12], 10000.0, 100.0)
+    assert np.isnan(necessaria).all()
+
+
+def test_sem_valor_investido_nao_ha_taxa():
+    produto = validar_produto(PRODUTOS[0])
+    assert np.isnan(taxa_anual_necessaria(produto, [0.0, 0.0], [12, 24], 0.0, 0.0)).all()
+
+
+def test_api_sem_valor_investido_responde_null(client):
+    resposta = client.post('/api/equivalencia', json={
+        'tipo': 'taxa',
+        'produto': PRODUTOS[0],
+        'referencia': PRODUTOS[1],
+        'valor_inicial': 0,
+        'aportes_mensais': 0,
+        'meses': [12, 24],
+        'selic': 15.0,
+        'ipca': 4.5
+    })
+
+    assert resposta.status_code == 200
+    corpo = resposta.get_json()
+    assert corpo['taxa_anual_equivalente'] == [None, None]
+    assert corpo['rentabilidade_value'] == [None, None]
@@ -0,0 +1,91 @@
+"""Evolução mensal: núcleo vetorizado contra o laço original."""
+import numpy as np
+import pytest
+
+from app.calculations import calcular_evolucao_mensal, calcular_evolucoes_mensais
+from scripts.benchmark_evolucao import PARAMETROS, PRODUTOS, evolucao_mensal_laco
+
+
+def _evolucoes(funcao, meses, valor_inicial=10000.0, aportes_mensais=1000.0, parametros=PARAMETROS):
+    return [
+        funcao(
+            investimento_type=investimento,
+            rentabilidade_type=tipo,
+            rentabilidade_value=valor,
+            valor_inicial=valor_inicial,
+            aportes_mensais=aportes_mensais,
+            meses=meses,
+            parametros=parametros,
+            taxa_custos_extra=extra,
+        )
+        for investimento, tipo, valor, extra in PRODUTOS
+    ]
+
+
+def _evolucoes_juntas(meses, valor_inicial=10000.0, aportes_mensais=1000.0, parametros=PARAMETROS):
+    produtos = [
+        {'investimento_type': investimento, 'rentabilidade_type': tipo, 'rentabilidade_value': valor,
+         'taxa_custos_extra': extra}
+        for investimento, tipo, valor, extra in PRODUTOS
+    ]
+    return calcular_evolucoes_mensais(produtos, valor_inicial, aportes_mensais, meses, parametros)
+
+
+@pytest.mark.parametrize('meses', [1, 6, 12, 24, 36, 48, 49, 60, 120, 360, 600])
+def test_evolucao_igual_ao_laco(meses):
+    laco = _evolucoes(evolucao_mensal_laco, meses)
+    assert _evolucoes(calcular_evolucao_mensal, meses) == laco
+    assert _evolucoes_juntas(meses) == laco
+
+
+def test_evolucao_igual_ao_laco_em_cenarios_sorteados():
+    rng = np.random.default_rng(7)
+    for _ in range(50):
+        meses = int(rng.integers(1, 240))
+        valor_inicial = float(rng.uniform(0, 200000))
+        aportes_mensais = float(rng.choice([0.0, rng.uniform(0, 10000)]))
+        parametros = {**PARAMETROS, 'selic': float(rng.uniform(0, 20)), 'ipca': float(rng.uniform(0, 10))}
+        parametros['cdi'] = parametros['selic'] - 0.1
+        entrada = (meses, valor_inicial, aportes_mensais, parametros)
+        laco = _evolucoes(evolucao_mensal_laco, *entrada)
+        assert _evolucoes(calcular_evolucao_mensal, *entrada) == laco
+        assert _evolucoes_juntas(*entrada) == laco
+
+
+def test_evolucoes_respeitam_taxa_zero_e_produto_sem_ir():
+    produtos = [
+        {'investimento_type': 'cdb', 'rentabilidade_type': 'prefixado', 'rentabilidade_value': 0.0},
+        {'investimento_type': 'cdb', 'rentabilidade_type': 'prefixado', 'rentabilidade_value': 12.0, 'incluir_ir': False},
+    ]
+    zero, isento = calcular_evolucoes_mensais(produtos, 1000.0, 100.0, 12, {'taxa_custodia': 0.2})
+
+    assert [ponto['valor_liquido'] for ponto in zero] == [1000.0 + 100.0 * mes for mes in range(1, 13)]
+    assert isento[-1]['valor_liquido'] == round(1000.0 * 1.12 + 100.0 * (1.12 - 1) / (1.12 ** (1 / 12) - 1), 2)
+
+
+EVOLUCAO = {
+    'investimento_type': 'cdb',
+    'rentabilidade_type': 'cdi',
+    'rentabilidade_value': 100.0,
+    'valor_inicial': 10000,
+    'meses': 36,
+    'parametros': {'selic': 15.0, 'cdi': 14.9, 'ipca': 4.5}
+}
+
+
+def test_api_evolucao_valida(client):
+    resposta = client.post('/api/evolucao', json=EVOLUCAO)
+    assert resposta.status_code == 200
+    assert len(resposta.get_json()['valor_liquido']) == 36
+
+
+@pytest.mark.parametrize('parametros, campo', [
+    ({'selic': None}, 'selic'),
+    ({'ipca': 'abc'}, 'ipca'),
+    ('abc', 'parametros'),
+    ([15.0], 'parametros'),
+])
+def test_api_evolucao_rejeita_parametros_invalidos(client, parametros, campo):
+    resposta = client.post('/api/evolucao', json={**EVOLUCAO, 'parametros': parametros})
+    assert resposta.status_code == 400
+    assert campo in resposta.get_json()['error']
@@ -0,0 +1,79 @@
+"""Histórico do Focus: os agregados contam só as datas de pesquisa."""
+from datetime import date, timedelta
+
+import pandas as pd
+import pytest
+
+from app import db, focus_scraper
+from app.focus_historico import registrar_historico
+from app.models import FocusAggregate, FocusData, FocusProjection
+
+# Doze dias úteis de pesquisa em outubro de 2025 e a coleta num sábado do mesmo mês
+PESQUISAS = [dia.date() for dia in pd.bdate_range('2025-10-01', '2025-10-16')]
+COLETA = date(2025, 10, 18)
+
+
+def _historico(datas, inicio=4.0):
+    return [
+        {'data': data, 'indicador': 'ipca', 'ano': 2026, 'median': inicio + indice / 100}
+        for indice, data in enumerate(datas)
+    ]
+
+
+def _coletar(monkeypatch, hoje, historico):
+    """Roda buscar_projecoes_focus com a API substituída pela série informada."""
+    class Hoje(date):
+        @classmethod
+        def today(cls):
+            return hoje
+
+    def buscar_dados_anuais(api, historico=None, inicio=None):
+        historico.extend(linhas)
+        return {'ipca': {2026: {'median': linhas[-1]['median']}}}
+
+    linhas = historico
+    monkeypatch.setattr(focus_scraper, 'date', Hoje)
+    monkeypatch.setattr(focus_scraper, 'criar_api_expectativas', lambda: None)
+    monkeypatch.setattr(focus_scraper, 'buscar_dados_anuais', buscar_dados_anuais)
+    assert focus_scraper.buscar_projecoes_focus()
+
+
+def _agregado(granularidade, inicio):
+    return FocusAggregate.query.filter_by(
+        indicator='ipca', reference_year=2026, granularity=granularidade, period_start=inicio
+    ).one()
+
+
+def test_snapshot_da_coleta_nao_entra_nos_agregados(app, monkeypatch):
+    assert len(PESQUISAS) == 12
+    historico = _historico(PESQUISAS)
+    _coletar(monkeypatch, COLETA, historico)
+
+    coleta = FocusData.query.filter_by(date=COLETA).one()
+    assert coleta.is_collection
+    assert FocusData.get_latest().date == COLETA
+
+    mensal = _agregado('mes', date(2025, 10, 1))
+    assert mensal.samples == len(PESQUISAS)
+    medianas = [linha['median'] for linha in historico]
+    assert mensal.median_mean == pytest.approx(sum(medianas) / len(medianas))
+    assert mensal.median_last == medianas[-1]
+    semanal = FocusAggregate.query.filter_by(indicator='ipca', reference_year=2026, granularity='semana').all()
+    assert sum(agregado.samples for agregado in semanal) == len(PESQUISAS)
+
+
+def test_pesquisa_na_data_da_coleta_substitui_o_snapshot(app, monkeypatch):
+    # Coleta numa segunda-feira antes de a pesquisa do dia ser publicada
+    segunda = PESQUISAS[-1] + timedelta(days=4)
+    _coletar(monkeypatch, segunda, _historico(PESQUISAS))
+    assert FocusData.query.filter_by(date=segunda).one().is_collection
+
+    # A coleta seguinte traz a pesquisa daquela segunda-feira
+    novas = registrar_historico(_historico(PESQUISAS + [segunda]))
+    db.session.commit()
+
+    assert novas == 1
+    focus = FocusData.query.filter_by(date=segunda).one()
+    assert not focus.is_collection
+    assert FocusProjection.query.filter_by(snapshot_date=segunda).count() == 1
+    assert _agregado('mes', date(2025, 10, 1)).samples == len(PESQUISAS) + 1
@@ -0,0 +1,71 @@
+"""Scraper do Focus contra as respostas gravadas em tests/fixtures/focus."""
+import threading
+from datetime import date, datetime
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from app import focus_scraper
+from scripts.focus_fixture_server import chave_requisicao, criar_handler
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'focus'
+BASE = '/olinda/servico/Expectativas/versao/v1/odata/'
+# Pesquisas gravadas: 01, 06, 09, 14 e 17/10/2025, gravadas com Data ge 2025-09-01
+PESQUISAS = [date(2025, 10, dia) for dia in (1, 6, 9, 14, 17)]
+
+
+@pytest.fixture
+def servidor():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), None)
+    origem = f'http://127.0.0.1:{httpd.server_address[1]}'
+    httpd.RequestHandlerClass = criar_handler(FIXTURES, origem, False)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield origem
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def api(app, servidor, monkeypatch):
+    class Agora(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(2025, 10, 20, 12, 0)
+
+    monkeypatch.setattr(focus_scraper, 'datetime', Agora)
+    app.config['BCB_EXPECTATIVAS_URL'] = servidor + BASE
+    return focus_scraper.criar_api_expectativas()
+
+
+def test_chave_ignora_limite_de_data():
+    consulta = (BASE + 'ExpectativasMercadoAnuais?%24format=json&%24filter='
+                'Indicador%20eq%20%27IPCA%27%20and%20Data%20ge%20{}')
+    assert chave_requisicao(consulta.format('2025-09-01')) == chave_requisicao(consulta.format('2025-10-09'))
+    assert chave_requisicao(consulta.format('2025-09-01')) != chave_requisicao(
+        consulta.replace('IPCA', 'Selic').format('2025-09-01'))
+
+
+def test_buscar_dados_anuais_nas_fixtures(api):
+    historico = []
+    dados = focus_scraper.buscar_dados_anuais(api, historico, inicio=date(2025, 10, 1))
+
+    assert set(dados) == {'ipca', 'selic', 'pib', 'cambio'}
+    assert sorted(dados['selic']) == [2025, 2026, 2027, 2028]
+    # Última pesquisa (17/10) de cada indicador e ano de referência
+    assert dados['ipca'][2026] == {'median': 4.71, 'mean': 4.73, 'stdev': 0.3, 'respondents': 44}
+    assert dados['selic'][2025]['median'] == 14.96
+    assert dados['cambio'][2028]['median'] == 5.26
+
+    assert len(historico) == 4 * 4 * len(PESQUISAS)
+    assert sorted({linha['data'] for linha in historico}) == PESQUISAS
+    assert {linha['indicador'] for linha in historico} == {'ipca', 'selic', 'pib', 'cambio'}
+
+
+def test_buscar_dados_anuais_respeita_inicio(api):
+    historico = []
+    dados = focus_scraper.buscar_dados_anuais(api, historico, inicio=date(2025, 10, 9))
+
+    assert sorted({linha['data'] for linha in historico}) == PESQUISAS[2:]
+    assert dados['ipca'][2026]['median'] == 4.71
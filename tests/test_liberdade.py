@@ -0,0 +1,54 @@
+"""Calculadora de Liberdade Financeira: modos de IR enviados pela página."""
+import pytest
+
+from app.liberdade import IR_MODOS, planejar, validar_cenario
+
+CENARIO = {
+    'idade_atual': 30,
+    'idade_liberdade': 55,
+    'expectativa_vida': 90,
+    'renda_desejada': 10000,
+    'aporte_mensal': 3000,
+    'patrimonio_atual': 50000,
+    'taxa_real': 6
+}
+
+
+def _renda_bruta(**campos):
+    return planejar(validar_cenario({**CENARIO, **campos}))['renda_bruta']
+
+
+def test_modos_da_pagina_sao_aceitos():
+    # Valores do <select id="ir-modo"> de templates/liberdade.html
+    for modo in ('bruto', '15', 'isento', 'custom'):
+        assert modo in IR_MODOS
+        validar_cenario({**CENARIO, 'ir_modo': modo})
+
+
+def test_modo_15_desconta_quinze_por_cento():
+    # Como aplicarIR em liberdade.js: 10.000 líquidos com 15% pedem 11.764,71 brutos
+    assert _renda_bruta(ir_modo='15') == 11764.71
+    assert _renda_bruta(ir_modo=15) == 11764.71
+    assert _renda_bruta(ir_modo='custom', aliquota_ir=15) == 11764.71
+    assert _renda_bruta(ir_modo='bruto') == _renda_bruta(ir_modo='isento') == 10000
+
+
+def test_api_aceita_modo_15(client):
+    resposta = client.post('/api/liberdade', json={**CENARIO, 'ir_modo': '15', 'ipca': 4.5})
+    assert resposta.status_code == 200
+    assert resposta.get_json()['renda_bruta'] == 11764.71
+
+    resposta = client.post('/api/liberdade', json={**CENARIO, 'ir_modo': '27,5'})
+    assert resposta.status_code == 400
+    assert 'Modo de IR inválido' in resposta.get_json()['error']
+
+
+@pytest.mark.parametrize('modo', ['15', 'tabela'])
+def test_lote_com_modos_misturados(client, modo):
+    resposta = client.post('/api/liberdade/lote', json={
+        **CENARIO, 'ipca': 4.5, 'cenarios': [{'ir_modo': 'bruto'}, {'ir_modo': modo}]
+    })
+    assert resposta.status_code == 200
+    resultados = resposta.get_json()['resultados']
+    assert resultados[0]['renda_bruta'] == 10000
+    assert resultados[1]['renda_bruta'] == 11764.71
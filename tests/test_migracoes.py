@@ -0,0 +1,95 @@
+"""Migrações do Alembic: bancos com as colunas fixas antigas do Focus chegam ao esquema atual."""
+import sqlite3
+from datetime import date
+from pathlib import Path
+
+import pytest
+import sqlalchemy as sa
+from flask_migrate import upgrade
+
+from app import create_app, db
+from app.models import FocusData, FocusProjection
+from config import TestingConfig
+
+MIGRACOES = str(Path(__file__).resolve().parents[1] / 'migrations')
+
+INDICADORES = ('ipca', 'selic', 'pib', 'cambio')
+ANOS_ANTIGOS = (2025, 2026, 2027, 2028)
+COLUNAS_ANTIGAS = [f'{indicador}_{ano}' for indicador in INDICADORES for ano in ANOS_ANTIGOS]
+
+
+def _banco_antigo(caminho):
+    """focus_data como no modelo antigo: uma coluna por indicador e ano."""
+    conexao = sqlite3.connect(caminho)
+    colunas = ', '.join(f'{coluna} FLOAT' for coluna in COLUNAS_ANTIGAS)
+    conexao.execute(
+        f'CREATE TABLE focus_data (id INTEGER PRIMARY KEY, date DATE NOT NULL UNIQUE, {colunas}, '
+        f'created_at DATETIME, updated_at DATETIME)'
+    )
+    conexao.execute(
+        'INSERT INTO focus_data (date, ipca_2025, ipca_2026, selic_2025, selic_2026, cambio_2028) '
+        "VALUES ('2025-10-10', 4.8, 4.3, 15.0, 12.25, 5.5)"
+    )
+    conexao.execute("INSERT INTO focus_data (date, ipca_2025, pib_2027) VALUES ('2025-10-17', 4.7, 1.9)")
+    conexao.commit()
+    conexao.close()
+
+
+@pytest.fixture
+def app_arquivo(tmp_path, monkeypatch):
+    """Aplicação sobre um banco SQLite em arquivo (create_app roda db.create_all, como no deploy)."""
+    caminho = tmp_path / 'comparador.db'
+
+    def criar(antigo):
+        if antigo:
+            _banco_antigo(caminho)
+        monkeypatch.setattr(TestingConfig, 'SQLALCHEMY_DATABASE_URI', f'sqlite:///{caminho}')
+        app = create_app('testing')
+        app.instance_path = str(tmp_path)
+        return app
+    return criar
+
+
+def _projecoes():
+    return {
+        (str(item.snapshot_date), item.indicator, item.reference_year): item.median
+        for item in FocusProjection.query.all()
+    }
+
+
+def test_upgrade_move_colunas_antigas(app_arquivo):
+    app = app_arquivo(antigo=True)
+    with app.app_context():
+        upgrade(directory=MIGRACOES)
+
+        colunas = {coluna['name'] for coluna in sa.inspect(db.engine).get_columns('focus_data')}
+        assert not colunas & set(COLUNAS_ANTIGAS)
+        assert 'is_collection' in colunas
+        assert sa.inspect(db.engine).has_table('focus_aggregates')
+
+        assert _projecoes() == {
+            ('2025-10-10', 'ipca', 2025): 4.8,
+            ('2025-10-10', 'ipca', 2026): 4.3,
+            ('2025-10-10', 'selic', 2025): 15.0,
+            ('2025-10-10', 'selic', 2026): 12.25,
+            ('2025-10-10', 'cambio', 2028): 5.5,
+            ('2025-10-17', 'ipca', 2025): 4.7,
+            ('2025-10-17', 'pib', 2027): 1.9,
+        }
+        ultimo = FocusData.get_latest()
+        assert ultimo.date == date(2025, 10, 17)
+        assert ultimo.projecao('pib', 2027) == 1.9
+        assert ultimo.is_collection is False
+        db.session.remove()
+
+
+def test_upgrade_em_banco_novo_nao_altera_nada(app_arquivo):
+    app = app_arquivo(antigo=False)
+    with app.app_context():
+        upgrade(directory=MIGRACOES)
+        upgrade(directory=MIGRACOES)
+
+        assert _projecoes() == {}
+        versao = db.session.execute(sa.text('SELECT version_num FROM alembic_version')).scalar()
+        assert versao == '5e2b7c9d4f31'
+        db.session.remove()
@@ -0,0 +1,57 @@
+"""Monte Carlo das taxas: cenário e coerência com o simulador padrão."""
+import numpy as np
+import pytest
+
+from app.calculations import simular_investimentos_padrao
+from app.monte_carlo import DESVIO_IPCA_PADRAO, cenario_taxas, simular_monte_carlo
+
+PARAMETROS = {
+    'selic': 15.0,
+    'ipca': 4.5,
+    'rentabilidade_lci_lca': 90.0,
+    'rentabilidade_cdb': 100.0,
+    'rentabilidade_fundo_di': 95.0,
+    'taxa_admin_fundo_di': 0.5,
+    'tesouro_prefixado_nominal': 13.5,
+    'tesouro_ipca_mais': 7.0,
+    'taxa_custodia': 0.2
+}
+
+
+def test_cenario_aceita_zero_informado():
+    cenario = cenario_taxas(36, {'selic': 12, 'desvio_selic': 0, 'desvio_ipca': 0})
+    np.testing.assert_array_equal(cenario.desvio_selic, [0.0, 0.0, 0.0])
+    np.testing.assert_array_equal(cenario.desvio_ipca, [0.0, 0.0, 0.0])
+
+    cenario = cenario_taxas(12, {'selic': 0, 'ipca': 0})
+    np.testing.assert_array_equal(cenario.selic, [0.0])
+    np.testing.assert_array_equal(cenario.ipca, [0.0])
+    np.testing.assert_array_equal(cenario.desvio_ipca, [DESVIO_IPCA_PADRAO])
+
+
+@pytest.mark.parametrize('cdi', [None, 14.9, 14.0])
+def test_dispersao_zero_reproduz_simulador(app, cdi):
+    parametros = dict(PARAMETROS, desvio_selic=1e-9, desvio_ipca=1e-9)
+    if cdi is not None:
+        parametros['cdi'] = cdi
+
+    monte_carlo = simular_monte_carlo(10000, 500, 36, parametros, trajetorias=20, semente=7, focus=None)
+    deterministico = {
+        resultado['nome']: resultado['valor_liquido']
+        for resultado in simular_investimentos_padrao(10000, 500, 36, parametros, usar_cache=False)
+    }
+
+    for resultado in monte_carlo['resultados']:
+        assert resultado['valor_liquido']['p50'] == pytest.approx(deterministico[resultado['nome']], abs=0.02), resultado['nome']
+
+
+@pytest.mark.parametrize('parametros, taxa', [
+    ({**PARAMETROS, 'tesouro_prefixado_nominal': 0.0}, 0.0),
+    ({'selic': 0.0, 'ipca': 4.5}, 0.0),
+    ({'ipca': 4.5}, 15.0),
+])
+def test_prefixado_respeita_taxa_zero(parametros, taxa):
+    resultado = simular_monte_carlo(10000, 0, 12, {**parametros, 'taxa_custodia': 0.0}, trajetorias=5, semente=1,
+                                    focus=None, pontos=None)
+    prefixado = next(item for item in resultado['resultados'] if item['nome'] == 'Tesouro Prefixado')
+    assert prefixado['valor_liquido']['p50'] == pytest.approx(10000 * (1 + taxa / 100) - 10000 * taxa / 100 * 0.2, abs=0.01)
@@ -0,0 +1,85 @@
+"""ETag, GET condicional e compressão das respostas JSON (app/respostas.py)."""
+import gzip
+import json
+
+import pytest
+
+CENARIO = {
+    'valor_inicial': 10000,
+    'aportes_mensais': 1000,
+    'meses': 36,
+    'parametros': {'selic': 14.75, 'cdi': 14.65, 'ipca': 3.81}
+}
+
+
+def _simular(client, **cabecalhos):
+    return client.post('/api/simular-renda-fixa', json=CENARIO, headers=cabecalhos)
+
+
+def test_etag_e_304(client):
+    primeira = _simular(client)
+    etag = primeira.headers['ETag']
+    assert primeira.status_code == 200
+    assert primeira.headers['Cache-Control'] == 'private, no-cache'
+    assert 'Content-Encoding' not in primeira.headers
+
+    repetida = _simular(client, **{'If-None-Match': etag})
+    assert repetida.status_code == 304
+    assert repetida.data == b''
+    assert repetida.headers['ETag'] == etag
+
+    # Outro cenário, outra ETag
+    outra = client.post('/api/simular-renda-fixa', json={**CENARIO, 'meses': 12}, headers={'If-None-Match': etag})
+    assert outra.status_code == 200
+    assert outra.headers['ETag'] != etag
+
+
+def test_gzip_com_etag_propria_e_304(client):
+    simples = _simular(client)
+    comprimida = _simular(client, **{'Accept-Encoding': 'gzip'})
+
+    assert comprimida.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in comprimida.headers['Vary']
+    assert comprimida.headers['ETag'] == simples.headers['ETag'][:-1] + '-gzip"'
+    assert json.loads(gzip.decompress(comprimida.data)) == simples.get_json()
+
+    # O navegador devolve a ETag com sufixo que recebeu junto do corpo comprimido
+    repetida = _simular(client, **{'Accept-Encoding': 'gzip', 'If-None-Match': comprimida.headers['ETag']})
+    assert repetida.status_code == 304
+    assert repetida.headers['ETag'] == comprimida.headers['ETag']
+    assert 'Content-Encoding' not in repetida.headers
+    assert repetida.data == b''
+
+
+def test_brotli_preferido_quando_disponivel(client):
+    brotli = pytest.importorskip('brotli')
+    simples = _simular(client)
+    comprimida = _simular(client, **{'Accept-Encoding': 'gzip, br'})
+
+    assert comprimida.headers['Content-Encoding'] == 'br'
+    assert comprimida.headers['ETag'] == simples.headers['ETag'][:-1] + '-br"'
+    assert json.loads(brotli.decompress(comprimida.data)) == simples.get_json()
+
+
+def test_resposta_pequena_nao_e_comprimida(app, client):
+    app.config['COMPRESSAO_MIN_BYTES'] = 10 ** 7
+    resposta = _simular(client, **{'Accept-Encoding': 'gzip'})
+    assert resposta.status_code == 200
+    assert 'Content-Encoding' not in resposta.headers
+    assert not resposta.headers['ETag'].endswith('-gzip"')
+
+
+def test_ndjson_do_lote_nao_e_comprimido(client):
+    resposta = client.post(
+        '/api/simular-renda-fixa/lote',
+        json={**CENARIO, 'cenarios': [{'meses': meses} for meses in (12, 60, 120, 360)]},
+        headers={'Accept-Encoding': 'gzip, br'}
+    )
+
+    assert resposta.status_code == 200
+    assert resposta.mimetype == 'application/x-ndjson'
+    assert resposta.is_streamed
+    assert 'Content-Encoding' not in resposta.headers
+    linhas = [json.loads(linha) for linha in resposta.get_data(as_text=True).splitlines()]
+    assert [linha['indice'] for linha in linhas] == [0, 1, 2, 3]
+    assert all(len(linha['resultados']) == 8 for linha in linhas)
@@ -0,0 +1,93 @@
+"""Grade de sensibilidade: células iguais ao simulador padrão e eixos validados."""
+import numpy as np
+import pytest
+
+from app.calculations import simular_investimentos_padrao
+from app.sensibilidade import grade_sensibilidade, valores_eixo
+
+PARAMETROS = {
+    'selic': 14.75,
+    'cdi': 14.65,
+    'ipca': 3.81,
+    'rentabilidade_lci_lca': 85.0,
+    'rentabilidade_cdb': 100.0,
+    'rentabilidade_fundo_di': 98.0,
+    'taxa_admin_fundo_di': 0.25,
+    'tesouro_prefixado_nominal': 13.0,
+    'tesouro_ipca_mais': 7.2,
+    'taxa_custodia': 0.2
+}
+CENARIO = {'valor_inicial': 10000.0, 'aportes_mensais': 1000.0, 'meses': 36, 'parametros': PARAMETROS}
+PRODUTOS_CDI = ('LCI e LCA', 'CDB', 'Fundo DI')
+
+
+def _simulador(meses=36, **parametros):
+    return {
+        resultado['nome']: resultado['valor_liquido']
+        for resultado in simular_investimentos_padrao(
+            10000.0, 1000.0, meses, {**PARAMETROS, **parametros}, usar_cache=False
+        )
+    }
+
+
+def test_celulas_iguais_ao_simulador(app):
+    grade = grade_sensibilidade(CENARIO, ('ipca', np.array([3.0, 6.0])), ('meses', np.array([12.0, 36.0, 61.0])),
+                                por_produto=True)
+
+    for i, ipca in enumerate([3.0, 6.0]):
+        for j, meses in enumerate([12, 36, 61]):
+            esperado = _simulador(meses, ipca=ipca)
+            for nome, matriz in grade['por_produto'].items():
+                assert matriz[i][j] == pytest.approx(esperado[nome], abs=0.01), (nome, ipca, meses)
+
+
+def test_eixo_selic_move_produtos_cdi(app):
+    grade = grade_sensibilidade(CENARIO, ('selic', np.array([10.0, 16.0])), ('meses', np.array([36.0])),
+                                por_produto=True)
+
+    for nome in PRODUTOS_CDI:
+        baixa, alta = grade['por_produto'][nome][0][0], grade['por_produto'][nome][1][0]
+        assert alta > baixa, nome
+    # O CDI de cada célula mantém a diferença Selic - CDI do cenário (0,10 p.p.)
+    for k, selic in enumerate([10.0, 16.0]):
+        esperado = _simulador(selic=selic, cdi=selic - 0.1)
+        for nome in PRODUTOS_CDI:
+            assert grade['por_produto'][nome][k][0] == pytest.approx(esperado[nome], abs=0.01), (nome, selic)
+
+
+def test_eixos_selic_e_cdi_independentes(app):
+    grade = grade_sensibilidade(CENARIO, ('selic', np.array([10.0, 16.0])), ('cdi', np.array([12.0])),
+                                por_produto=True)
+    cdb = grade['por_produto']['CDB']
+    assert cdb[0][0] == cdb[1][0] == pytest.approx(_simulador(selic=10.0, cdi=12.0)['CDB'], abs=0.01)
+
+
+@pytest.mark.parametrize('parametro, valores', [
+    ('selic', [12, None]),
+    ('meses', [12, None]),
+    ('ipca', ['abc']),
+    ('selic', [float('inf')]),
+])
+def test_valores_nao_finitos_sao_recusados(parametro, valores):
+    with pytest.raises(ValueError, match=f'Eixo {parametro}'):
+        valores_eixo(parametro, valores=valores)
+
+
+def test_api_recusa_eixo_com_null(client):
+    resposta = client.post('/api/simular-renda-fixa/sensibilidade', json={
+        **CENARIO,
+        'eixos': [{'parametro': 'selic', 'valores': [12, None]}, {'parametro': 'meses', 'valores': [12, 36]}]
+    })
+    assert resposta.status_code == 400
+    assert b'NaN' not in resposta.data
+
+
+def test_api_eixo_selic_com_parametros_da_pagina(client):
+    resposta = client.post('/api/simular-renda-fixa/sensibilidade', json={
+        **CENARIO,
+        'por_produto': True,
+        'eixos': [{'parametro': 'selic', 'inicio': 10, 'fim': 16, 'passos': 2}, {'parametro': 'meses', 'valores': [36]}]
+    })
+    assert resposta.status_code == 200
+    cdb = resposta.get_json()['por_produto']['CDB']
+    assert cdb[1][0] > cdb[0][0]
@@ -0,0 +1,99 @@
+"""Histórico local do SGS: atualização incremental de app/sgs_historico.py."""
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.sgs_historico import atualizar_serie, carregar_serie, serie_entre
+
+# Selic diária sintética: um valor por dia útil de 2025
+DIAS_UTEIS = [dia.date() for dia in pd.bdate_range('2025-01-01', '2025-12-31')]
+
+
+def _valor(dia):
+    return round(0.055 + dia.timetuple().tm_yday / 1e5, 6)
+
+
+def _api_sgs(caminho, params):
+    """Responde como a API do SGS: observações entre dataInicial e dataFinal, 404 se vazio."""
+    de = datetime.strptime(params['dataInicial'], '%d/%m/%Y').date()
+    ate = datetime.strptime(params['dataFinal'], '%d/%m/%Y').date()
+    registros = [
+        {'data': dia.strftime('%d/%m/%Y'), 'valor': str(_valor(dia)).replace('.', ',')}
+        for dia in DIAS_UTEIS if de <= dia <= ate
+    ]
+    return (200, registros) if registros else (404, {'erro': 'Valores não encontrados'})
+
+
+@pytest.fixture
+def servidor(servidor_stub):
+    return servidor_stub(_api_sgs)
+
+
+def _intervalos(servidor):
+    return [(params['dataInicial'], params['dataFinal']) for _, params in servidor.requisicoes]
+
+
+def test_primeira_carga_desde_inicio(servidor, tmp_path):
+    novas = atualizar_serie('selic', tmp_path, inicio=date(2025, 10, 1), hoje=date(2025, 10, 10),
+                            base_url=servidor.url)
+
+    assert novas == 8
+    assert _intervalos(servidor) == [('01/10/2025', '10/10/2025')]
+    assert servidor.requisicoes[0][0] == '/dados/serie/bcdata.sgs.11/dados'
+    datas, valores = serie_entre('selic', pasta=tmp_path)
+    assert datas[0] == np.datetime64('2025-10-01') and datas[-1] == np.datetime64('2025-10-10')
+    assert valores[-1] == _valor(date(2025, 10, 10))
+
+
+def test_baixa_so_depois_da_ultima_data(servidor, tmp_path):
+    atualizar_serie('selic', tmp_path, inicio=date(2025, 10, 1), hoje=date(2025, 10, 10), base_url=servidor.url)
+    servidor.requisicoes.clear()
+
+    novas = atualizar_serie('selic', tmp_path, inicio=date(2025, 1, 1), hoje=date(2025, 10, 17),
+                            base_url=servidor.url)
+
+    # `inicio` só vale para séries novas: a consulta começa no dia seguinte à última observação
+    assert novas == 5
+    assert _intervalos(servidor) == [('11/10/2025', '17/10/2025')]
+    datas = carregar_serie('selic', tmp_path)['data']
+    assert len(datas) == 13
+    assert np.all(np.diff(datas) > np.timedelta64(0, 'D'))
+
+
+def test_serie_em_dia_nao_consulta_a_api(servidor, tmp_path):
+    atualizar_serie('selic', tmp_path, inicio=date(2025, 10, 1), hoje=date(2025, 10, 10), base_url=servidor.url)
+    arquivo = tmp_path / 'selic.npy'
+    mtime = arquivo.stat().st_mtime_ns
+    servidor.requisicoes.clear()
+
+    assert atualizar_serie('selic', tmp_path, hoje=date(2025, 10, 10), base_url=servidor.url) == 0
+    assert servidor.requisicoes == []
+
+    # Fim de semana: a API responde 404 e o arquivo não é regravado
+    assert atualizar_serie('selic', tmp_path, hoje=date(2025, 10, 12), base_url=servidor.url) == 0
+    assert _intervalos(servidor) == [('11/10/2025', '12/10/2025')]
+    assert arquivo.stat().st_mtime_ns == mtime
+
+
+def test_ignora_observacoes_repetidas(servidor_stub, tmp_path):
+    # API que devolve o ano inteiro, sem respeitar dataInicial
+    servidor = servidor_stub(lambda caminho, params: _api_sgs(caminho, {**params, 'dataInicial': '01/01/2025'}))
+    atualizar_serie('selic', tmp_path, inicio=date(2025, 10, 1), hoje=date(2025, 10, 10), base_url=servidor.url)
+
+    novas = atualizar_serie('selic', tmp_path, hoje=date(2025, 10, 17), base_url=servidor.url)
+
+    assert novas == 5
+    assert len(carregar_serie('selic', tmp_path)) == len([dia for dia in DIAS_UTEIS if dia <= date(2025, 10, 17)])
+
+
+def test_divide_em_janelas_de_dez_anos(servidor, tmp_path):
+    atualizar_serie('selic', tmp_path, inicio=date(2000, 1, 1), hoje=date(2025, 1, 3), base_url=servidor.url)
+
+    assert _intervalos(servidor) == [
+        ('01/01/2000', '31/12/2009'),
+        ('01/01/2010', '31/12/2019'),
+        ('01/01/2020', '03/01/2025'),
+    ]
+    assert len(carregar_serie('selic', tmp_path)) == 3
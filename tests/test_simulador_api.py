@@ -0,0 +1,52 @@
+"""Validação dos cenários do simulador padrão (/api/simular-renda-fixa e /lote)."""
+import pytest
+
+CENARIO = {
+    'valor_inicial': 10000,
+    'aportes_mensais': 1000,
+    'meses': 36,
+    'parametros': {'selic': 14.75, 'cdi': 14.65, 'ipca': 3.81}
+}
+
+
+def test_simulacao_valida(client):
+    resposta = client.post('/api/simular-renda-fixa', json=CENARIO)
+    assert resposta.status_code == 200
+    assert b'NaN' not in resposta.data
+
+
+@pytest.mark.parametrize('valor', [None, 'abc', True, float('inf')])
+def test_parametro_nao_numerico_retorna_400(client, valor):
+    cenario = {**CENARIO, 'parametros': {**CENARIO['parametros'], 'selic': valor}}
+    if valor == float('inf'):
+        # JSON não representa infinito: o corpo é enviado com o literal Infinity
+        resposta = client.post(
+            '/api/simular-renda-fixa', data='{"valor_inicial": 1, "meses": 12, "parametros": {"selic": Infinity}}',
+            content_type='application/json'
+        )
+    else:
+        resposta = client.post('/api/simular-renda-fixa', json=cenario)
+    assert resposta.status_code == 400
+    assert 'selic' in resposta.get_json()['error']
+
+
+def test_lote_com_parametro_nulo_retorna_400(client):
+    resposta = client.post('/api/simular-renda-fixa/lote', json={
+        **CENARIO,
+        'cenarios': [{}, {'parametros': {'ipca': None}}]
+    })
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'].startswith('Cenário 1:')
+
+
+@pytest.mark.parametrize('cenario', [1, 'abc', None, []])
+def test_lote_com_cenario_que_nao_e_objeto_retorna_400(client, cenario):
+    resposta = client.post('/api/simular-renda-fixa/lote', json={**CENARIO, 'cenarios': [{}, cenario]})
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'] == 'Cenário 1: Cenário deve ser um objeto'
+
+
+def test_parametros_que_nao_sao_objeto_retornam_400(client):
+    resposta = client.post('/api/simular-renda-fixa', json={**CENARIO, 'parametros': 'abc'})
+    assert resposta.status_code == 400
+    assert resposta.get_json()['error'] == 'parametros deve ser um objeto'
@@ -0,0 +1,109 @@
+"""Busca das séries SGS em scripts/update_rates.py: novas tentativas, backoff e prazo."""
+import time
+
+import pytest
+
+from scripts import update_rates
+from scripts.update_rates import backoff_delay, fetch_all_series, fetch_sgs_series
+
+
+@pytest.fixture(autouse=True)
+def backoff_curto(monkeypatch):
+    monkeypatch.setattr(update_rates, 'BACKOFF_BASE', 0.01)
+    monkeypatch.setattr(update_rates, 'BACKOFF_MAX', 0.04)
+
+
+def _sequencia(*respostas):
+    """Responde cada requisição com o próximo item; o último se repete."""
+    fila = list(respostas)
+
+    def responder(caminho, params):
+        return fila.pop(0) if len(fila) > 1 else fila[0]
+    return responder
+
+
+def _ultimo(valor):
+    return 200, [{'data': '15/10/2025', 'valor': valor}]
+
+
+def test_backoff_exponencial_limitado():
+    assert [backoff_delay(tentativa) for tentativa in range(1, 6)] == [0.01, 0.02, 0.04, 0.04, 0.04]
+
+
+def test_repete_falhas_temporarias(servidor_stub):
+    servidor = servidor_stub(_sequencia((503, {}), (429, {}), _ultimo('15,00')))
+
+    resultado = fetch_sgs_series(432, base_url=servidor.url)
+
+    assert resultado.value == 15.0
+    assert resultado.attempts == 3
+    assert resultado.error is None
+    assert [caminho for caminho, _ in servidor.requisicoes] == ['/dados/serie/bcdata.sgs.432/dados/ultimos/1'] * 3
+
+
+def test_desiste_apos_max_tentativas(servidor_stub):
+    servidor = servidor_stub(_sequencia((500, {})))
+
+    resultado = fetch_sgs_series(432, base_url=servidor.url)
+
+    assert resultado.value is None
+    assert resultado.attempts == update_rates.MAX_ATTEMPTS
+    assert resultado.error == 'HTTP 500'
+    assert len(servidor.requisicoes) == update_rates.MAX_ATTEMPTS
+
+
+def test_erro_do_cliente_nao_e_repetido(servidor_stub):
+    servidor = servidor_stub(_sequencia((404, {})))
+
+    resultado = fetch_sgs_series(432, base_url=servidor.url)
+
+    assert resultado.value is None
+    assert resultado.attempts == 1
+    assert len(servidor.requisicoes) == 1
+
+
+def test_nao_espera_alem_do_prazo(servidor_stub, monkeypatch):
+    monkeypatch.setattr(update_rates, 'BACKOFF_BASE', 5.0)
+    monkeypatch.setattr(update_rates, 'BACKOFF_MAX', 5.0)
+    servidor = servidor_stub(_sequencia((503, {}), _ultimo('15,00')))
+
+    inicio = time.monotonic()
+    resultado = fetch_sgs_series(432, base_url=servidor.url, deadline=inicio + 1.0)
+
+    # O backoff de 5s passaria do prazo: desiste sem a segunda tentativa
+    assert resultado.value is None
+    assert resultado.attempts == 1
+    assert time.monotonic() - inicio < 1.0
+
+
+def test_prazo_limita_o_timeout_da_tentativa(servidor_stub):
+    servidor = servidor_stub(lambda caminho, params: (*_ultimo('15,00'), 2.0))
+
+    inicio = time.monotonic()
+    resultado = fetch_sgs_series(432, base_url=servidor.url, deadline=inicio + 0.3)
+
+    assert resultado.value is None
+    assert time.monotonic() - inicio < 1.5
+
+
+def test_busca_todas_as_series_dentro_do_prazo(servidor_stub):
+    cdi = _sequencia((503, {}), _ultimo('14,90'))
+
+    def responder(caminho, params):
+        if 'bcdata.sgs.433/' in caminho:
+            return (*_ultimo('0,48'), 3.0)
+        if 'bcdata.sgs.4389/' in caminho:
+            return cdi(caminho, params)
+        return _ultimo('15,00')
+
+    servidor = servidor_stub(responder)
+    series = {'selic_meta': 432, 'cdi_over': 4389, 'ipca_mensal': 433}
+
+    inicio = time.monotonic()
+    resultados = fetch_all_series(series, base_url=servidor.url, run_deadline=0.5)
+
+    assert time.monotonic() - inicio < 2.0
+    assert resultados['selic_meta'].value == 15.0
+    assert (resultados['cdi_over'].value, resultados['cdi_over'].attempts) == (14.9, 2)
+    assert resultados['ipca_mensal'].value is None
+    assert set(resultados) == set(series)